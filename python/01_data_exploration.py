@@ -6,6 +6,16 @@
 import pandas as pd
 import os
 import sys
+import time
+import argparse
+
+from data_loader import SOURCE_TABLES, load_tables, print_timings
+from fast_profile import profile_csv
+
+parser = argparse.ArgumentParser(description='Explore the Olist source tables')
+parser.add_argument('--exact', action='store_true',
+                    help='Load every table fully and compute exact statistics (slow on large exports)')
+args = parser.parse_args()
 
 print("=" * 60)
 print("CUSTOMER SEGMENTATION PROJECT - STEP 1: DATA EXPLORATION")
@@ -13,7 +23,7 @@ print("=" * 60)
 
 # Define paths
 current_dir = os.path.dirname(os.path.abspath(__file__))
-project_dir = os.path.dirname(current_dir)
+project_dir = os.environ.get('SEGMENTATION_PROJECT_DIR', os.path.dirname(current_dir))
 data_dir = os.path.join(project_dir, 'data')
 
 print(f"\n📁 Project Directory: {project_dir}")
@@ -35,17 +45,27 @@ for i, file in enumerate(csv_files, 1):
     file_size = os.path.getsize(os.path.join(data_dir, file)) / 1024  # KB
     print(f"   {i}. {file} ({file_size:.1f} KB)")
 
+if args.exact:
+    # Load the key tables once, concurrently (shared with 02_data_preparation.py)
+    print("\n📥 Loading key datasets...")
+    load_start = time.perf_counter()
+    key_tables = {name: file_name for name, file_name in SOURCE_TABLES.items()
+                  if os.path.exists(os.path.join(data_dir, file_name))}
+    tables, load_timings = load_tables(data_dir, key_tables)
+    print_timings(load_timings, time.perf_counter() - load_start)
+    loaded = {SOURCE_TABLES[name]: df for name, df in tables.items()}
+
 # Function to explore each dataset
 def explore_dataset(file_name):
     print(f"\n{'-' * 40}")
     print(f"📋 Exploring: {file_name}")
     print(f"{'-' * 40}")
     
-    file_path = os.path.join(data_dir, file_name)
-    
     try:
-        # Load the data
-        df = pd.read_csv(file_path)
+        # Use the table loaded above
+        if file_name not in loaded:
+            raise FileNotFoundError(os.path.join(data_dir, file_name))
+        df = loaded[file_name]
         
         # Basic information
         print(f"   Rows: {len(df):,}")
@@ -85,37 +105,117 @@ def explore_dataset(file_name):
         print(f"❌ Error loading {file_name}: {str(e)}")
         return None
 
+# Function to profile each dataset in a single streaming pass
+def profile_dataset(file_name):
+    print(f"\n{'-' * 40}")
+    print(f"📋 Profiling: {file_name}")
+    print(f"{'-' * 40}")
+    
+    file_path = os.path.join(data_dir, file_name)
+    
+    try:
+        start = time.perf_counter()
+        profile = profile_csv(file_path)
+        columns = list(profile.columns.values())
+        
+        # Basic information
+        print(f"   Rows: {profile.rows:,}")
+        print(f"   Columns: {len(columns)}")
+        print(f"   Memory (estimated from sample): {profile.memory_estimate() / 1024**2:.1f} MB")
+        
+        # Show columns with distinct counts
+        print(f"\n   Columns:")
+        for col in columns[:10]:  # Show first 10 columns
+            distinct, exact = col.distinct()
+            print(f"      • {col.name} ({'' if exact else '≈'}{distinct:,} distinct)")
+        if len(columns) > 10:
+            print(f"      ... and {len(columns) - 10} more")
+        
+        # Show data types
+        print(f"\n   Data Types:")
+        for dtype, count in pd.Series([str(col.dtype) for col in columns]).value_counts().items():
+            print(f"      • {dtype}: {count}")
+        
+        # Check for missing values
+        missing_cols = [col for col in columns if col.nulls > 0]
+        if missing_cols:
+            print(f"\n   ⚠️ Missing Values Found:")
+            for col in missing_cols:
+                pct = (col.nulls / profile.rows) * 100
+                print(f"      • {col.name}: {col.nulls:,} ({pct:.1f}%)")
+        else:
+            print(f"\n   ✅ No missing values")
+        
+        # Show a few rows from the reservoir sample
+        print(f"\n   3 sampled rows:")
+        print(profile.sample.head(3).to_string(index=False))
+        print(f"\n   ⏱️ Profiled in {(time.perf_counter() - start) * 1000:.0f} ms")
+        
+        return profile.columns
+        
+    except Exception as e:
+        print(f"❌ Error profiling {file_name}: {str(e)}")
+        return None
+
 # Explore the most important datasets for customer segmentation
 print("\n" + "=" * 60)
 print("ANALYZING KEY DATASETS FOR CUSTOMER SEGMENTATION")
 print("=" * 60)
 
-# 1. Customers Dataset
-customers_df = explore_dataset('olist_customers_dataset.csv')
-if customers_df is not None:
-    print(f"\n✅ Unique customers: {customers_df['customer_unique_id'].nunique():,}")
-    print(f"✅ States covered: {customers_df['customer_state'].nunique()}")
-    print(f"✅ Cities covered: {customers_df['customer_city'].nunique():,}")
-
-# 2. Orders Dataset
-orders_df = explore_dataset('olist_orders_dataset.csv')
-if orders_df is not None:
-    orders_df['order_purchase_timestamp'] = pd.to_datetime(orders_df['order_purchase_timestamp'])
-    print(f"\n✅ Date range: {orders_df['order_purchase_timestamp'].min()} to {orders_df['order_purchase_timestamp'].max()}")
-    print(f"✅ Order statuses: {orders_df['order_status'].unique().tolist()}")
-
-# 3. Order Items Dataset
-items_df = explore_dataset('olist_order_items_dataset.csv')
-if items_df is not None:
-    print(f"\n✅ Average price: R${items_df['price'].mean():.2f}")
-    print(f"✅ Total revenue: R${items_df['price'].sum():,.2f}")
-    print(f"✅ Average freight: R${items_df['freight_value'].mean():.2f}")
-
-# 4. Payments Dataset
-payments_df = explore_dataset('olist_order_payments_dataset.csv')
-if payments_df is not None:
-    print(f"\n✅ Payment types: {payments_df['payment_type'].unique().tolist()}")
-    print(f"✅ Average payment: R${payments_df['payment_value'].mean():.2f}")
+if args.exact:
+    # 1. Customers Dataset
+    customers_df = explore_dataset('olist_customers_dataset.csv')
+    if customers_df is not None:
+        print(f"\n✅ Unique customers: {customers_df['customer_unique_id'].nunique():,}")
+        print(f"✅ States covered: {customers_df['customer_state'].nunique()}")
+        print(f"✅ Cities covered: {customers_df['customer_city'].nunique():,}")
+
+    # 2. Orders Dataset
+    orders_df = explore_dataset('olist_orders_dataset.csv')
+    if orders_df is not None:
+        orders_df['order_purchase_timestamp'] = pd.to_datetime(orders_df['order_purchase_timestamp'])
+        print(f"\n✅ Date range: {orders_df['order_purchase_timestamp'].min()} to {orders_df['order_purchase_timestamp'].max()}")
+        print(f"✅ Order statuses: {orders_df['order_status'].unique().tolist()}")
+
+    # 3. Order Items Dataset
+    items_df = explore_dataset('olist_order_items_dataset.csv')
+    if items_df is not None:
+        print(f"\n✅ Average price: R${items_df['price'].mean():.2f}")
+        print(f"✅ Total revenue: R${items_df['price'].sum():,.2f}")
+        print(f"✅ Average freight: R${items_df['freight_value'].mean():.2f}")
+
+    # 4. Payments Dataset
+    payments_df = explore_dataset('olist_order_payments_dataset.csv')
+    if payments_df is not None:
+        print(f"\n✅ Payment types: {payments_df['payment_type'].unique().tolist()}")
+        print(f"✅ Average payment: R${payments_df['payment_value'].mean():.2f}")
+else:
+    # 1. Customers Dataset
+    customers_profile = profile_dataset('olist_customers_dataset.csv')
+    if customers_profile is not None:
+        print(f"\n✅ Unique customers: ≈{customers_profile['customer_unique_id'].distinct()[0]:,}")
+        print(f"✅ States covered: {customers_profile['customer_state'].distinct()[0]}")
+        print(f"✅ Cities covered: ≈{customers_profile['customer_city'].distinct()[0]:,}")
+
+    # 2. Orders Dataset
+    orders_profile = profile_dataset('olist_orders_dataset.csv')
+    if orders_profile is not None:
+        purchase = orders_profile['order_purchase_timestamp']
+        print(f"\n✅ Date range: {purchase.minimum} to {purchase.maximum}")
+        print(f"✅ Order statuses: {sorted(orders_profile['order_status'].values or [])}")
+
+    # 3. Order Items Dataset
+    items_profile = profile_dataset('olist_order_items_dataset.csv')
+    if items_profile is not None:
+        print(f"\n✅ Average price: R${items_profile['price'].mean():.2f}")
+        print(f"✅ Total revenue: R${items_profile['price'].total:,.2f}")
+        print(f"✅ Average freight: R${items_profile['freight_value'].mean():.2f}")
+
+    # 4. Payments Dataset
+    payments_profile = profile_dataset('olist_order_payments_dataset.csv')
+    if payments_profile is not None:
+        print(f"\n✅ Payment types: {sorted(payments_profile['payment_type'].values or [])}")
+        print(f"✅ Average payment: R${payments_profile['payment_value'].mean():.2f}")
 
 print("\n" + "=" * 60)
 print("✅ DATA EXPLORATION COMPLETE!")
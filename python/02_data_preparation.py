@@ -6,15 +6,19 @@
 import pandas as pd
 import numpy as np
 import os
+import time
 from datetime import datetime
 
+from data_loader import load_tables, print_timings
+from id_codes import encode_tables, load_dictionaries, save_dictionaries
+
 print("=" * 60)
 print("CUSTOMER SEGMENTATION PROJECT - STEP 2: DATA PREPARATION")
 print("=" * 60)
 
 # Define paths
 current_dir = os.path.dirname(os.path.abspath(__file__))
-project_dir = os.path.dirname(current_dir)
+project_dir = os.environ.get('SEGMENTATION_PROJECT_DIR', os.path.dirname(current_dir))
 data_dir = os.path.join(project_dir, 'data')
 
 print(f"\n📂 Loading datasets from: {data_dir}")
@@ -27,38 +31,30 @@ if not os.path.exists(data_dir):
     print("2. Downloaded and extracted the dataset into the data folder")
     exit(1)
 
-# Load all necessary datasets
-print("\n1️⃣ Loading customers dataset...")
-customers_file = os.path.join(data_dir, 'olist_customers_dataset.csv')
-if not os.path.exists(customers_file):
-    print(f"❌ ERROR: Cannot find {customers_file}")
+# Load all necessary datasets (concurrently, from snapshots when current)
+print("\n📥 Loading customers, orders, order items and payments...")
+load_start = time.perf_counter()
+try:
+    tables, load_timings = load_tables(data_dir)
+except FileNotFoundError as e:
+    print(f"❌ ERROR: Cannot find {e}")
     exit(1)
-customers = pd.read_csv(customers_file)
+customers = tables['customers']
+orders = tables['orders']
+items = tables['items']
+payments = tables['payments']
 print(f"   ✅ Loaded {len(customers):,} customer records")
-
-print("\n2️⃣ Loading orders dataset...")
-orders_file = os.path.join(data_dir, 'olist_orders_dataset.csv')
-if not os.path.exists(orders_file):
-    print(f"❌ ERROR: Cannot find {orders_file}")
-    exit(1)
-orders = pd.read_csv(orders_file)
 print(f"   ✅ Loaded {len(orders):,} order records")
-
-print("\n3️⃣ Loading order items dataset...")
-items_file = os.path.join(data_dir, 'olist_order_items_dataset.csv')
-if not os.path.exists(items_file):
-    print(f"❌ ERROR: Cannot find {items_file}")
-    exit(1)
-items = pd.read_csv(items_file)
 print(f"   ✅ Loaded {len(items):,} order item records")
-
-print("\n4️⃣ Loading payments dataset...")
-payments_file = os.path.join(data_dir, 'olist_order_payments_dataset.csv')
-if not os.path.exists(payments_file):
-    print(f"❌ ERROR: Cannot find {payments_file}")
-    exit(1)
-payments = pd.read_csv(payments_file)
 print(f"   ✅ Loaded {len(payments):,} payment records")
+print_timings(load_timings, time.perf_counter() - load_start)
+
+# Replace hex string ids with dense integer codes for all joins and groupbys
+print("\n🔢 Encoding ids as integer codes...")
+id_dictionaries = encode_tables(tables, load_dictionaries(data_dir))
+save_dictionaries(id_dictionaries, data_dir)
+for space, dictionary in id_dictionaries.items():
+    print(f"   • {space}: {len(dictionary):,} codes")
 
 # Convert date columns to datetime
 print("\n📅 Converting date columns...")
@@ -6,15 +6,26 @@
 import pandas as pd
 import numpy as np
 import os
+import argparse
 from datetime import datetime
 
+from segmentation.pipeline import load_prepared_data, compute_customer_metrics, compute_seller_metrics, decode_seller_ids
+from sample_preview import WEIGHT_COLUMN, sample_prepared_data
+
+parser = argparse.ArgumentParser(description='Calculate customer and seller metrics')
+parser.add_argument('--preview', type=float, nargs='?', const=0.01, metavar='FRACTION',
+                    help='Stratified sample of customers only (default fraction: 0.01), '
+                         'written to customer_metrics_preview.csv for 04 --preview')
+parser.add_argument('--seed', type=int, default=0, help='Preview sample seed (default: 0)')
+args = parser.parse_args()
+
 print("=" * 60)
 print("CUSTOMER SEGMENTATION PROJECT - STEP 3: CUSTOMER METRICS")
 print("=" * 60)
 
 # Define paths
 current_dir = os.path.dirname(os.path.abspath(__file__))
-project_dir = os.path.dirname(current_dir)
+project_dir = os.environ.get('SEGMENTATION_PROJECT_DIR', os.path.dirname(current_dir))
 data_dir = os.path.join(project_dir, 'data')
 
 # Load prepared data
@@ -26,68 +37,36 @@ if not os.path.exists(data_file):
     print("Please run 02_data_preparation.py first")
     exit()
 
-data = pd.read_csv(data_file)
-data['order_purchase_timestamp'] = pd.to_datetime(data['order_purchase_timestamp'])
+data = load_prepared_data(data_file)
 print(f"   ✅ Loaded {len(data):,} records")
 
 # Find the most recent date in the dataset
 latest_date = data['order_purchase_timestamp'].max()
 print(f"\n📅 Latest order date: {latest_date.date()}")
 
+# Preview: keep a stratified sample (state x one-time/repeat) of the customers.
+# The latest date above still comes from the full data.
+if args.preview:
+    n_customers = data['customer_unique_id'].nunique()
+    data, sample_weights = sample_prepared_data(data, args.preview, args.seed)
+    print(f"\n🔎 Preview: {len(sample_weights):,} of {n_customers:,} customers "
+          f"({len(sample_weights) / n_customers:.1%}), stratified by state and repeat status")
+
 # Calculate customer metrics
 print("\n📊 Calculating metrics for each customer...")
 
-# Group by customer
-customer_metrics = data.groupby('customer_unique_id').agg({
-    # Recency: days since last purchase
-    'order_purchase_timestamp': lambda x: (latest_date - x.max()).days,
-    # Frequency: number of unique orders
-    'order_id': 'nunique',
-    # Monetary: total spent
-    'price': 'sum',
-    # Additional metrics
-    'freight_value': 'sum',
-    'customer_state': 'first',
-    'customer_city': 'first'
-}).reset_index()
-
-# Rename columns
-customer_metrics.columns = ['customer_id', 'recency_days', 'frequency', 
-                            'monetary', 'total_freight', 'state', 'city']
+# Recency, frequency, monetary, lifetime and order spacing in one grouped pass
+customer_metrics = compute_customer_metrics(data, latest_date)
 
 print(f"   ✅ Calculated metrics for {len(customer_metrics):,} customers")
 
-# Calculate additional metrics
-print("\n📈 Calculating derived metrics...")
-
-# Average order value
-customer_metrics['avg_order_value'] = customer_metrics['monetary'] / customer_metrics['frequency']
-
-# Customer lifetime (days between first and last purchase)
-customer_lifetime = data.groupby('customer_unique_id')['order_purchase_timestamp'].agg(['min', 'max']).reset_index()
-customer_lifetime['lifetime_days'] = (customer_lifetime['max'] - customer_lifetime['min']).dt.days
-customer_metrics = pd.merge(customer_metrics, customer_lifetime[['customer_unique_id', 'lifetime_days']], 
-                           left_on='customer_id', right_on='customer_unique_id', how='left')
-customer_metrics.drop('customer_unique_id', axis=1, inplace=True)
-
-# Flag for repeat customers
-customer_metrics['is_repeat'] = (customer_metrics['frequency'] > 1).astype(int)
-
-# Calculate average days between orders (for repeat customers)
-def avg_days_between_orders(customer_id):
-    customer_orders = data[data['customer_unique_id'] == customer_id]['order_purchase_timestamp'].sort_values()
-    if len(customer_orders) > 1:
-        return (customer_orders.iloc[-1] - customer_orders.iloc[0]).days / (len(customer_orders) - 1)
-    return 0
-
-# Apply to each customer (this may take a minute)
-print("\n⏱️ Calculating average days between orders...")
-customer_metrics['avg_days_between'] = customer_metrics['customer_id'].apply(avg_days_between_orders)
-
-# Product diversity
-product_diversity = data.groupby('customer_unique_id')['product_id'].nunique().reset_index()
-product_diversity.columns = ['customer_id', 'unique_products']
-customer_metrics = pd.merge(customer_metrics, product_diversity, on='customer_id', how='left')
+if args.preview:
+    customer_metrics[WEIGHT_COLUMN] = customer_metrics['customer_id'].map(sample_weights).to_numpy()
+else:
+    # Seller metrics from the same in-memory data (no second scan)
+    print("\n🏪 Calculating metrics for each seller...")
+    seller_metrics = compute_seller_metrics(data, latest_date)
+    print(f"   ✅ Calculated metrics for {len(seller_metrics):,} sellers")
 
 print("\n📊 METRICS SUMMARY STATISTICS")
 print("-" * 40)
@@ -115,10 +94,15 @@ for state, count in top_states.items():
 
 # Save metrics
 print("\n💾 Saving customer metrics...")
-metrics_file = os.path.join(data_dir, 'customer_metrics.csv')
+metrics_file = os.path.join(data_dir, 'customer_metrics_preview.csv' if args.preview else 'customer_metrics.csv')
 customer_metrics.to_csv(metrics_file, index=False)
 print(f"   ✅ Saved to: {metrics_file}")
 
+if not args.preview:
+    seller_metrics_file = os.path.join(data_dir, 'seller_metrics.csv')
+    decode_seller_ids(seller_metrics, data_dir).to_csv(seller_metrics_file, index=False)
+    print(f"   ✅ Seller metrics saved to: {seller_metrics_file}")
+
 # Create segment profiles for different groups
 print("\n📋 Creating segment profiles...")
 
@@ -147,4 +131,4 @@ print(value_profiles)
 print("\n" + "=" * 60)
 print("✅ CUSTOMER METRICS CALCULATED SUCCESSFULLY!")
 print("=" * 60)
-print("\nNext step: Run 04_rfm_segmentation.py")
\ No newline at end of file
+print(f"\nNext step: Run 04_rfm_segmentation.py{' --preview' if args.preview else ''}")
\ No newline at end of file
@@ -6,6 +6,21 @@
 import pandas as pd
 import numpy as np
 import os
+import argparse
+import time
+
+from rfm_engine import create_rfm_scores, assign_segments
+from segment_stats import segment_stats
+from segmentation.pipeline import segment_summary, decode_customer_ids, decode_seller_ids
+from geo_index import GeoIndex, build_geo_rollup
+from sample_preview import WEIGHT_COLUMN, weighted_rfm_scores, estimate_segments
+
+parser = argparse.ArgumentParser(description='Score customers and assign RFM segments')
+parser.add_argument('--preview', action='store_true',
+                    help='Estimate the segment mix from customer_metrics_preview.csv (03 --preview)')
+parser.add_argument('--confidence', type=float, default=0.95,
+                    help='Coverage of the preview error bounds (default: 0.95)')
+args = parser.parse_args()
 
 print("=" * 60)
 print("CUSTOMER SEGMENTATION PROJECT - STEP 4: RFM SEGMENTATION")
@@ -13,66 +28,53 @@ print("=" * 60)
 
 # Define paths
 current_dir = os.path.dirname(os.path.abspath(__file__))
-project_dir = os.path.dirname(current_dir)
+project_dir = os.environ.get('SEGMENTATION_PROJECT_DIR', os.path.dirname(current_dir))
 data_dir = os.path.join(project_dir, 'data')
 
 # Load customer metrics
 print(f"\n📂 Loading customer metrics...")
-metrics_file = os.path.join(data_dir, 'customer_metrics.csv')
+metrics_file = os.path.join(data_dir, 'customer_metrics_preview.csv' if args.preview else 'customer_metrics.csv')
 
 if not os.path.exists(metrics_file):
-    print("❌ ERROR: customer_metrics.csv not found!")
-    print("Please run 03_customer_metrics.py first")
+    print(f"❌ ERROR: {os.path.basename(metrics_file)} not found!")
+    print(f"Please run 03_customer_metrics.py{' --preview' if args.preview else ''} first")
     exit()
 
 customers = pd.read_csv(metrics_file)
 print(f"   ✅ Loaded {len(customers):,} customer records")
 
-# Function to create RFM scores
-print("\n📊 Creating RFM scores (1-5 scale)...")
+# ============================================
+# PREVIEW: SEGMENT ESTIMATES FROM A SAMPLE
+# ============================================
+if args.preview:
+    start = time.perf_counter()
+    weights = customers[WEIGHT_COLUMN].to_numpy()
+    customers = weighted_rfm_scores(customers, weights)
+    customers['segment'] = assign_segments(customers)
+    estimates = estimate_segments(customers, confidence=args.confidence)
+
+    print(f"\n🔎 Estimated segment mix for {weights.sum():,.0f} customers "
+          f"from a {len(customers):,} customer sample (± {args.confidence:.0%} error bounds):")
+    for segment, row in estimates.iterrows():
+        print(f"   {segment:<22} {row['customer_count']:>9,.0f} ± {row['customer_count_error']:<7,.0f}"
+              f" ({row['customer_pct']:>4.1f} ± {row['customer_pct_error']:.1f}% of customers)   "
+              f"R${row['total_revenue']:>13,.0f} ± {row['total_revenue_error']:<11,.0f}"
+              f" ({row['revenue_pct']:>4.1f} ± {row['revenue_pct_error']:.1f}% of revenue)")
+    print(f"   ✅ Estimated in {time.perf_counter() - start:.2f} seconds")
+
+    preview_file = os.path.join(project_dir, 'reports', 'segment_preview.csv')
+    os.makedirs(os.path.dirname(preview_file), exist_ok=True)
+    estimates.round(2).to_csv(preview_file)
+    print(f"   ✅ Saved to: {preview_file}")
+
+    print("\n" + "=" * 60)
+    print("✅ RFM SEGMENTATION PREVIEW COMPLETE!")
+    print("=" * 60)
+    print("\nRun 03_customer_metrics.py and 04_rfm_segmentation.py without --preview for the full segmentation")
+    exit()
 
-def create_rfm_scores(df):
-    """
-    Create RFM scores for each customer
-    """
-    df_copy = df.copy()
-    
-    # Recency score: lower days = higher score
-    # Use quantiles to create 5 groups
-    try:
-        df_copy['r_quartile'] = pd.qcut(df_copy['recency_days'], q=5, labels=False, duplicates='drop')
-        # Reverse so that lower recency gets higher score
-        df_copy['r_score'] = 5 - df_copy['r_quartile']
-    except:
-        # If quantiles fail, use manual bins
-        bins = [0, 30, 60, 90, 180, df_copy['recency_days'].max()]
-        df_copy['r_score'] = pd.cut(df_copy['recency_days'], bins=bins, labels=[5,4,3,2,1])
-    
-    # Frequency score: higher frequency = higher score
-    try:
-        df_copy['f_score'] = pd.qcut(df_copy['frequency'].rank(method='first'), q=5, labels=False, duplicates='drop') + 1
-    except:
-        # If quantiles fail, use manual bins
-        bins = [0, 1, 2, 3, 5, df_copy['frequency'].max()]
-        df_copy['f_score'] = pd.cut(df_copy['frequency'], bins=bins, labels=[1,2,3,4,5])
-    
-    # Monetary score: higher spend = higher score
-    try:
-        df_copy['m_score'] = pd.qcut(df_copy['monetary'].rank(method='first'), q=5, labels=False, duplicates='drop') + 1
-    except:
-        # If quantiles fail, use manual bins
-        bins = [0, 100, 500, 1000, 2000, df_copy['monetary'].max()]
-        df_copy['m_score'] = pd.cut(df_copy['monetary'], bins=bins, labels=[1,2,3,4,5])
-    
-    # Convert to integers
-    df_copy['r_score'] = df_copy['r_score'].astype(int)
-    df_copy['f_score'] = df_copy['f_score'].astype(int)
-    df_copy['m_score'] = df_copy['m_score'].astype(int)
-    
-    # Calculate total RFM score
-    df_copy['rfm_total'] = df_copy['r_score'] + df_copy['f_score'] + df_copy['m_score']
-    
-    return df_copy
+# Create RFM scores
+print("\n📊 Creating RFM scores (1-5 scale)...")
 
 # Apply RFM scoring
 customers = create_rfm_scores(customers)
@@ -85,63 +87,10 @@ print(customers['f_score'].value_counts().sort_index().to_string())
 print(f"\n   Monetary scores (1-5):")
 print(customers['m_score'].value_counts().sort_index().to_string())
 
-# Define segment function
 print("\n🏷️ Assigning customer segments...")
 
-def assign_segment(row):
-    """
-    Assign customer segment based on RFM scores
-    """
-    r = row['r_score']
-    f = row['f_score']
-    m = row['m_score']
-    
-    # Champions: high on everything (bought recently, buy often, spend a lot)
-    if r >= 4 and f >= 4 and m >= 4:
-        return 'Champions'
-    
-    # Loyal Customers: high frequency, good spenders
-    elif f >= 4 and m >= 4:
-        return 'Loyal Customers'
-    
-    # Potential Loyalists: recent buyers, average spend
-    elif r >= 4 and m >= 3:
-        return 'Potential Loyalists'
-    
-    # New Customers: recent buyers, low frequency
-    elif r >= 4 and f <= 2:
-        return 'New Customers'
-    
-    # Promising: recent buyers, average metrics
-    elif r >= 4:
-        return 'Promising'
-    
-    # Need Attention: average recency and frequency
-    elif r == 3 and f >= 3 and m >= 3:
-        return 'Need Attention'
-    
-    # At Risk - High Value: haven't bought recently, but used to be good
-    elif r <= 2 and f >= 3 and m >= 4:
-        return 'At Risk - High Value'
-    
-    # At Risk: haven't bought recently, average spend
-    elif r <= 2 and m >= 2:
-        return 'At Risk'
-    
-    # Hibernating: long time no buy, low spend
-    elif r <= 2 and m <= 2:
-        return 'Hibernating'
-    
-    # Lost: very long time no buy, very low spend
-    elif r == 1 and m == 1:
-        return 'Lost'
-    
-    # Everything else
-    else:
-        return 'Other'
-
 # Apply segment assignment
-customers['segment'] = customers.apply(assign_segment, axis=1)
+customers['segment'] = assign_segments(customers)
 
 # Show segment distribution
 print("\n📊 SEGMENT DISTRIBUTION")
@@ -158,27 +107,7 @@ for segment in segment_counts.index:
 print("\n💰 SEGMENT METRICS")
 print("-" * 40)
 
-segment_analysis = customers.groupby('segment').agg({
-    'customer_id': 'count',
-    'monetary': ['sum', 'mean', 'median'],
-    'frequency': 'mean',
-    'recency_days': 'mean',
-    'avg_order_value': 'mean',
-    'r_score': 'mean',
-    'f_score': 'mean',
-    'm_score': 'mean'
-}).round(2)
-
-segment_analysis.columns = ['customer_count', 'total_revenue', 'avg_spent', 'median_spent',
-                           'avg_orders', 'avg_recency', 'avg_order_value',
-                           'avg_r', 'avg_f', 'avg_m']
-
-# Calculate percentage of total customers and revenue
-segment_analysis['customer_pct'] = (segment_analysis['customer_count'] / len(customers) * 100).round(1)
-segment_analysis['revenue_pct'] = (segment_analysis['total_revenue'] / segment_analysis['total_revenue'].sum() * 100).round(1)
-
-# Sort by average spend
-segment_analysis = segment_analysis.sort_values('avg_spent', ascending=False)
+segment_analysis = segment_summary(customers)
 
 print("\nSegment Performance Summary:")
 print(segment_analysis.to_string())
@@ -201,10 +130,10 @@ if not at_risk_data.empty:
     print(f"   • Customers: {at_risk_data['customer_count'].sum():,} ({at_risk_data['customer_pct'].sum():.1f}%)")
     print(f"   • Revenue at risk: R${at_risk_data['total_revenue'].sum():,.2f} ({at_risk_data['revenue_pct'].sum():.1f}%)")
 
-# Save segmented data
+# Save segmented data, restoring the original customer id strings
 print("\n💾 Saving segmented customer data...")
 segmented_file = os.path.join(data_dir, 'segmented_customers.csv')
-customers.to_csv(segmented_file, index=False)
+decode_customer_ids(customers, data_dir).to_csv(segmented_file, index=False)
 print(f"   ✅ Saved to: {segmented_file}")
 
 # Save segment analysis
@@ -212,6 +141,25 @@ analysis_file = os.path.join(project_dir, 'reports', 'segment_analysis.csv')
 segment_analysis.to_csv(analysis_file)
 print(f"   ✅ Segment analysis saved to: {analysis_file}")
 
+# Save geographic rollup (country -> state -> city -> zip prefix)
+geo = GeoIndex(build_geo_rollup(customers))
+geo_file = os.path.join(data_dir, 'geo_rollup.csv')
+geo.save(geo_file)
+print(f"   ✅ Geo rollup ({len(geo.table):,} nodes) saved to: {geo_file}")
+
+# Seller segmentation with the same scoring and segment rules
+seller_metrics_file = os.path.join(data_dir, 'seller_metrics.csv')
+if os.path.exists(seller_metrics_file):
+    print("\n🏪 Segmenting sellers...")
+    sellers = create_rfm_scores(pd.read_csv(seller_metrics_file))
+    sellers['segment'] = assign_segments(sellers)
+    seller_stats = segment_stats(sellers, medians=(), top_col=None)
+    print(seller_stats[['count', 'monetary_sum', 'monetary_mean', 'frequency_mean']].round(2).to_string())
+    segmented_sellers_file = os.path.join(data_dir, 'segmented_sellers.csv')
+    # seller_metrics.csv from 03 is already decoded; older copies still hold integer codes
+    decode_seller_ids(sellers, data_dir).to_csv(segmented_sellers_file, index=False)
+    print(f"   ✅ Segmented sellers saved to: {segmented_sellers_file}")
+
 print("\n" + "=" * 60)
 print("✅ RFM SEGMENTATION COMPLETE!")
 print("=" * 60)
@@ -5,13 +5,22 @@
 
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
 import os
-
-# Set style for better looking charts
-plt.style.use('seaborn-v0_8-darkgrid')
-sns.set_palette("husl")
+import argparse
+
+from geo_index import load_geo_index
+from stream_stats import FixedHistogram, LogSketch, GroupTotals, scan_csv
+from segmentation.plotting import load_plotting, plotting_versions
+from chart_cache import ChartCache
+from data_loader import file_digest
+
+parser = argparse.ArgumentParser(description='Create the segmentation charts')
+parser.add_argument('--preview', action='store_true',
+                    help='Fast low-DPI charts in figures/preview for iterative work')
+parser.add_argument('--dpi', type=int, help='Output DPI (default: 300, or 72 with --preview)')
+parser.add_argument('--cache-size-mb', type=float, default=200,
+                    help='Chart cache size limit in MB; least recently used charts are evicted (default: 200)')
+args = parser.parse_args()
 
 print("=" * 60)
 print("CUSTOMER SEGMENTATION PROJECT - STEP 5: VISUALIZATIONS")
@@ -19,14 +28,17 @@ print("=" * 60)
 
 # Define paths
 current_dir = os.path.dirname(os.path.abspath(__file__))
-project_dir = os.path.dirname(current_dir)
+project_dir = os.environ.get('SEGMENTATION_PROJECT_DIR', os.path.dirname(current_dir))
 data_dir = os.path.join(project_dir, 'data')
 figures_dir = os.path.join(project_dir, 'figures')
 
+# Preview charts go to their own folder so the report keeps the full-size ones
+output_dir = os.path.join(figures_dir, 'preview') if args.preview else figures_dir
+
 # Create figures directory if it doesn't exist
-if not os.path.exists(figures_dir):
-    os.makedirs(figures_dir)
-    print(f"\n📁 Created figures directory: {figures_dir}")
+if not os.path.exists(output_dir):
+    os.makedirs(output_dir)
+    print(f"\n📁 Created figures directory: {output_dir}")
 
 # Load segmented data
 print(f"\n📂 Loading segmented customer data...")
@@ -37,99 +49,148 @@ if not os.path.exists(segmented_file):
     print("Please run 04_rfm_segmentation.py first")
     exit()
 
-customers = pd.read_csv(segmented_file)
-print(f"   ✅ Loaded {len(customers):,} customer records")
+# Every chart is built from per-segment aggregates streamed from the CSV
+# in chunks in a single pass, so the customer base never has to fit in memory
+segment_totals = GroupTotals()
+rfm_totals = GroupTotals()
+recency_bins = [0, 30, 60, 90, 180, 365, 730, np.inf]
+recency_hist = FixedHistogram(recency_bins)
+spend_sketch = LogSketch()
+scan_csv(segmented_file, [('monetary', segment_totals), ('monetary', rfm_totals, ['r_score', 'f_score']),
+                          ('recency_days', recency_hist), ('monetary', spend_sketch)])
+print(f"   ✅ Streamed {segment_totals.counts().sum():,} customer records")
+
+geo_rollup_file = os.path.join(data_dir, 'geo_rollup.csv')
+if os.path.exists(geo_rollup_file):
+    geo = load_geo_index(geo_rollup_file)
+else:
+    # 04 writes the rollup; without it, build it from the columns it needs
+    geo = load_geo_index(geo_rollup_file, pd.read_csv(
+        segmented_file, usecols=lambda col: col in {'segment', 'monetary', 'state', 'city', 'zip_prefix'}))
+
+# Charts are keyed on the data they plot plus everything that changes
+# the pixels: output settings, library versions and this script's own source
+dpi = args.dpi or (72 if args.preview else 300)
+# Preview skips the tight bounding box, which costs a second draw pass
+bbox_inches = None if args.preview else 'tight'
+charts = ChartCache(os.path.join(figures_dir, '.cache'),
+                    style={'dpi': dpi, 'bbox_inches': bbox_inches, 'style': 'seaborn-v0_8-darkgrid',
+                           'palette': 'husl', 'script': file_digest(os.path.abspath(__file__)),
+                           **plotting_versions()},
+                    max_bytes=int(args.cache_size_mb * 1024**2))
+
+
+def reuse_chart(path, *inputs):
+    """
+    True (and the cached PNG copied to `path`) when the chart inputs are unchanged
+    """
+    if charts.reuse(path, *inputs):
+        print(f"   ♻️ Unchanged, reused: {path}")
+        return True
+    return False
+
+
+def save_chart(path):
+    plt, _ = load_plotting()
+    plt.savefig(path, dpi=dpi, bbox_inches=bbox_inches)
+    plt.close()
+    charts.store(path)
+    print(f"   ✅ Saved to: {path}")
+
 
 # ============================================
 # CHART 1: Segment Distribution (Pie Chart)
 # ============================================
 print("\n📊 Creating Chart 1: Segment Distribution Pie Chart...")
 
-plt.figure(figsize=(12, 8))
-segment_counts = customers['segment'].value_counts()
+segment_counts = segment_totals.counts().sort_values(ascending=False)
+pie_chart_file = os.path.join(output_dir, 'segment_distribution_pie.png')
 
-# Use a colormap for better visuals
-colors = plt.cm.Set3(np.linspace(0, 1, len(segment_counts)))
+if not reuse_chart(pie_chart_file, segment_counts):
+    plt, sns = load_plotting()
+    plt.figure(figsize=(12, 8))
 
-# Create pie chart
-plt.pie(segment_counts.values, labels=segment_counts.index, autopct='%1.1f%%',
-        colors=colors, startangle=90, explode=[0.05] * len(segment_counts))
-plt.title('Customer Segment Distribution', fontsize=16, fontweight='bold', pad=20)
+    # Use a colormap for better visuals
+    colors = plt.cm.Set3(np.linspace(0, 1, len(segment_counts)))
 
-# Add a circle at the center to make it a donut chart (optional)
-centre_circle = plt.Circle((0,0), 0.70, fc='white')
-fig = plt.gcf()
-fig.gca().add_artist(centre_circle)
+    # Create pie chart
+    plt.pie(segment_counts.values, labels=segment_counts.index, autopct='%1.1f%%',
+            colors=colors, startangle=90, explode=[0.05] * len(segment_counts))
+    plt.title('Customer Segment Distribution', fontsize=16, fontweight='bold', pad=20)
 
-plt.axis('equal')
-plt.tight_layout()
+    # Add a circle at the center to make it a donut chart (optional)
+    centre_circle = plt.Circle((0,0), 0.70, fc='white')
+    fig = plt.gcf()
+    fig.gca().add_artist(centre_circle)
 
-# Save the chart
-pie_chart_file = os.path.join(figures_dir, 'segment_distribution_pie.png')
-plt.savefig(pie_chart_file, dpi=300, bbox_inches='tight')
-plt.close()
-print(f"   ✅ Saved to: {pie_chart_file}")
+    plt.axis('equal')
+    plt.tight_layout()
+
+    # Save the chart
+    save_chart(pie_chart_file)
 
 # ============================================
 # CHART 2: Average Spend by Segment (Bar Chart)
 # ============================================
 print("📊 Creating Chart 2: Average Spend by Segment...")
 
-plt.figure(figsize=(14, 7))
-avg_spend = customers.groupby('segment')['monetary'].mean().sort_values()
+avg_spend = segment_totals.means().sort_values()
+bar_chart_file = os.path.join(output_dir, 'avg_spend_by_segment.png')
+
+if not reuse_chart(bar_chart_file, avg_spend):
+    plt, sns = load_plotting()
+    plt.figure(figsize=(14, 7))
 
-# Create horizontal bar chart
-colors = plt.cm.viridis(np.linspace(0, 0.9, len(avg_spend)))
-bars = plt.barh(range(len(avg_spend)), avg_spend.values, color=colors)
+    # Create horizontal bar chart
+    colors = plt.cm.viridis(np.linspace(0, 0.9, len(avg_spend)))
+    bars = plt.barh(range(len(avg_spend)), avg_spend.values, color=colors)
 
-# Customize the chart
-plt.yticks(range(len(avg_spend)), avg_spend.index, fontsize=11)
-plt.xlabel('Average Total Spent (R$)', fontsize=12)
-plt.title('Average Customer Value by Segment', fontsize=16, fontweight='bold', pad=20)
+    # Customize the chart
+    plt.yticks(range(len(avg_spend)), avg_spend.index, fontsize=11)
+    plt.xlabel('Average Total Spent (R$)', fontsize=12)
+    plt.title('Average Customer Value by Segment', fontsize=16, fontweight='bold', pad=20)
 
-# Add value labels on bars
-for i, (bar, val) in enumerate(zip(bars, avg_spend.values)):
-    plt.text(val + 50, bar.get_y() + bar.get_height()/2, 
-             f'R${val:,.0f}', va='center', fontsize=10)
+    # Add value labels on bars
+    for i, (bar, val) in enumerate(zip(bars, avg_spend.values)):
+        plt.text(val + 50, bar.get_y() + bar.get_height()/2,
+                 f'R${val:,.0f}', va='center', fontsize=10)
 
-# Add grid for better readability
-plt.grid(axis='x', alpha=0.3)
+    # Add grid for better readability
+    plt.grid(axis='x', alpha=0.3)
 
-plt.tight_layout()
+    plt.tight_layout()
 
-# Save the chart
-bar_chart_file = os.path.join(figures_dir, 'avg_spend_by_segment.png')
-plt.savefig(bar_chart_file, dpi=300, bbox_inches='tight')
-plt.close()
-print(f"   ✅ Saved to: {bar_chart_file}")
+    # Save the chart
+    save_chart(bar_chart_file)
 
 # ============================================
 # CHART 3: Revenue Contribution (Pie Chart)
 # ============================================
 print("📊 Creating Chart 3: Revenue Contribution...")
 
-plt.figure(figsize=(12, 8))
-revenue_by_segment = customers.groupby('segment')['monetary'].sum().sort_values()
+revenue_by_segment = segment_totals.sums().sort_values()
+revenue_pie_file = os.path.join(output_dir, 'revenue_by_segment.png')
 
-# Calculate percentages
-revenue_pct = (revenue_by_segment / revenue_by_segment.sum() * 100).round(1)
+if not reuse_chart(revenue_pie_file, revenue_by_segment):
+    plt, sns = load_plotting()
+    plt.figure(figsize=(12, 8))
 
-# Create explode effect for top segments
-explode = [0.1 if i < 3 else 0 for i in range(len(revenue_by_segment))]
+    # Calculate percentages
+    revenue_pct = (revenue_by_segment / revenue_by_segment.sum() * 100).round(1)
 
-# Create pie chart
-plt.pie(revenue_by_segment.values, labels=[f'{s}\n({p}%)' for s, p in zip(revenue_by_segment.index, revenue_pct)],
-        autopct='', startangle=90, explode=explode, colors=plt.cm.tab20(np.linspace(0, 1, len(revenue_by_segment))))
-plt.title('Revenue Contribution by Segment', fontsize=16, fontweight='bold', pad=20)
+    # Create explode effect for top segments
+    explode = [0.1 if i < 3 else 0 for i in range(len(revenue_by_segment))]
 
-plt.axis('equal')
-plt.tight_layout()
+    # Create pie chart
+    plt.pie(revenue_by_segment.values, labels=[f'{s}\n({p}%)' for s, p in zip(revenue_by_segment.index, revenue_pct)],
+            autopct='', startangle=90, explode=explode, colors=plt.cm.tab20(np.linspace(0, 1, len(revenue_by_segment))))
+    plt.title('Revenue Contribution by Segment', fontsize=16, fontweight='bold', pad=20)
 
-# Save the chart
-revenue_pie_file = os.path.join(figures_dir, 'revenue_by_segment.png')
-plt.savefig(revenue_pie_file, dpi=300, bbox_inches='tight')
-plt.close()
-print(f"   ✅ Saved to: {revenue_pie_file}")
+    plt.axis('equal')
+    plt.tight_layout()
+
+    # Save the chart
+    save_chart(revenue_pie_file)
 
 # ============================================
 # CHART 4: RFM Heatmap
@@ -137,182 +198,166 @@ print(f"   ✅ Saved to: {revenue_pie_file}")
 print("📊 Creating Chart 4: RFM Heatmap...")
 
 # Create pivot table
-rfm_pivot = customers.pivot_table(
-    values='monetary', 
-    index='r_score', 
-    columns='f_score', 
-    aggfunc='mean',
-    fill_value=0
-)
-
-plt.figure(figsize=(10, 8))
-
-# Create heatmap
-sns.heatmap(rfm_pivot, annot=True, fmt='.0f', cmap='YlOrRd',
-            xticklabels=['1', '2', '3', '4', '5'],
-            yticklabels=['5', '4', '3', '2', '1'],
-            cbar_kws={'label': 'Average Spend (R$)'})
-
-plt.xlabel('Frequency Score', fontsize=12)
-plt.ylabel('Recency Score', fontsize=12)
-plt.title('RFM Analysis: Average Spend by Recency and Frequency', 
-          fontsize=14, fontweight='bold', pad=20)
-
-plt.tight_layout()
-
-# Save the chart
-heatmap_file = os.path.join(figures_dir, 'rfm_heatmap.png')
-plt.savefig(heatmap_file, dpi=300, bbox_inches='tight')
-plt.close()
-print(f"   ✅ Saved to: {heatmap_file}")
+rfm_pivot = rfm_totals.means().unstack(fill_value=0)
+heatmap_file = os.path.join(output_dir, 'rfm_heatmap.png')
+
+if not reuse_chart(heatmap_file, rfm_pivot):
+    plt, sns = load_plotting()
+    plt.figure(figsize=(10, 8))
+
+    # Create heatmap
+    sns.heatmap(rfm_pivot, annot=True, fmt='.0f', cmap='YlOrRd',
+                xticklabels=['1', '2', '3', '4', '5'],
+                yticklabels=['5', '4', '3', '2', '1'],
+                cbar_kws={'label': 'Average Spend (R$)'})
+
+    plt.xlabel('Frequency Score', fontsize=12)
+    plt.ylabel('Recency Score', fontsize=12)
+    plt.title('RFM Analysis: Average Spend by Recency and Frequency',
+              fontsize=14, fontweight='bold', pad=20)
+
+    plt.tight_layout()
+
+    # Save the chart
+    save_chart(heatmap_file)
 
 # ============================================
 # CHART 5: Geographic Distribution
 # ============================================
 print("📊 Creating Chart 5: Top States by Customer Count...")
 
-plt.figure(figsize=(14, 7))
-top_states = customers['state'].value_counts().head(10)
+top_states = geo.top(10).set_index('state')['customers']
+geo_file = os.path.join(output_dir, 'top_states.png')
+
+if not reuse_chart(geo_file, top_states):
+    plt, sns = load_plotting()
+    plt.figure(figsize=(14, 7))
 
-# Create color gradient
-colors = plt.cm.Blues(np.linspace(0.4, 0.9, len(top_states)))
+    # Create color gradient
+    colors = plt.cm.Blues(np.linspace(0.4, 0.9, len(top_states)))
 
-# Create bar chart
-bars = plt.bar(range(len(top_states)), top_states.values, color=colors)
+    # Create bar chart
+    bars = plt.bar(range(len(top_states)), top_states.values, color=colors)
 
-# Customize
-plt.xticks(range(len(top_states)), top_states.index, fontsize=12)
-plt.xlabel('State', fontsize=12)
-plt.ylabel('Number of Customers', fontsize=12)
-plt.title('Top 10 States by Customer Count', fontsize=16, fontweight='bold', pad=20)
+    # Customize
+    plt.xticks(range(len(top_states)), top_states.index, fontsize=12)
+    plt.xlabel('State', fontsize=12)
+    plt.ylabel('Number of Customers', fontsize=12)
+    plt.title('Top 10 States by Customer Count', fontsize=16, fontweight='bold', pad=20)
 
-# Add value labels
-for i, (bar, val) in enumerate(zip(bars, top_states.values)):
-    plt.text(bar.get_x() + bar.get_width()/2, bar.get_height() + 100,
-             f'{val:,}', ha='center', va='bottom', fontsize=10)
+    # Add value labels
+    for i, (bar, val) in enumerate(zip(bars, top_states.values)):
+        plt.text(bar.get_x() + bar.get_width()/2, bar.get_height() + 100,
+                 f'{val:,}', ha='center', va='bottom', fontsize=10)
 
-plt.grid(axis='y', alpha=0.3)
-plt.tight_layout()
+    plt.grid(axis='y', alpha=0.3)
+    plt.tight_layout()
 
-# Save the chart
-geo_file = os.path.join(figures_dir, 'top_states.png')
-plt.savefig(geo_file, dpi=300, bbox_inches='tight')
-plt.close()
-print(f"   ✅ Saved to: {geo_file}")
+    # Save the chart
+    save_chart(geo_file)
 
 # ============================================
 # CHART 6: Recency Distribution
 # ============================================
 print("📊 Creating Chart 6: Customer Recency Distribution...")
 
-plt.figure(figsize=(14, 7))
-
-# Create recency groups - FIXED: bins must be in increasing order
-bins = [0, 30, 60, 90, 180, 365, 730, customers['recency_days'].max() + 1]
-labels = ['<30 days', '30-60 days', '60-90 days', '90-180 days', 
+labels = ['<30 days', '30-60 days', '60-90 days', '90-180 days',
           '180-365 days', '1-2 years', '>2 years']
+recency_dist = pd.Series(recency_hist.total(), index=labels)
+recency_file = os.path.join(output_dir, 'recency_distribution.png')
 
-# Make sure bins are strictly increasing
-bins = sorted(bins)  # Just to be safe
-
-customers['recency_group'] = pd.cut(customers['recency_days'], bins=bins, labels=labels, right=False)
+if not reuse_chart(recency_file, recency_dist):
+    plt, sns = load_plotting()
+    plt.figure(figsize=(14, 7))
 
-recency_dist = customers['recency_group'].value_counts().sort_index()
+    # Create bar chart
+    colors = plt.cm.Reds(np.linspace(0.3, 0.9, len(recency_dist)))
+    bars = plt.bar(range(len(recency_dist)), recency_dist.values, color=colors)
 
-# Create bar chart
-colors = plt.cm.Reds(np.linspace(0.3, 0.9, len(recency_dist)))
-bars = plt.bar(range(len(recency_dist)), recency_dist.values, color=colors)
+    # Customize
+    plt.xticks(range(len(recency_dist)), recency_dist.index, rotation=45, fontsize=11)
+    plt.xlabel('Time Since Last Purchase', fontsize=12)
+    plt.ylabel('Number of Customers', fontsize=12)
+    plt.title('Customer Recency Distribution', fontsize=16, fontweight='bold', pad=20)
 
-# Customize
-plt.xticks(range(len(recency_dist)), recency_dist.index, rotation=45, fontsize=11)
-plt.xlabel('Time Since Last Purchase', fontsize=12)
-plt.ylabel('Number of Customers', fontsize=12)
-plt.title('Customer Recency Distribution', fontsize=16, fontweight='bold', pad=20)
+    # Add value labels
+    for i, (bar, val) in enumerate(zip(bars, recency_dist.values)):
+        plt.text(bar.get_x() + bar.get_width()/2, bar.get_height() + 50,
+                 f'{val:,}', ha='center', va='bottom', fontsize=10)
 
-# Add value labels
-for i, (bar, val) in enumerate(zip(bars, recency_dist.values)):
-    plt.text(bar.get_x() + bar.get_width()/2, bar.get_height() + 50,
-             f'{val:,}', ha='center', va='bottom', fontsize=10)
+    plt.grid(axis='y', alpha=0.3)
+    plt.tight_layout()
 
-plt.grid(axis='y', alpha=0.3)
-plt.tight_layout()
-
-# Save the chart
-recency_file = os.path.join(figures_dir, 'recency_distribution.png')
-plt.savefig(recency_file, dpi=300, bbox_inches='tight')
-plt.close()
-print(f"   ✅ Saved to: {recency_file}")
+    # Save the chart
+    save_chart(recency_file)
 # ============================================
 # CHART 7: Segment Composition by State
 # ============================================
 print("📊 Creating Chart 7: Segment Composition by Top States...")
 
-# Get top 5 states
-top_5_states = customers['state'].value_counts().head(5).index
-
-# Filter data for top states
-state_segment_data = customers[customers['state'].isin(top_5_states)]
+# Segment mix of the top 5 states, straight from the geo rollup
+top_5_states = geo.top(5).set_index('state')
+segment_by_state = top_5_states[geo.segments].div(top_5_states['customers'], axis=0) * 100
+segment_by_state = segment_by_state.loc[:, segment_by_state.sum() > 0].sort_index()
+state_composition_file = os.path.join(output_dir, 'state_composition.png')
 
-# Create cross-tabulation
-segment_by_state = pd.crosstab(
-    state_segment_data['state'], 
-    state_segment_data['segment'],
-    normalize='index'
-) * 100
+if not reuse_chart(state_composition_file, segment_by_state):
+    plt, sns = load_plotting()
+    plt.figure(figsize=(14, 8))
+    segment_by_state.plot(kind='bar', stacked=True, colormap='tab20', ax=plt.gca())
 
-plt.figure(figsize=(14, 8))
-segment_by_state.plot(kind='bar', stacked=True, colormap='tab20', ax=plt.gca())
+    plt.xlabel('State', fontsize=12)
+    plt.ylabel('Percentage of Customers', fontsize=12)
+    plt.title('Customer Segment Composition by State', fontsize=16, fontweight='bold', pad=20)
+    plt.legend(bbox_to_anchor=(1.05, 1), loc='upper left')
+    plt.grid(axis='y', alpha=0.3)
+    plt.tight_layout()
 
-plt.xlabel('State', fontsize=12)
-plt.ylabel('Percentage of Customers', fontsize=12)
-plt.title('Customer Segment Composition by State', fontsize=16, fontweight='bold', pad=20)
-plt.legend(bbox_to_anchor=(1.05, 1), loc='upper left')
-plt.grid(axis='y', alpha=0.3)
-plt.tight_layout()
-
-# Save the chart
-state_composition_file = os.path.join(figures_dir, 'state_composition.png')
-plt.savefig(state_composition_file, dpi=300, bbox_inches='tight')
-plt.close()
-print(f"   ✅ Saved to: {state_composition_file}")
+    # Save the chart
+    save_chart(state_composition_file)
 
 # ============================================
 # CHART 8: Customer Value Distribution
 # ============================================
 print("📊 Creating Chart 8: Customer Value Distribution...")
 
-fig, axes = plt.subplots(1, 2, figsize=(16, 6))
+# Histogram of customer spend (rebinned from the spend sketch)
+spend_counts, spend_edges = spend_sketch.histogram(bins=50)
+
+# Box plot of spend by segment (top segments only), drawn from sketch
+# quartiles and 1.5 IQR whiskers; individual outliers are not kept
+top_segments = sorted(spend_sketch.counts, key=spend_sketch.size, reverse=True)[:6]
+segment_box_stats = [spend_sketch.box_stats(s) for s in top_segments]
+value_dist_file = os.path.join(output_dir, 'value_distribution.png')
 
-# Histogram of customer spend
-axes[0].hist(customers['monetary'], bins=50, color='skyblue', edgecolor='black', alpha=0.7)
-axes[0].set_xlabel('Total Spend (R$)', fontsize=12)
-axes[0].set_ylabel('Number of Customers', fontsize=12)
-axes[0].set_title('Distribution of Customer Spend', fontsize=14, fontweight='bold')
-axes[0].grid(alpha=0.3)
+if not reuse_chart(value_dist_file, spend_counts, spend_edges, segment_box_stats):
+    plt, sns = load_plotting()
+    fig, axes = plt.subplots(1, 2, figsize=(16, 6))
 
-# Box plot of spend by segment (top segments only)
-top_segments = customers['segment'].value_counts().head(6).index
-segment_spend_data = [customers[customers['segment'] == s]['monetary'] for s in top_segments]
+    axes[0].hist(spend_edges[:-1], bins=spend_edges, weights=spend_counts,
+                 color='skyblue', edgecolor='black', alpha=0.7)
+    axes[0].set_xlabel('Total Spend (R$)', fontsize=12)
+    axes[0].set_ylabel('Number of Customers', fontsize=12)
+    axes[0].set_title('Distribution of Customer Spend', fontsize=14, fontweight='bold')
+    axes[0].grid(alpha=0.3)
 
-bp = axes[1].boxplot(segment_spend_data, labels=top_segments, patch_artist=True)
-for patch, color in zip(bp['boxes'], plt.cm.Set3(np.linspace(0, 1, len(top_segments)))):
-    patch.set_facecolor(color)
+    bp = axes[1].bxp(segment_box_stats, showfliers=False, patch_artist=True)
+    for patch, color in zip(bp['boxes'], plt.cm.Set3(np.linspace(0, 1, len(top_segments)))):
+        patch.set_facecolor(color)
 
-axes[1].set_ylabel('Total Spend (R$)', fontsize=12)
-axes[1].set_title('Spend Distribution by Segment', fontsize=14, fontweight='bold')
-axes[1].tick_params(axis='x', rotation=45)
-axes[1].grid(alpha=0.3)
+    axes[1].set_ylabel('Total Spend (R$)', fontsize=12)
+    axes[1].set_title('Spend Distribution by Segment', fontsize=14, fontweight='bold')
+    axes[1].tick_params(axis='x', rotation=45)
+    axes[1].grid(alpha=0.3)
 
-plt.tight_layout()
+    plt.tight_layout()
 
-# Save the chart
-value_dist_file = os.path.join(figures_dir, 'value_distribution.png')
-plt.savefig(value_dist_file, dpi=300, bbox_inches='tight')
-plt.close()
-print(f"   ✅ Saved to: {value_dist_file}")
+    # Save the chart
+    save_chart(value_dist_file)
 
 print("\n" + "=" * 60)
 print(f"✅ ALL VISUALIZATIONS COMPLETE!")
-print(f"📁 Charts saved to: {figures_dir}")
+print(f"♻️ Reused {len(charts.reused)} unchanged charts, rendered {len(charts.rendered)}")
+print(f"📁 Charts saved to: {output_dir}")
 print("=" * 60)
-print("\nNext step: Run 06_final_report.py")
\ No newline at end of file
+print("\nNext step: Run 06_final_report.py")
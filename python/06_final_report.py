@@ -6,15 +6,28 @@
 import pandas as pd
 import numpy as np
 import os
+import time
+import argparse
 from datetime import datetime
 
+from report_renderer import ReportRenderer, thumbnail_data_uri
+from segment_stats import segment_stats
+from geo_index import load_geo_index
+
+parser = argparse.ArgumentParser(description='Generate the final segmentation report')
+parser.add_argument('--embed-thumbnails', action='store_true',
+                    help='Embed downscaled, cached chart thumbnails instead of linking full-size PNGs')
+parser.add_argument('--thumbnail-scale', type=float, default=0.25,
+                    help='Thumbnail scale relative to the dpi=300 chart (default: 0.25)')
+args = parser.parse_args()
+
 print("=" * 60)
 print("CUSTOMER SEGMENTATION PROJECT - STEP 6: FINAL REPORT")
 print("=" * 60)
 
 # Define paths
 current_dir = os.path.dirname(os.path.abspath(__file__))
-project_dir = os.path.dirname(current_dir)
+project_dir = os.environ.get('SEGMENTATION_PROJECT_DIR', os.path.dirname(current_dir))
 data_dir = os.path.join(project_dir, 'data')
 reports_dir = os.path.join(project_dir, 'reports')
 figures_dir = os.path.join(project_dir, 'figures')
@@ -36,6 +49,8 @@ if not os.path.exists(segmented_file):
 customers = pd.read_csv(segmented_file)
 print(f"   ✅ Loaded {len(customers):,} customer records")
 
+geo = load_geo_index(os.path.join(data_dir, 'geo_rollup.csv'), customers)
+
 # ============================================
 # SECTION 1: Executive Summary Calculations
 # ============================================
@@ -47,23 +62,51 @@ avg_customer_value = customers['monetary'].mean()
 repeat_rate = (customers['frequency'] > 1).mean() * 100
 
 # Get segment summaries
-segment_summary = customers.groupby('segment').agg({
-    'customer_id': 'count',
-    'monetary': ['sum', 'mean'],
-    'frequency': 'mean',
-    'recency_days': 'mean'
+stats = segment_stats(customers)
+segment_summary = pd.DataFrame({
+    'count': stats['count'],
+    'revenue': stats['monetary_sum'],
+    'avg_spend': stats['monetary_mean'],
+    'avg_orders': stats['frequency_mean'],
+    'avg_recency': stats['recency_days_mean']
 }).round(2)
-
-segment_summary.columns = ['count', 'revenue', 'avg_spend', 'avg_orders', 'avg_recency']
 segment_summary['pct_customers'] = (segment_summary['count'] / total_customers * 100).round(1)
 segment_summary['pct_revenue'] = (segment_summary['revenue'] / total_revenue * 100).round(1)
 
+# Delivery experience per segment (when 03 computed the delivery features)
+has_delivery = 'late_orders_sum' in stats.columns
+if has_delivery:
+    delivery_summary = pd.DataFrame({
+        'avg_lead_time': stats['avg_lead_time_days_mean'],
+        'avg_approval_hours': stats['avg_approval_hours_mean'],
+        'late_pct': stats['late_orders_sum'] / stats['delivered_orders_sum'] * 100
+    }).round(1)
+    overall_late_pct = stats['late_orders_sum'].sum() / stats['delivered_orders_sum'].sum() * 100
+
+# Churn watchlist from 15_churn_scoring.py, when it has been run
+watchlist_file = os.path.join(reports_dir, 'churn_watchlist.csv')
+has_churn = os.path.exists(watchlist_file)
+if has_churn:
+    watchlist = pd.read_csv(watchlist_file)
+    churn_window = int(watchlist['churn_window_days'].iloc[0]) if len(watchlist) else 30
+    churn_summary = watchlist.groupby('segment').agg(
+        customers=('customer_id', 'size'),
+        revenue=('monetary', 'sum'),
+        avg_churn_probability=('churn_probability_in_window', 'mean'),
+        median_days_to_next_purchase=('days_to_next_purchase', 'median'),
+    ).sort_values('revenue', ascending=False)
+
 # ============================================
 # SECTION 2: Generate HTML Report
 # ============================================
 print("\n📄 Creating HTML report...")
+render_start = time.perf_counter()
+
+# Each section is a compiled template rendered from its own aggregates.
+# Unchanged sections are reused from the partials cache on later runs.
+renderer = ReportRenderer(os.path.join(reports_dir, '.cache'))
 
-html_content = f"""
+HEAD_TEMPLATE = """
 <!DOCTYPE html>
 <html>
 <head>
@@ -162,8 +205,10 @@ html_content = f"""
 <body>
     <div class="container">
         <h1>📊 Customer Segmentation Analysis Report</h1>
-        <p>Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}</p>
-        
+        <p>Generated on: {generated_on}</p>
+"""
+
+SUMMARY_TEMPLATE = """
         <div class="summary-box">
             <h2>Executive Summary</h2>
             <p>This report presents a comprehensive customer segmentation analysis based on RFM (Recency, Frequency, Monetary) metrics. The analysis covers <strong>{total_customers:,}</strong> customers with total revenue of <strong>R${total_revenue:,.2f}</strong>.</p>
@@ -188,7 +233,9 @@ html_content = f"""
                 <div class="metric-label">Repeat Customer Rate</div>
             </div>
         </div>
-        
+"""
+
+SEGMENT_TABLE_TEMPLATE = """
         <h2>🎯 Segment Distribution</h2>
         <table>
             <tr>
@@ -200,123 +247,104 @@ html_content = f"""
                 <th>Avg Spend</th>
                 <th>Avg Orders</th>
             </tr>
+{rows}
+        </table>
 """
 
-# Add rows for each segment
-for segment in segment_summary.index:
-    row = segment_summary.loc[segment]
-    html_content += f"""
+SEGMENT_ROW_TEMPLATE = """
             <tr>
                 <td><strong>{segment}</strong></td>
-                <td>{row['count']:,.0f}</td>
-                <td>{row['pct_customers']}%</td>
-                <td>R${row['revenue']:,.2f}</td>
-                <td>{row['pct_revenue']}%</td>
-                <td>R${row['avg_spend']:,.2f}</td>
-                <td>{row['avg_orders']:.1f}</td>
+                <td>{count:,.0f}</td>
+                <td>{pct_customers}%</td>
+                <td>R${revenue:,.2f}</td>
+                <td>{pct_revenue}%</td>
+                <td>R${avg_spend:,.2f}</td>
+                <td>{avg_orders:.1f}</td>
             </tr>
-    """
+"""
 
-html_content += """
+DELIVERY_TEMPLATE = """
+        <h2>🚚 Delivery Experience by Segment</h2>
+        <table>
+            <tr>
+                <th>Segment</th>
+                <th>Avg Delivery Time (days)</th>
+                <th>Avg Approval Time (hours)</th>
+                <th>Late Orders</th>
+            </tr>
+{rows}
         </table>
-        
+"""
+
+DELIVERY_ROW_TEMPLATE = """
+            <tr>
+                <td><strong>{segment}</strong></td>
+                <td>{avg_lead_time:.1f}</td>
+                <td>{avg_approval_hours:.1f}</td>
+                <td>{late_pct:.1f}%</td>
+            </tr>
+"""
+
+CHURN_TEMPLATE = """
+        <h2>⏳ Expected to Churn in the Next {window} Days</h2>
+        <p><strong>{customers:,}</strong> customers (R${revenue:,.2f} lifetime spend) will most likely have churned {window} days from now unless they buy again.</p>
+        <table>
+            <tr>
+                <th>Segment</th>
+                <th>Customers</th>
+                <th>Lifetime Spend</th>
+                <th>Avg Churn Probability</th>
+                <th>Median Days to Next Purchase</th>
+            </tr>
+{rows}
+        </table>
+"""
+
+CHURN_ROW_TEMPLATE = """
+            <tr>
+                <td><strong>{segment}</strong></td>
+                <td>{customers:,.0f}</td>
+                <td>R${revenue:,.2f}</td>
+                <td>{avg_churn_probability:.0%}</td>
+                <td>{median_days_to_next_purchase:.0f}</td>
+            </tr>
+"""
+
+CHARTS_TEMPLATE = """
         <h2>📊 Visual Analysis</h2>
         <div style="display: grid; grid-template-columns: 1fr 1fr; gap: 20px;">
+{rows}
+        </div>
+"""
+
+CHART_TEMPLATE = """
             <div>
-                <h3>Segment Distribution</h3>
-                <img src="../figures/segment_distribution_pie.png" alt="Segment Distribution">
-            </div>
-            <div>
-                <h3>Average Spend by Segment</h3>
-                <img src="../figures/avg_spend_by_segment.png" alt="Average Spend">
-            </div>
-            <div>
-                <h3>Revenue Contribution</h3>
-                <img src="../figures/revenue_by_segment.png" alt="Revenue Contribution">
-            </div>
-            <div>
-                <h3>RFM Heatmap</h3>
-                <img src="../figures/rfm_heatmap.png" alt="RFM Heatmap">
+                <h3>{title}</h3>
+                <img src="{src}" alt="{alt}">
             </div>
-        </div>
-        
-        <h2>💡 Segment Descriptions & Recommendations</h2>
 """
 
-# Segment descriptions and recommendations
-segment_info = {
-    'Champions': {
-        'desc': 'Your best customers who buy frequently, spend the most, and purchased recently.',
-        'rec': 'VIP treatment, exclusive offers, early access to new products, referral programs.'
-    },
-    'Loyal Customers': {
-        'desc': 'Regular customers with high frequency and good spending habits.',
-        'rec': 'Loyalty programs, cross-selling, personalized recommendations.'
-    },
-    'Potential Loyalists': {
-        'desc': 'Recent customers with good spending who show promise.',
-        'rec': 'Engagement emails, second purchase incentives, product recommendations.'
-    },
-    'New Customers': {
-        'desc': 'First-time or very recent buyers with low frequency.',
-        'rec': 'Welcome series, educational content, easy reorder options.'
-    },
-    'Promising': {
-        'desc': 'Recent buyers with average metrics who could become loyal.',
-        'rec': 'Nurture campaigns, targeted offers based on first purchase.'
-    },
-    'Need Attention': {
-        'desc': 'Average customers who need a little push to become better.',
-        'rec': 'Re-engagement emails, special discounts, feedback requests.'
-    },
-    'At Risk - High Value': {
-        'desc': 'Previously high-value customers who haven\'t bought recently.',
-        'rec': 'Urgent reactivation campaigns, special "we miss you" offers.'
-    },
-    'At Risk': {
-        'desc': 'Customers showing signs of disengagement.',
-        'rec': 'Win-back campaigns, satisfaction surveys, limited-time offers.'
-    },
-    'Hibernating': {
-        'desc': 'Long-time no purchase, low engagement.',
-        'rec': 'Last-chance reactivation, big discount offers.'
-    },
-    'Lost': {
-        'desc': 'Very long time since last purchase, minimal spending.',
-        'rec': 'Consider removing from active marketing, focus elsewhere.'
-    },
-    'Other': {
-        'desc': 'Customers who don\'t fit neatly into other categories.',
-        'rec': 'Monitor behavior, analyze for patterns.'
-    }
-}
+SEGMENT_CARDS_TEMPLATE = """
+        <h2>💡 Segment Descriptions & Recommendations</h2>
+{rows}
+"""
 
-for segment, info in segment_info.items():
-    if segment in segment_summary.index:
-        html_content += f"""
+SEGMENT_CARD_TEMPLATE = """
         <div class="segment-card">
             <div class="segment-name">{segment}</div>
-            <p><strong>Description:</strong> {info['desc']}</p>
-            <p><strong>Recommendation:</strong> {info['rec']}</p>
+            <p><strong>Description:</strong> {desc}</p>
+            <p><strong>Recommendation:</strong> {rec}</p>
         </div>
-        """
+"""
 
-# Geographic Insights
-html_content += """
+GEO_TEMPLATE = """
         <h2>📍 Geographic Insights</h2>
+<table><tr><th>State</th><th>Customers</th><th>%</th><th>Top Segment</th></tr>{rows}</table>
 """
 
-# Add geographic insights
-top_states = customers['state'].value_counts().head(5)
-html_content += "<table><tr><th>State</th><th>Customers</th><th>%</th><th>Top Segment</th></tr>"
-for state, count in top_states.items():
-    pct = round((count / total_customers * 100), 1)  # FIXED: using round() function
-    top_segment = customers[customers['state'] == state]['segment'].mode()[0]
-    html_content += f"<tr><td>{state}</td><td>{count:,}</td><td>{pct}%</td><td>{top_segment}</td></tr>"
-html_content += "</table>"
-
-# Action Plan
-html_content += """
+GEO_ROW_TEMPLATE = "<tr><td>{state}</td><td>{count:,}</td><td>{pct}%</td><td>{top_segment}</td></tr>"
+
+FOOTER_TEMPLATE = """
         <h2>📋 Action Plan</h2>
         <table>
             <tr>
@@ -375,28 +403,136 @@ html_content += """
 </html>
 """
 
+# Segment descriptions and recommendations
+segment_info = {
+    'Champions': {
+        'desc': 'Your best customers who buy frequently, spend the most, and purchased recently.',
+        'rec': 'VIP treatment, exclusive offers, early access to new products, referral programs.'
+    },
+    'Loyal Customers': {
+        'desc': 'Regular customers with high frequency and good spending habits.',
+        'rec': 'Loyalty programs, cross-selling, personalized recommendations.'
+    },
+    'Potential Loyalists': {
+        'desc': 'Recent customers with good spending who show promise.',
+        'rec': 'Engagement emails, second purchase incentives, product recommendations.'
+    },
+    'New Customers': {
+        'desc': 'First-time or very recent buyers with low frequency.',
+        'rec': 'Welcome series, educational content, easy reorder options.'
+    },
+    'Promising': {
+        'desc': 'Recent buyers with average metrics who could become loyal.',
+        'rec': 'Nurture campaigns, targeted offers based on first purchase.'
+    },
+    'Need Attention': {
+        'desc': 'Average customers who need a little push to become better.',
+        'rec': 'Re-engagement emails, special discounts, feedback requests.'
+    },
+    'At Risk - High Value': {
+        'desc': 'Previously high-value customers who haven\'t bought recently.',
+        'rec': 'Urgent reactivation campaigns, special "we miss you" offers.'
+    },
+    'At Risk': {
+        'desc': 'Customers showing signs of disengagement.',
+        'rec': 'Win-back campaigns, satisfaction surveys, limited-time offers.'
+    },
+    'Hibernating': {
+        'desc': 'Long-time no purchase, low engagement.',
+        'rec': 'Last-chance reactivation, big discount offers.'
+    },
+    'Lost': {
+        'desc': 'Very long time since last purchase, minimal spending.',
+        'rec': 'Consider removing from active marketing, focus elsewhere.'
+    },
+    'Other': {
+        'desc': 'Customers who don\'t fit neatly into other categories.',
+        'rec': 'Monitor behavior, analyze for patterns.'
+    }
+}
+
+# Report charts (file name, title, alt text)
+report_charts = [
+    ('segment_distribution_pie.png', 'Segment Distribution', 'Segment Distribution'),
+    ('avg_spend_by_segment.png', 'Average Spend by Segment', 'Average Spend'),
+    ('revenue_by_segment.png', 'Revenue Contribution', 'Revenue Contribution'),
+    ('rfm_heatmap.png', 'RFM Heatmap', 'RFM Heatmap'),
+]
+# Produced by 08_cohort_analysis.py when it has been run
+if os.path.exists(os.path.join(figures_dir, 'cohort_retention_heatmap.png')):
+    report_charts.append(('cohort_retention_heatmap.png', 'Cohort Retention', 'Cohort Retention'))
+
+chart_rows = []
+for file_name, title, alt in report_charts:
+    chart_path = os.path.join(figures_dir, file_name)
+    if args.embed_thumbnails and os.path.exists(chart_path):
+        src = thumbnail_data_uri(chart_path, renderer.cache_dir, scale=args.thumbnail_scale)
+    else:
+        src = f"../figures/{file_name}"
+    chart_rows.append({'title': title, 'src': src, 'alt': alt})
+
+# Geographic aggregates: top states and their most common segment
+top_states_table = geo.top(5)
+top_states = top_states_table.set_index('state')['customers']
+geo_rows = []
+for _, node in top_states_table.iterrows():
+    geo_rows.append({
+        'state': node['state'],
+        'count': int(node['customers']),
+        'pct': round((node['customers'] / total_customers * 100), 1),
+        'top_segment': node[geo.segments].astype(int).idxmax()
+    })
+
+html_content = ''.join([
+    renderer.section('head', HEAD_TEMPLATE, {'generated_on': datetime.now().strftime('%Y-%m-%d %H:%M:%S')}),
+    renderer.section('summary', SUMMARY_TEMPLATE, {
+        'total_customers': int(total_customers),
+        'total_revenue': float(total_revenue),
+        'avg_customer_value': float(avg_customer_value),
+        'repeat_rate': float(repeat_rate)
+    }),
+    renderer.section('segment_table', SEGMENT_TABLE_TEMPLATE,
+                     rows=[{'segment': segment, **segment_summary.loc[segment].astype(float).to_dict()}
+                           for segment in segment_summary.index],
+                     row_source=SEGMENT_ROW_TEMPLATE),
+    renderer.section('delivery', DELIVERY_TEMPLATE,
+                     rows=[{'segment': segment, **delivery_summary.loc[segment].astype(float).to_dict()}
+                           for segment in segment_summary.index],
+                     row_source=DELIVERY_ROW_TEMPLATE) if has_delivery else '',
+    renderer.section('churn', CHURN_TEMPLATE, {
+        'window': churn_window,
+        'customers': len(watchlist),
+        'revenue': float(watchlist['monetary'].sum())
+    }, rows=[{'segment': segment, **churn_summary.loc[segment].astype(float).to_dict()}
+             for segment in churn_summary.index],
+        row_source=CHURN_ROW_TEMPLATE) if has_churn else '',
+    renderer.section('charts', CHARTS_TEMPLATE, rows=chart_rows, row_source=CHART_TEMPLATE),
+    renderer.section('segment_cards', SEGMENT_CARDS_TEMPLATE,
+                     rows=[{'segment': segment, **info} for segment, info in segment_info.items()
+                           if segment in segment_summary.index],
+                     row_source=SEGMENT_CARD_TEMPLATE),
+    renderer.section('geo', GEO_TEMPLATE, rows=geo_rows, row_source=GEO_ROW_TEMPLATE),
+    renderer.section('footer', FOOTER_TEMPLATE),
+])
+renderer.save()
+render_ms = (time.perf_counter() - render_start) * 1000
+
 # Save HTML report
 html_file = os.path.join(reports_dir, 'customer_segmentation_report.html')
 with open(html_file, 'w', encoding='utf-8') as f:
     f.write(html_content)
 print(f"   ✅ HTML report saved to: {html_file}")
+print(f"   ⏱️ Rendered in {render_ms:.1f} ms "
+      f"({len(renderer.rendered)} sections rendered, {len(renderer.reused)} reused from cache)")
 
 # ============================================
 # SECTION 3: Create CSV Summary Report
 # ============================================
 print("\n📊 Creating CSV summary report...")
 
-# Create detailed segment summary
+# Create detailed segment summary from the same one-pass aggregates
 summary_data = []
 for segment in segment_summary.index:
-    segment_customers = customers[customers['segment'] == segment]
-    
-    # Calculate top state safely
-    if not segment_customers.empty:
-        top_state = segment_customers['state'].mode()[0] if len(segment_customers['state'].mode()) > 0 else 'N/A'
-    else:
-        top_state = 'N/A'
-    
     summary_data.append({
         'Segment': segment,
         'Customer Count': int(segment_summary.loc[segment, 'count']),
@@ -406,12 +542,36 @@ for segment in segment_summary.index:
         'Average Spend': float(segment_summary.loc[segment, 'avg_spend']),
         'Average Orders': float(segment_summary.loc[segment, 'avg_orders']),
         'Average Recency (days)': float(segment_summary.loc[segment, 'avg_recency']),
-        'Average RFM Score': float(segment_customers['rfm_total'].mean()) if not segment_customers.empty else 0,
-        'Repeat Customer Rate': float((segment_customers['frequency'] > 1).mean() * 100) if not segment_customers.empty else 0,
-        'Top State': top_state
+        'Average RFM Score': float(stats.loc[segment, 'rfm_total_mean']),
+        'Repeat Customer Rate': float(stats.loc[segment, 'repeat_rate']),
+        'Top State': stats.loc[segment, 'top_state']
     })
+    if has_delivery:
+        summary_data[-1]['Average Delivery Time (days)'] = float(delivery_summary.loc[segment, 'avg_lead_time'])
+        summary_data[-1]['Late Order Rate'] = float(delivery_summary.loc[segment, 'late_pct'])
 
 summary_df = pd.DataFrame(summary_data)
+
+# Bootstrap intervals from 12_segment_confidence.py, when it has been run
+intervals_file = os.path.join(reports_dir, 'segment_kpi_intervals.csv')
+intervals = None
+if os.path.exists(intervals_file):
+    intervals = pd.read_csv(intervals_file, index_col='segment').reindex(summary_df['Segment'])
+    # Intervals from before the last segmentation describe other customers
+    stale = (os.path.getmtime(intervals_file) < os.path.getmtime(segmented_file)
+             or not np.array_equal(intervals['customers'].fillna(-1).to_numpy(), summary_df['Customer Count'].to_numpy()))
+    if stale:
+        print("   ⚠️ segment_kpi_intervals.csv does not match the current segmentation; "
+              "re-run 12_segment_confidence.py to include confidence intervals")
+        intervals = None
+if intervals is not None:
+    summary_df['Average Spend CI Low'] = intervals['avg_spent_low'].round(2).to_numpy()
+    summary_df['Average Spend CI High'] = intervals['avg_spent_high'].round(2).to_numpy()
+    summary_df['Percentage of Revenue CI Low'] = intervals['revenue_pct_low'].round(1).to_numpy()
+    summary_df['Percentage of Revenue CI High'] = intervals['revenue_pct_high'].round(1).to_numpy()
+if has_churn:
+    summary_df[f'Expected Churn in {churn_window} Days'] = (
+        summary_df['Segment'].map(churn_summary['customers']).fillna(0).astype(int).to_numpy())
 summary_df = summary_df.sort_values('Total Revenue', ascending=False)
 
 csv_summary_file = os.path.join(reports_dir, 'segment_summary.csv')
@@ -428,6 +588,26 @@ at_risk_customers = customers[customers['segment'].str.contains('At Risk|Hiberna
 at_risk_count = len(at_risk_customers)
 at_risk_revenue = at_risk_customers['monetary'].sum()
 
+# Delivery experience lines (empty without the delivery features)
+delivery_text = ''
+if has_delivery:
+    worst_segment = delivery_summary['late_pct'].idxmax()
+    delivery_text = f"""
+4. Delivery Experience:
+   • Late orders overall: {overall_late_pct:.1f}%
+   • Most affected segment: {worst_segment} ({delivery_summary.loc[worst_segment, 'late_pct']:.1f}% late, {delivery_summary.loc[worst_segment, 'avg_lead_time']:.1f} days average delivery)
+"""
+
+# Churn watchlist lines (empty until 15_churn_scoring.py has been run)
+churn_text = ''
+if has_churn:
+    churn_text = f"""
+{5 if has_delivery else 4}. Expected to Churn in {churn_window} Days:
+   • Customers: {len(watchlist):,} (R${watchlist['monetary'].sum():,.2f} lifetime spend)
+"""
+    for segment, row in churn_summary.head(3).iterrows():
+        churn_text += f"   • {segment}: {int(row['customers']):,} customers, R${row['revenue']:,.2f}\n"
+
 # Top states total
 top_states_total = top_states.sum()
 top_states_pct = round((top_states_total / total_customers * 100), 1)
@@ -464,7 +644,7 @@ txt_content += f"""
 3. Geographic Concentration:
    • Top state: {top_states.index[0]} ({top_states.values[0]:,} customers)
    • Top 5 states account for {top_states_pct}% of customers
-
+{delivery_text}{churn_text}
 RECOMMENDATIONS
 --------------------------------------------
 1. Immediate Actions (Next 30 days):
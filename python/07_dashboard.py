@@ -1,10 +1,13 @@
 # 07_dashboard.py - Simple interactive dashboard
 import pandas as pd
-import matplotlib.pyplot as plt
 import os
 
+from segment_stats import segment_stats
+from geo_index import load_geo_index
+
 # Load data
 customers = pd.read_csv('../data/segmented_customers.csv')
+geo = load_geo_index('../data/geo_rollup.csv', customers)
 
 print("=" * 50)
 print("CUSTOMER SEGMENTATION DASHBOARD")
@@ -20,17 +23,15 @@ while True:
     choice = input("\nEnter your choice (1-5): ")
     
     if choice == '1':
-        summary = customers.groupby('segment').agg({
-            'customer_id': 'count',
-            'monetary': ['sum', 'mean']
-        }).round(2)
+        stats = segment_stats(customers, columns=['monetary'], medians=())
+        summary = stats[['count', 'monetary_sum', 'monetary_mean', 'repeat_rate', 'top_state']].round(2)
         print("\n", summary)
         
     elif choice == '2':
-        top_states = customers['state'].value_counts().head(10)
+        top_states = geo.top(10)
         print("\nTop 10 States:")
-        for state, count in top_states.items():
-            print(f"   {state}: {count:,} customers")
+        for _, node in top_states.iterrows():
+            print(f"   {node['state']}: {node['customers']:,} customers (R${node['revenue']:,.2f})")
             
     elif choice == '3':
         at_risk = customers[customers['segment'].str.contains('At Risk|Hibernating', na=False)]
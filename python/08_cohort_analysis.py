@@ -0,0 +1,107 @@
+# 08_cohort_analysis.py
+# ============================================
+# STEP 8: COHORT RETENTION ANALYSIS
+# ============================================
+
+import pandas as pd
+import numpy as np
+import os
+
+from cohorts import month_codes, update_first_months, CohortAccumulator, retention_matrix
+from segmentation.plotting import load_plotting
+
+print("=" * 60)
+print("CUSTOMER SEGMENTATION PROJECT - STEP 8: COHORT ANALYSIS")
+print("=" * 60)
+
+# Define paths
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_dir = os.environ.get('SEGMENTATION_PROJECT_DIR', os.path.dirname(current_dir))
+data_dir = os.path.join(project_dir, 'data')
+reports_dir = os.path.join(project_dir, 'reports')
+figures_dir = os.path.join(project_dir, 'figures')
+
+data_file = os.path.join(data_dir, 'prepared_data.csv')
+
+if not os.path.exists(data_file):
+    print("❌ ERROR: prepared_data.csv not found!")
+    print("Please run 02_data_preparation.py first")
+    exit()
+
+# Only the columns the cohort kernel needs, streamed in chunks
+cohort_columns = ['customer_unique_id', 'purchase_year', 'purchase_month', 'price']
+chunk_size = 1_000_000
+
+
+def read_chunks():
+    return pd.read_csv(data_file, usecols=cohort_columns, chunksize=chunk_size,
+                       dtype={'purchase_year': 'int32', 'purchase_month': 'int32', 'price': 'float64'})
+
+
+# Pass 1: first purchase month per customer
+print(f"\n📂 Pass 1: finding first purchase month per customer...")
+first_months = None
+row_count = 0
+for chunk in read_chunks():
+    codes = month_codes(chunk['purchase_year'], chunk['purchase_month'])
+    first_months = update_first_months(first_months, chunk['customer_unique_id'], codes)
+    row_count += len(chunk)
+print(f"   ✅ Scanned {row_count:,} records, {len(first_months):,} customers")
+
+# Pass 2: accumulate cohort x months-since-first-purchase cells
+print(f"\n📊 Pass 2: accumulating cohort matrix...")
+accumulator = CohortAccumulator(first_months)
+for chunk in read_chunks():
+    codes = month_codes(chunk['purchase_year'], chunk['purchase_month'])
+    accumulator.add(chunk['customer_unique_id'], codes, chunk['price'])
+
+cohort_sizes, active, revenue = accumulator.result()
+retention = retention_matrix(cohort_sizes, active)
+print(f"   ✅ {len(cohort_sizes)} monthly cohorts, up to {active.shape[1] - 1} months of follow-up")
+
+print("\n📈 Average retention by months since first purchase:")
+avg_retention = retention.iloc[:, 1:7].mean()
+for months, pct in avg_retention.items():
+    print(f"   • Month {months}: {pct:.2f}%")
+
+# Save matrices
+print("\n💾 Saving cohort matrices...")
+retention_file = os.path.join(reports_dir, 'cohort_retention.csv')
+revenue_file = os.path.join(reports_dir, 'cohort_revenue.csv')
+retention.insert(0, 'cohort_size', cohort_sizes)
+retention.round(2).to_csv(retention_file)
+revenue.insert(0, 'cohort_size', cohort_sizes)
+revenue.round(2).to_csv(revenue_file)
+print(f"   ✅ Retention matrix saved to: {retention_file}")
+print(f"   ✅ Revenue matrix saved to: {revenue_file}")
+
+# ============================================
+# CHART: Cohort Retention Heatmap
+# ============================================
+print("\n📊 Creating Cohort Retention Heatmap...")
+
+if not os.path.exists(figures_dir):
+    os.makedirs(figures_dir)
+
+plt, sns = load_plotting()
+
+# Month 0 is always 100%, so the heatmap starts at month 1
+heatmap_data = retention.drop(columns='cohort_size').iloc[:, 1:13]
+
+plt.figure(figsize=(14, 10))
+sns.heatmap(heatmap_data, annot=True, fmt='.1f', cmap='YlGnBu',
+            cbar_kws={'label': 'Customers Purchasing Again (%)'})
+
+plt.xlabel('Months Since First Purchase', fontsize=12)
+plt.ylabel('First Purchase Cohort', fontsize=12)
+plt.title('Cohort Retention by Month', fontsize=16, fontweight='bold', pad=20)
+plt.tight_layout()
+
+cohort_chart_file = os.path.join(figures_dir, 'cohort_retention_heatmap.png')
+plt.savefig(cohort_chart_file, dpi=300, bbox_inches='tight')
+plt.close()
+print(f"   ✅ Saved to: {cohort_chart_file}")
+
+print("\n" + "=" * 60)
+print("✅ COHORT ANALYSIS COMPLETE!")
+print("=" * 60)
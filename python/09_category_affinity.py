@@ -0,0 +1,119 @@
+# 09_category_affinity.py
+# ============================================
+# STEP 9: PRODUCT CATEGORY AFFINITY
+# ============================================
+
+import pandas as pd
+import numpy as np
+import os
+from scipy import sparse
+
+from category_affinity import category_lookup, spend_matrix, segment_category_mix, top_categories
+from id_codes import load_dictionaries
+
+print("=" * 60)
+print("CUSTOMER SEGMENTATION PROJECT - STEP 9: CATEGORY AFFINITY")
+print("=" * 60)
+
+# Define paths
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_dir = os.environ.get('SEGMENTATION_PROJECT_DIR', os.path.dirname(current_dir))
+data_dir = os.path.join(project_dir, 'data')
+reports_dir = os.path.join(project_dir, 'reports')
+
+required_files = ['prepared_data.csv', 'segmented_customers.csv',
+                  'olist_products_dataset.csv', 'product_category_name_translation.csv']
+for file_name in required_files:
+    if not os.path.exists(os.path.join(data_dir, file_name)):
+        print(f"❌ ERROR: {file_name} not found!")
+        print("Please run 02_data_preparation.py and 04_rfm_segmentation.py first")
+        exit()
+
+# Load order items (one row per item; payment rows fan items out, so dedupe)
+print(f"\n📂 Loading order items...")
+items = pd.read_csv(os.path.join(data_dir, 'prepared_data.csv'),
+                    usecols=['order_id', 'order_item_id', 'customer_unique_id', 'product_id', 'price'])
+items = items.drop_duplicates(['order_id', 'order_item_id'])
+print(f"   ✅ {len(items):,} order items")
+
+products = pd.read_csv(os.path.join(data_dir, 'olist_products_dataset.csv'),
+                       usecols=['product_id', 'product_category_name'])
+# The translation file ships with a UTF-8 byte order mark
+translation = pd.read_csv(os.path.join(data_dir, 'product_category_name_translation.csv'), encoding='utf-8-sig')
+segmented = pd.read_csv(os.path.join(data_dir, 'segmented_customers.csv'), usecols=['customer_id', 'segment'])
+
+# Id dictionaries from 02 (codes = positions); fall back to raw strings
+dictionaries = load_dictionaries(data_dir, ['customer_unique_id', 'product_id'])
+if 'product_id' in dictionaries and pd.api.types.is_integer_dtype(items['product_id']):
+    product_ids = dictionaries['product_id'].values
+    product_codes = items['product_id'].to_numpy()
+else:
+    product_codes, product_ids = pd.factorize(items['product_id'])
+if 'customer_unique_id' in dictionaries and pd.api.types.is_integer_dtype(items['customer_unique_id']):
+    customer_ids = dictionaries['customer_unique_id'].values
+    customer_codes = items['customer_unique_id'].to_numpy()
+else:
+    customer_codes, customer_ids = pd.factorize(items['customer_unique_id'])
+
+# Join items to translated categories through integer lookups
+print("\n🔗 Joining items to product categories...")
+product_to_category, categories = category_lookup(products, translation, pd.Index(product_ids))
+category_codes = product_to_category[product_codes]
+print(f"   ✅ {len(categories):,} categories")
+
+# Sparse customer x category spend
+print("\n📊 Building customer x category spend matrix (CSR)...")
+spend = spend_matrix(customer_codes, category_codes, items['price'], len(customer_ids), len(categories))
+print(f"   ✅ {spend.shape[0]:,} x {spend.shape[1]:,}, {spend.nnz:,} non-zero cells "
+      f"({spend.nnz / max(spend.shape[0] * spend.shape[1], 1) * 100:.2f}% dense)")
+
+# Per-segment category mix
+print("\n🏷️ Computing per-segment category mix...")
+segment_codes_by_customer = np.full(len(customer_ids), -1, dtype=np.int64)
+segment_codes, segments = pd.factorize(segmented['segment'], sort=True)
+positions = pd.Index(customer_ids).get_indexer(segmented['customer_id'])
+matched = positions >= 0
+segment_codes_by_customer[positions[matched]] = segment_codes[matched]
+
+mix = segment_category_mix(spend, segment_codes_by_customer, len(segments)).tocoo()
+segment_mix = pd.DataFrame({
+    'segment': np.asarray(segments)[mix.row],
+    'category': np.asarray(categories)[mix.col],
+    'spend': mix.data
+})
+segment_mix['share_pct'] = segment_mix['spend'] / segment_mix.groupby('segment')['spend'].transform('sum') * 100
+segment_mix = segment_mix.sort_values(['segment', 'spend'], ascending=[True, False])
+segment_mix['rank'] = segment_mix.groupby('segment').cumcount() + 1
+
+for segment, top in segment_mix[segment_mix['rank'] <= 3].groupby('segment'):
+    print(f"   {segment}: " + ", ".join(f"{c} ({p:.1f}%)" for c, p in zip(top['category'], top['share_pct'])))
+
+# Top categories per customer
+print("\n🛒 Finding each customer's top categories...")
+top_codes, top_spend = top_categories(spend, k=3)
+has_items = top_codes[:, 0] >= 0
+category_names = np.asarray(categories + [''], dtype=object)
+customer_top = pd.DataFrame({'customer_id': np.asarray(customer_ids, dtype=object)[has_items]})
+for i in range(top_codes.shape[1]):
+    customer_top[f'top_category_{i + 1}'] = category_names[top_codes[has_items, i]]
+    customer_top[f'top_category_{i + 1}_spend'] = top_spend[has_items, i].round(2)
+print(f"   ✅ Top categories for {len(customer_top):,} customers")
+
+# Save results
+print("\n💾 Saving category affinity results...")
+mix_file = os.path.join(reports_dir, 'segment_category_mix.csv')
+segment_mix.round(2).to_csv(mix_file, index=False)
+print(f"   ✅ Segment category mix saved to: {mix_file}")
+
+top_file = os.path.join(data_dir, 'customer_top_categories.csv')
+customer_top.to_csv(top_file, index=False)
+print(f"   ✅ Customer top categories saved to: {top_file}")
+
+matrix_file = os.path.join(data_dir, 'customer_category_spend.npz')
+sparse.save_npz(matrix_file, spend)
+pd.DataFrame({'category': categories}).to_csv(os.path.join(data_dir, 'categories.csv'), index_label='code')
+print(f"   ✅ Spend matrix saved to: {matrix_file}")
+
+print("\n" + "=" * 60)
+print("✅ CATEGORY AFFINITY COMPLETE!")
+print("=" * 60)
@@ -0,0 +1,86 @@
+# 10_rfm_sensitivity.py
+# ============================================
+# STEP 10: RFM SCORING SENSITIVITY ANALYSIS
+# ============================================
+
+import pandas as pd
+import numpy as np
+import os
+import argparse
+import time
+
+from rfm_sensitivity import SCHEMES, evaluate_variants
+from rfm_engine import DEFAULT_THRESHOLDS
+
+parser = argparse.ArgumentParser(description='Compare RFM scoring schemes and segment thresholds')
+parser.add_argument('--schemes', nargs='+', choices=list(SCHEMES), default=list(SCHEMES),
+                    help='Scoring schemes to evaluate (default: all)')
+args = parser.parse_args()
+
+print("=" * 60)
+print("CUSTOMER SEGMENTATION PROJECT - STEP 10: RFM SENSITIVITY")
+print("=" * 60)
+
+# Define paths
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_dir = os.environ.get('SEGMENTATION_PROJECT_DIR', os.path.dirname(current_dir))
+data_dir = os.path.join(project_dir, 'data')
+reports_dir = os.path.join(project_dir, 'reports')
+
+metrics_file = os.path.join(data_dir, 'customer_metrics.csv')
+
+if not os.path.exists(metrics_file):
+    print("❌ ERROR: customer_metrics.csv not found!")
+    print("Please run 03_customer_metrics.py first")
+    exit()
+
+print(f"\n📂 Loading customer metrics...")
+customers = pd.read_csv(metrics_file, usecols=['recency_days', 'frequency', 'monetary'])
+print(f"   ✅ {len(customers):,} customers")
+
+# ============================================
+# EVALUATE EVERY SCHEME x THRESHOLD VARIANT
+# ============================================
+print(f"\n🧮 Scoring schemes: {', '.join(args.schemes)}")
+start = time.perf_counter()
+results = evaluate_variants(customers, args.schemes)
+elapsed = time.perf_counter() - start
+n_variants = results['variant_id'].nunique()
+print(f"   ✅ {n_variants:,} variants evaluated in {elapsed:.2f} seconds")
+
+if not os.path.exists(reports_dir):
+    os.makedirs(reports_dir)
+
+results_file = os.path.join(reports_dir, 'rfm_sensitivity.csv')
+results.round({'customer_pct': 2, 'revenue': 2, 'revenue_pct': 2}).to_csv(results_file, index=False)
+print(f"   ✅ Saved to: {results_file}")
+
+# ============================================
+# SUMMARY
+# ============================================
+# Default thresholds, rescaled to each scheme's score range
+print("\n📊 Segment revenue share with the default thresholds:")
+baseline = []
+for scheme in args.schemes:
+    scale = SCHEMES[scheme][0] // 5
+    mask = results['scheme'] == scheme
+    for col, value in DEFAULT_THRESHOLDS.items():
+        mask &= results[col] == value * scale
+    baseline.append(results[mask].set_index('segment')['revenue_pct'].rename(scheme))
+baseline = pd.concat(baseline, axis=1)
+print(baseline.round(1).to_string())
+
+# How much each segment moves across all variants of a scheme
+spread = results.groupby(['scheme', 'segment'])['revenue_pct'].agg(['min', 'median', 'max'])
+spread['range'] = spread['max'] - spread['min']
+spread_file = os.path.join(reports_dir, 'rfm_sensitivity_spread.csv')
+spread.round(2).to_csv(spread_file)
+
+print("\n📈 Most threshold-sensitive segments (revenue share range, % points):")
+for (scheme, segment), row in spread.sort_values('range', ascending=False).head(10).iterrows():
+    print(f"   {scheme:<10} {segment:<22} {row['min']:>5.1f} - {row['max']:>5.1f}")
+print(f"   ✅ Saved to: {spread_file}")
+
+print("\n" + "=" * 60)
+print("✅ SENSITIVITY ANALYSIS COMPLETE!")
+print("=" * 60)
@@ -0,0 +1,75 @@
+# 11_order_consumer.py
+# ============================================
+# STEP 11: CONTINUOUS ORDER CONSUMER
+# ============================================
+
+import os
+import argparse
+import time
+
+from order_stream import OrderConsumer
+
+# Define paths
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_dir = os.environ.get('SEGMENTATION_PROJECT_DIR', os.path.dirname(current_dir))
+data_dir = os.path.join(project_dir, 'data')
+
+parser = argparse.ArgumentParser(description='Tail an order event file and emit segment changes')
+parser.add_argument('--events', default=os.path.join(data_dir, 'order_events.jsonl'),
+                    help='Append-only JSONL order events (default: data/order_events.jsonl)')
+parser.add_argument('--changes', default=os.path.join(data_dir, 'segment_changes.jsonl'),
+                    help='Segment change log to append to (default: data/segment_changes.jsonl)')
+parser.add_argument('--rejects', default=os.path.join(data_dir, 'rejected_events.jsonl'),
+                    help='Invalid event lines are appended here (default: data/rejected_events.jsonl)')
+parser.add_argument('--checkpoint', default=os.path.join(data_dir, 'order_consumer.ckpt.npz'),
+                    help='State checkpoint file (default: data/order_consumer.ckpt.npz)')
+parser.add_argument('--checkpoint-interval', type=float, default=30.0,
+                    help='Seconds between checkpoints (default: 30)')
+parser.add_argument('--dedupe-days', type=int, default=30,
+                    help='Days of event time over which re-sent orders are detected (default: 30)')
+parser.add_argument('--poll-interval', type=float, default=0.5,
+                    help='Seconds to wait when no new events are available (default: 0.5)')
+parser.add_argument('--once', action='store_true',
+                    help='Stop at the end of the file instead of waiting for more events')
+args = parser.parse_args()
+
+print("=" * 60)
+print("CUSTOMER SEGMENTATION PROJECT - STEP 11: ORDER CONSUMER")
+print("=" * 60)
+
+if not os.path.exists(args.events):
+    print(f"❌ ERROR: {args.events} not found!")
+    print("Point --events at the order event file")
+    exit()
+
+consumer = OrderConsumer(args.events, args.changes, args.checkpoint, args.checkpoint_interval,
+                         dedupe_days=args.dedupe_days, rejects_path=args.rejects)
+if consumer.offset:
+    print(f"\n♻️ Resuming from checkpoint: {len(consumer.state):,} customers, byte offset {consumer.offset:,}")
+print(f"\n📡 Consuming {args.events}{' until end of file' if args.once else ' (Ctrl+C to stop after the current batch)'}...")
+
+start = time.perf_counter()
+checkpointed = True
+try:
+    # The first Ctrl+C finishes the current batch and checkpoints before returning
+    consumer.run(follow=not args.once, poll_interval=args.poll_interval)
+except KeyboardInterrupt:
+    # Second Ctrl+C: stopped mid-batch, so anything after the last checkpoint
+    # is replayed on restart
+    checkpointed = False
+elapsed = time.perf_counter() - start
+
+print(f"   ✅ {consumer.events:,} events in {consumer.batches:,} micro-batches ({elapsed:.1f}s)")
+if consumer.duplicates:
+    print(f"   ⚠️ Skipped {consumer.duplicates:,} events for orders applied in the last {args.dedupe_days} days")
+if consumer.rejected:
+    print(f"   ⚠️ Skipped {consumer.rejected:,} invalid event lines, appended to: {args.rejects}")
+print(f"   ✅ {consumer.changes:,} segment changes appended to: {args.changes}")
+if checkpointed:
+    print(f"   ✅ Customer state checkpointed to: {args.checkpoint}")
+else:
+    print(f"   ⚠️ Interrupted before the final checkpoint; restart resumes from the last one in: {args.checkpoint}")
+
+print("\n" + "=" * 60)
+print("✅ ORDER CONSUMER STOPPED")
+print("=" * 60)
@@ -0,0 +1,67 @@
+# 12_segment_confidence.py
+# ============================================
+# STEP 12: SEGMENT KPI CONFIDENCE INTERVALS
+# ============================================
+
+import pandas as pd
+import numpy as np
+import os
+import argparse
+import time
+
+from bootstrap_ci import KPI_COLUMNS, bootstrap_segment_kpis
+
+# Define paths
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_dir = os.environ.get('SEGMENTATION_PROJECT_DIR', os.path.dirname(current_dir))
+data_dir = os.path.join(project_dir, 'data')
+reports_dir = os.path.join(project_dir, 'reports')
+
+# Worker processes re-import this module, so everything runs under the main guard
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Bootstrap confidence intervals for the segment KPIs')
+    parser.add_argument('--resamples', type=int, default=2000, help='Bootstrap resamples per segment (default: 2000)')
+    parser.add_argument('--confidence', type=float, default=0.95, help='Interval coverage (default: 0.95)')
+    parser.add_argument('--workers', type=int, help='Worker processes (default: all cores)')
+    parser.add_argument('--memory-mb', type=float, default=512,
+                        help='Memory budget for resampling weights across all workers, MB (default: 512)')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed (default: 0)')
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("CUSTOMER SEGMENTATION PROJECT - STEP 12: KPI CONFIDENCE")
+    print("=" * 60)
+
+    segmented_file = os.path.join(data_dir, 'segmented_customers.csv')
+    if not os.path.exists(segmented_file):
+        print("❌ ERROR: segmented_customers.csv not found!")
+        print("Please run 04_rfm_segmentation.py first")
+        exit()
+
+    print(f"\n📂 Loading segmented customers...")
+    customers = pd.read_csv(segmented_file, usecols=['segment'] + list(KPI_COLUMNS.values()))
+    print(f"   ✅ Loaded {len(customers):,} customer records")
+
+    print(f"\n🎲 Bootstrapping {args.resamples:,} resamples per segment "
+          f"({args.confidence:.0%} intervals, {args.memory_mb:.0f} MB budget)...")
+    start = time.perf_counter()
+    intervals = bootstrap_segment_kpis(customers, resamples=args.resamples, confidence=args.confidence,
+                                       workers=args.workers, memory_bytes=int(args.memory_mb * 1024**2),
+                                       seed=args.seed)
+    print(f"   ✅ Done in {time.perf_counter() - start:.1f} seconds")
+
+    print("\n📊 Average spend and revenue share by segment:")
+    for segment, row in intervals.sort_values('revenue_pct', ascending=False).iterrows():
+        print(f"   {segment:<22} n={row['customers']:>9,.0f}   "
+              f"avg spend R${row['avg_spent']:>8,.2f} [{row['avg_spent_low']:,.2f} - {row['avg_spent_high']:,.2f}]   "
+              f"revenue {row['revenue_pct']:>5.1f}% [{row['revenue_pct_low']:.1f} - {row['revenue_pct_high']:.1f}]")
+
+    if not os.path.exists(reports_dir):
+        os.makedirs(reports_dir)
+    intervals_file = os.path.join(reports_dir, 'segment_kpi_intervals.csv')
+    intervals.round(4).to_csv(intervals_file)
+    print(f"\n   ✅ Saved to: {intervals_file}")
+
+    print("\n" + "=" * 60)
+    print("✅ CONFIDENCE INTERVALS COMPLETE!")
+    print("=" * 60)
@@ -0,0 +1,103 @@
+# 13_tenant_batch.py
+# ============================================
+# STEP 13: MULTI-TENANT BATCH RUN
+# ============================================
+
+import pandas as pd
+import os
+import argparse
+import time
+
+from tenant_batch import PIPELINE_STEPS, read_manifest, run_batch, tenant_summary, consolidate_reports
+
+# Define paths
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_dir = os.path.dirname(current_dir)
+
+parser = argparse.ArgumentParser(description='Run steps 02-06 for many store datasets in parallel')
+parser.add_argument('manifest', help='CSV with tenant,input_dir columns (one row per store)')
+parser.add_argument('--output-dir', default=os.path.join(project_dir, 'tenants'),
+                    help='Parent folder for the per-tenant outputs (default: tenants/)')
+parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                    help='Tenants processed at the same time (default: all cores)')
+parser.add_argument('--memory-mb', type=float,
+                    help='Address space limit for each pipeline step, MB, Linux only (default: no limit)')
+parser.add_argument('--preview', action='store_true', help='Pass --preview to 05_visualizations.py')
+args = parser.parse_args()
+
+print("=" * 60)
+print("CUSTOMER SEGMENTATION PROJECT - STEP 13: TENANT BATCH")
+print("=" * 60)
+
+if not os.path.exists(args.manifest):
+    print(f"❌ ERROR: {args.manifest} not found!")
+    exit(1)
+
+try:
+    manifest = read_manifest(args.manifest)
+except ValueError as e:
+    print(f"❌ ERROR: {e}")
+    exit(1)
+
+output_dir = os.path.abspath(args.output_dir)
+os.makedirs(output_dir, exist_ok=True)
+memory_bytes = int(args.memory_mb * 1024**2) if args.memory_mb else None
+step_args = {'05_visualizations.py': ['--preview']} if args.preview else None
+
+print(f"\n🏪 {len(manifest):,} tenants, {args.workers} at a time"
+      f"{f', {args.memory_mb:,.0f} MB per step' if memory_bytes else ''}")
+print(f"   Steps: {', '.join(step.split('_')[0] for step in PIPELINE_STEPS)}")
+
+
+def report_tenant(tenant, records):
+    seconds = sum(record['seconds'] for record in records)
+    failed = [record for record in records if record['status'] != 'ok']
+    if failed:
+        print(f"   ❌ {tenant}: step {failed[0]['step']} {failed[0]['status']} after {seconds:.1f}s "
+              f"(see {os.path.join(output_dir, tenant, 'logs')})")
+    else:
+        print(f"   ✅ {tenant}: {seconds:.1f}s")
+
+
+start = time.perf_counter()
+timings = run_batch(manifest, output_dir, workers=args.workers, memory_bytes=memory_bytes,
+                    step_args=step_args, on_done=report_tenant)
+elapsed = time.perf_counter() - start
+
+# ============================================
+# TIMING REPORT
+# ============================================
+summary = tenant_summary(timings)
+timings_file = os.path.join(output_dir, 'tenant_timings.csv')
+timings.round({'seconds': 2, 'peak_rss_mb': 1, 'input_mb': 2}).to_csv(timings_file, index=False)
+
+print(f"\n⏱️ Per-tenant timings (largest input first):")
+for tenant, row in summary.iterrows():
+    peak = f"{row['peak_rss_mb']:>7,.0f} MB peak" if pd.notna(row['peak_rss_mb']) else ''
+    print(f"   {tenant:<20} {row['input_mb']:>8,.1f} MB in  {row['seconds']:>7.1f}s  {peak}  {row['status']}")
+print(f"   Wall time {elapsed:.1f}s for {summary['seconds'].sum():.1f}s of pipeline work")
+print(f"   ✅ Saved to: {timings_file}")
+
+# ============================================
+# CROSS-TENANT SUMMARY
+# ============================================
+combined = consolidate_reports(output_dir, summary.index[summary['status'] == 'ok'])
+if len(combined):
+    combined_file = os.path.join(output_dir, 'cross_tenant_summary.csv')
+    combined.to_csv(combined_file, index=False)
+
+    print(f"\n📊 Revenue by segment across tenants:")
+    revenue = combined.pivot_table(index='Segment', columns='Tenant', values='Total Revenue',
+                                   aggfunc='sum', fill_value=0)
+    revenue['All Tenants'] = revenue.sum(axis=1)
+    print(revenue.sort_values('All Tenants', ascending=False).round(0).to_string())
+    print(f"   ✅ Saved to: {combined_file}")
+
+n_failed = (summary['status'] != 'ok').sum()
+print("\n" + "=" * 60)
+if n_failed:
+    print(f"⚠️ TENANT BATCH FINISHED WITH {n_failed} FAILED TENANT(S)")
+else:
+    print("✅ TENANT BATCH COMPLETE!")
+print("=" * 60)
+exit(1 if n_failed else 0)
@@ -0,0 +1,58 @@
+# 14_sqlite_export.py
+# ============================================
+# STEP 14: SQLITE SERVING EXPORT
+# ============================================
+
+import pandas as pd
+import os
+import argparse
+import time
+
+from serving_db import export_database, connect, segment_customers, customer_query_plan
+
+# Define paths
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_dir = os.environ.get('SEGMENTATION_PROJECT_DIR', os.path.dirname(current_dir))
+data_dir = os.path.join(project_dir, 'data')
+
+parser = argparse.ArgumentParser(description='Load segmented customers and aggregates into an indexed SQLite database')
+parser.add_argument('--database', default=os.path.join(data_dir, 'segmentation.sqlite'),
+                    help='Output database (default: data/segmentation.sqlite)')
+parser.add_argument('--batch-size', type=int, default=10000, help='Rows per executemany batch (default: 10000)')
+args = parser.parse_args()
+
+print("=" * 60)
+print("CUSTOMER SEGMENTATION PROJECT - STEP 14: SQLITE EXPORT")
+print("=" * 60)
+
+segmented_file = os.path.join(data_dir, 'segmented_customers.csv')
+if not os.path.exists(segmented_file):
+    print("❌ ERROR: segmented_customers.csv not found!")
+    print("Please run 04_rfm_segmentation.py first")
+    exit()
+
+print(f"\n📂 Loading segmented customers...")
+customers = pd.read_csv(segmented_file)
+print(f"   ✅ Loaded {len(customers):,} customer records")
+
+print(f"\n🗄️ Loading into {args.database}...")
+start = time.perf_counter()
+rows = export_database(args.database, customers, batch_size=args.batch_size)
+elapsed = time.perf_counter() - start
+for table, count in rows.items():
+    print(f"   • {table}: {count:,} rows")
+print(f"   ✅ {sum(rows.values()):,} rows in {elapsed:.2f} seconds "
+      f"({sum(rows.values()) / elapsed:,.0f} rows/second, {os.path.getsize(args.database) / 1024**2:.1f} MB)")
+
+# Example: the CRM team's most common query
+print("\n🔍 Top At Risk customers in SP by spend:")
+conn = connect(args.database)
+print("   Plan: " + customer_query_plan(conn, 'At Risk', 'SP', limit=5).replace('\n', '\n         '))
+top = segment_customers(conn, 'At Risk', 'SP', limit=5)
+for row in top.itertuples():
+    print(f"   {row.customer_id}  R${row.monetary:>10,.2f}  {row.frequency} orders, {row.recency_days} days ago")
+conn.close()
+
+print("\n" + "=" * 60)
+print("✅ SQLITE EXPORT COMPLETE!")
+print("=" * 60)
@@ -0,0 +1,101 @@
+# 15_churn_scoring.py
+# ============================================
+# STEP 15: CHURN AND NEXT-PURCHASE SCORING
+# ============================================
+
+import pandas as pd
+import numpy as np
+import os
+import argparse
+import time
+
+from churn_model import score_churn, churn_watchlist
+
+parser = argparse.ArgumentParser(description='Score churn probability and expected next purchase per customer')
+parser.add_argument('--horizon', type=int, default=180,
+                    help='Churn means no purchase within this many days (default: 180)')
+parser.add_argument('--window', type=int, default=30,
+                    help='Watchlist window: customers who cross the threshold within it (default: 30)')
+parser.add_argument('--threshold', type=float, default=0.8,
+                    help='Churn probability that counts as churned (default: 0.8)')
+args = parser.parse_args()
+
+print("=" * 60)
+print("CUSTOMER SEGMENTATION PROJECT - STEP 15: CHURN SCORING")
+print("=" * 60)
+
+# Define paths
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_dir = os.environ.get('SEGMENTATION_PROJECT_DIR', os.path.dirname(current_dir))
+data_dir = os.path.join(project_dir, 'data')
+reports_dir = os.path.join(project_dir, 'reports')
+
+segmented_file = os.path.join(data_dir, 'segmented_customers.csv')
+if not os.path.exists(segmented_file):
+    print("❌ ERROR: segmented_customers.csv not found!")
+    print("Please run 04_rfm_segmentation.py first")
+    exit()
+
+print(f"\n📂 Loading segmented customers...")
+customers = pd.read_csv(segmented_file, usecols=['customer_id', 'segment', 'state', 'recency_days',
+                                                 'frequency', 'monetary', 'lifetime_days'])
+print(f"   ✅ Loaded {len(customers):,} customer records")
+
+# recency_days counts back from the latest order in the data
+prepared_file = os.path.join(data_dir, 'prepared_data.csv')
+latest_date = None
+if os.path.exists(prepared_file):
+    latest_date = pd.to_datetime(pd.read_csv(prepared_file, usecols=['order_purchase_timestamp'])
+                                 ['order_purchase_timestamp']).max().normalize()
+
+# ============================================
+# SCORE EVERY CUSTOMER
+# ============================================
+print(f"\n⏳ Scoring churn over {args.horizon} days and the next purchase...")
+start = time.perf_counter()
+scores = score_churn(customers, horizon=args.horizon, window=args.window)
+print(f"   ✅ {len(scores):,} customers scored in {time.perf_counter() - start:.2f} seconds")
+
+scored = customers.join(scores)
+if latest_date is not None:
+    scored['next_purchase_date'] = (latest_date + pd.to_timedelta(scores['days_to_next_purchase'].round(), unit='D')).dt.date
+
+print(f"\n📊 Churn outlook by segment (churn = no purchase within {args.horizon} days):")
+outlook = scored.groupby('segment').agg(
+    customers=('customer_id', 'size'),
+    avg_churn_probability=('churn_probability', 'mean'),
+    likely_churned=('churn_probability', lambda p: (p >= args.threshold).mean() * 100),
+    median_days_to_next_purchase=('days_to_next_purchase', 'median'),
+).sort_values('avg_churn_probability')
+for segment, row in outlook.iterrows():
+    next_days = f"{row['median_days_to_next_purchase']:.0f} days" if pd.notna(row['median_days_to_next_purchase']) else 'n/a'
+    print(f"   {segment:<22} churn {row['avg_churn_probability']:>5.1%}   "
+          f"{row['likely_churned']:>5.1f}% past {args.threshold:.0%}   next purchase if they return: {next_days}")
+
+scores_file = os.path.join(data_dir, 'churn_scores.csv')
+scored.round({'churn_probability': 4, 'churn_probability_in_window': 4,
+              'days_to_next_purchase': 1, 'expected_gap_days': 1, 'return_probability': 4}).to_csv(scores_file, index=False)
+print(f"   ✅ Saved to: {scores_file}")
+
+# ============================================
+# EXPECTED TO CHURN IN THE WINDOW
+# ============================================
+watchlist = churn_watchlist(scored, threshold=args.threshold).copy()
+watchlist['churn_window_days'] = args.window
+print(f"\n⚠️ Expected to churn in {args.window} days without a purchase: {len(watchlist):,} customers, "
+      f"R${watchlist['monetary'].sum():,.2f} lifetime spend")
+for row in watchlist.head(10).itertuples():
+    print(f"   {row.customer_id}  {row.segment:<20} R${row.monetary:>9,.2f}  "
+          f"churn {row.churn_probability:.0%} → {row.churn_probability_in_window:.0%}")
+
+if not os.path.exists(reports_dir):
+    os.makedirs(reports_dir)
+watchlist_file = os.path.join(reports_dir, 'churn_watchlist.csv')
+watchlist.round({'churn_probability': 4, 'churn_probability_in_window': 4,
+                 'days_to_next_purchase': 1, 'expected_gap_days': 1, 'return_probability': 4}).to_csv(watchlist_file, index=False)
+print(f"   ✅ Saved to: {watchlist_file}")
+
+print("\n" + "=" * 60)
+print("✅ CHURN SCORING COMPLETE!")
+print("=" * 60)
+print("\nRun 06_final_report.py to include the watchlist in the reports")
@@ -0,0 +1,107 @@
+# 16_daily_rollup.py
+# ============================================
+# STEP 16: DAILY REVENUE AND ORDER TIME SERIES
+# ============================================
+
+import pandas as pd
+import numpy as np
+import os
+import argparse
+import time
+
+from daily_rollup import DailyRollup, ROLLUP_COLUMNS
+from id_codes import load_dictionaries
+
+parser = argparse.ArgumentParser(description='Daily revenue, orders and new customers per segment and state')
+parser.add_argument('--append', metavar='CSV',
+                    help='Add new days of order rows (prepared_data.csv columns) to the saved rollup')
+parser.add_argument('--freq', choices=['D', 'W', 'M'], default='W',
+                    help='Period of the exported series: daily, weekly or monthly (default: W)')
+args = parser.parse_args()
+
+print("=" * 60)
+print("CUSTOMER SEGMENTATION PROJECT - STEP 16: DAILY ROLLUP")
+print("=" * 60)
+
+# Define paths
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_dir = os.environ.get('SEGMENTATION_PROJECT_DIR', os.path.dirname(current_dir))
+data_dir = os.path.join(project_dir, 'data')
+reports_dir = os.path.join(project_dir, 'reports')
+
+rollup_file = os.path.join(data_dir, 'daily_rollup.npz')
+data_file = args.append or os.path.join(data_dir, 'prepared_data.csv')
+segmented_file = os.path.join(data_dir, 'segmented_customers.csv')
+
+for path, step in [(data_file, '02_data_preparation.py'), (segmented_file, '04_rfm_segmentation.py')]:
+    if not os.path.exists(path):
+        print(f"❌ ERROR: {os.path.basename(path)} not found!")
+        print(f"Please run {step} first")
+        exit()
+if args.append and not os.path.exists(rollup_file):
+    print("❌ ERROR: daily_rollup.npz not found!")
+    print("Please run 16_daily_rollup.py without --append first")
+    exit()
+
+segment_of = pd.read_csv(segmented_file, usecols=['customer_id', 'segment']).set_index('customer_id')['segment']
+
+print(f"\n📂 Loading order rows from {os.path.basename(data_file)}...")
+rows = pd.read_csv(data_file, usecols=ROLLUP_COLUMNS, dtype={'price': 'float64'})
+print(f"   ✅ Loaded {len(rows):,} records")
+
+# Segments are keyed by the id strings; 02 stores customers as integer codes.
+# Orders are decoded too, so appended files with string ids match the saved rollup.
+dictionaries = load_dictionaries(data_dir, ['customer_unique_id', 'order_id'])
+for column in ['customer_unique_id', 'order_id']:
+    if column in dictionaries and pd.api.types.is_integer_dtype(rows[column]):
+        rows[column] = dictionaries[column].decode(rows[column])
+
+# ============================================
+# BUILD OR EXTEND THE ROLLUP
+# ============================================
+start = time.perf_counter()
+if args.append:
+    rollup = DailyRollup.load(rollup_file)
+    previous_days = rollup.days
+    added = rollup.append(rows, segment_of)
+    print(f"\n➕ Appended {added:,} rows ({rollup.days - previous_days} new days) "
+          f"in {time.perf_counter() - start:.2f} seconds")
+    if added < len(rows):
+        print(f"   ⚠️ Skipped {len(rows) - added:,} rows already rolled up (earlier days or orders already counted)")
+else:
+    print(f"\n📊 Rolling up revenue, orders and new customers per day...")
+    rollup = DailyRollup.from_orders(rows, segment_of)
+    print(f"   ✅ Built in {time.perf_counter() - start:.2f} seconds")
+
+dates = rollup.dates()
+print(f"   {rollup.days:,} days ({dates[0].date()} to {dates[-1].date()}) x "
+      f"{len(rollup.segments)} segments x {len(rollup.states)} states, "
+      f"{sum(getattr(rollup, name).nbytes for name in ['revenue', 'orders', 'new_customers']) / 1024**2:.1f} MB")
+rollup.save(rollup_file)
+print(f"   ✅ Saved to: {rollup_file}")
+
+# ============================================
+# RESAMPLED SERIES
+# ============================================
+period_name = {'D': 'day', 'W': 'week', 'M': 'month'}[args.freq]
+series_name = {'D': 'daily', 'W': 'weekly', 'M': 'monthly'}[args.freq]
+totals = pd.concat([rollup.series(metric, None, args.freq) for metric in ['revenue', 'orders', 'new_customers']], axis=1)
+print(f"\n📈 Last 6 {period_name}s:")
+for period, row in totals.tail(6).iterrows():
+    print(f"   {period.date()}   R${row['revenue']:>12,.2f}   {row['orders']:>7,.0f} orders   "
+          f"{row['new_customers']:>6,.0f} new customers")
+
+revenue = rollup.series('revenue', 'segment', args.freq)
+print(f"\n🎯 Revenue by segment, last {period_name} vs average:")
+for segment in revenue.sum().sort_values(ascending=False).index:
+    print(f"   {segment:<22} R${revenue[segment].iloc[-1]:>11,.2f}   (avg R${revenue[segment].mean():,.2f})")
+
+if not os.path.exists(reports_dir):
+    os.makedirs(reports_dir)
+series_file = os.path.join(reports_dir, f'timeseries_{series_name}.csv')
+rollup.long_table(args.freq).round({'revenue': 2}).to_csv(series_file, index=False)
+print(f"\n   ✅ Series by segment and state saved to: {series_file}")
+
+print("\n" + "=" * 60)
+print("✅ DAILY ROLLUP COMPLETE!")
+print("=" * 60)
@@ -0,0 +1,181 @@
+# 17_market_basket.py
+# ============================================
+# STEP 17: MARKET-BASKET CO-PURCHASE ANALYSIS
+# ============================================
+
+import pandas as pd
+import numpy as np
+import os
+import argparse
+import math
+import time
+
+from market_basket import complete_orders, item_support, BasketAccumulator, pair_table
+from category_affinity import category_lookup
+from id_codes import IdDictionary, load_dictionaries
+
+parser = argparse.ArgumentParser(description='Products (or categories) bought together, overall and per segment')
+parser.add_argument('--level', choices=['product', 'category'], default='product',
+                    help='Mine pairs of products or of product categories (default: product)')
+parser.add_argument('--min-support', type=float, default=0.0001,
+                    help='Minimum share of orders for an item or pair (default: 0.0001)')
+parser.add_argument('--chunk-size', type=int, default=1_000_000,
+                    help="Order rows per chunk (default: 1000000). Each order's rows must be adjacent "
+                         "in prepared_data.csv, as 02 writes them; an order split across several "
+                         "chunks is not detected")
+args = parser.parse_args()
+items_name = {'product': 'products', 'category': 'categories'}[args.level]
+
+print("=" * 60)
+print("CUSTOMER SEGMENTATION PROJECT - STEP 17: MARKET BASKET")
+print("=" * 60)
+
+# Define paths
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_dir = os.environ.get('SEGMENTATION_PROJECT_DIR', os.path.dirname(current_dir))
+data_dir = os.path.join(project_dir, 'data')
+reports_dir = os.path.join(project_dir, 'reports')
+
+data_file = os.path.join(data_dir, 'prepared_data.csv')
+required_files = ['prepared_data.csv', 'segmented_customers.csv']
+if args.level == 'category':
+    required_files += ['olist_products_dataset.csv', 'product_category_name_translation.csv']
+for file_name in required_files:
+    if not os.path.exists(os.path.join(data_dir, file_name)):
+        print(f"❌ ERROR: {file_name} not found!")
+        print("Please run 02_data_preparation.py and 04_rfm_segmentation.py first")
+        exit()
+
+basket_columns = ['order_id', 'customer_unique_id', 'product_id']
+
+
+def read_chunks():
+    return complete_orders(pd.read_csv(data_file, usecols=basket_columns, chunksize=args.chunk_size))
+
+
+# Id dictionaries from 02 (codes = positions); fall back to encoding the raw strings as they stream in
+dictionaries = load_dictionaries(data_dir, ['customer_unique_id', 'product_id'])
+sample = pd.read_csv(data_file, usecols=basket_columns, nrows=1)
+products_encoded = 'product_id' in dictionaries and pd.api.types.is_integer_dtype(sample['product_id'])
+customers_encoded = 'customer_unique_id' in dictionaries and pd.api.types.is_integer_dtype(sample['customer_unique_id'])
+product_ids = dictionaries['product_id'] if products_encoded else IdDictionary()
+
+# Segment code per customer
+segmented = pd.read_csv(os.path.join(data_dir, 'segmented_customers.csv'), usecols=['customer_id', 'segment'])
+segment_codes, segments = pd.factorize(segmented['segment'], sort=True)
+customer_index = dictionaries['customer_unique_id'].values if customers_encoded else pd.Index(segmented['customer_id'])
+segment_by_customer = np.full(len(customer_index), -1, dtype=np.int64)
+positions = customer_index.get_indexer(segmented['customer_id'])
+segment_by_customer[positions[positions >= 0]] = segment_codes[positions >= 0]
+
+if args.level == 'category':
+    products = pd.read_csv(os.path.join(data_dir, 'olist_products_dataset.csv'),
+                           usecols=['product_id', 'product_category_name'])
+    translation = pd.read_csv(os.path.join(data_dir, 'product_category_name_translation.csv'), encoding='utf-8-sig')
+    if not products_encoded:
+        product_ids.encode(products['product_id'], extend=True)
+    product_to_category, categories = category_lookup(products, translation, product_ids.values)
+    unknown_category = categories.index('unknown')
+    item_labels = np.asarray(categories, dtype=object)
+else:
+    item_labels = None
+
+
+def chunk_codes(chunk):
+    """
+    (order codes, item codes, segment codes) for one chunk of order rows
+    """
+    products = chunk['product_id'].to_numpy() if products_encoded else product_ids.encode(chunk['product_id'], extend=True)
+    if args.level == 'category':
+        # Products missing from the catalogue fall into the unknown category
+        known = products < len(product_to_category)
+        items = np.where(known, product_to_category[np.where(known, products, 0)], unknown_category)
+    else:
+        items = products
+    if customers_encoded:
+        groups = segment_by_customer[chunk['customer_unique_id'].to_numpy()]
+    else:
+        positions = customer_index.get_indexer(chunk['customer_unique_id'])
+        groups = np.where(positions >= 0, segment_by_customer[positions], -1)
+    return chunk['order_id'].to_numpy(), items, groups
+
+
+# ============================================
+# PASS 1: ITEM SUPPORT
+# ============================================
+print(f"\n📂 Pass 1: counting orders per {args.level}...")
+start = time.perf_counter()
+item_counts = np.zeros(0, dtype=np.int64)
+n_orders = 0
+row_count = 0
+for chunk in read_chunks():
+    order_codes, items, _ = chunk_codes(chunk)
+    n_items = len(item_labels) if item_labels is not None else len(product_ids)
+    counts, orders = item_support(order_codes, items, n_items)
+    item_counts = np.pad(item_counts, (0, n_items - len(item_counts))) + counts
+    n_orders += orders
+    row_count += len(chunk)
+if item_labels is None:
+    item_labels = product_ids.values.to_numpy()
+
+min_count = max(2, math.ceil(args.min_support * n_orders))
+frequent = np.flatnonzero(item_counts >= min_count)
+print(f"   ✅ {row_count:,} records, {n_orders:,} orders, {np.count_nonzero(item_counts):,} {items_name} "
+      f"in {time.perf_counter() - start:.2f} seconds")
+print(f"   {len(frequent):,} {items_name} in at least {min_count:,} orders "
+      f"(min support {args.min_support:g}) are kept for pairing")
+
+# ============================================
+# PASS 2: PAIR COUNTS PER SEGMENT
+# ============================================
+print(f"\n🛒 Pass 2: counting {items_name} bought together...")
+start = time.perf_counter()
+accumulator = BasketAccumulator(frequent, len(item_labels), len(segments))
+for chunk in read_chunks():
+    accumulator.add(*chunk_codes(chunk))
+frequent_labels = item_labels[frequent]
+
+overall_counts = accumulator.pair_counts()
+pairs = pair_table(overall_counts, accumulator.item_orders.sum(axis=0), n_orders, frequent_labels, min_count)
+pairs = pairs.sort_values(['lift', 'orders'], ascending=False)
+print(f"   ✅ {overall_counts.nnz:,} co-purchased pairs, {len(pairs):,} in at least {min_count:,} orders "
+      f"({time.perf_counter() - start:.2f} seconds)")
+
+print(f"\n🔗 Strongest pairs by lift:")
+for row in pairs.head(10).itertuples():
+    print(f"   {str(row.item_a)[:32]:<32} + {str(row.item_b)[:32]:<32} "
+          f"{row.orders:>5,} orders   lift {row.lift:>7.1f}")
+
+# Per-segment rows for the overall frequent pairs
+frequent_pairs = pd.MultiIndex.from_arrays([pairs['item_a'], pairs['item_b']])
+segment_tables = []
+for code, segment in enumerate(segments):
+    table = pair_table(accumulator.pair_counts(code), accumulator.item_orders[code],
+                       max(accumulator.orders[code], 1), frequent_labels)
+    table = table[pd.MultiIndex.from_arrays([table['item_a'], table['item_b']]).isin(frequent_pairs)]
+    table.insert(0, 'segment', segment)
+    table.insert(3, 'segment_orders', accumulator.orders[code])
+    segment_tables.append(table.sort_values(['lift', 'orders'], ascending=False))
+segment_pairs = pd.concat(segment_tables, ignore_index=True) if segment_tables else pd.DataFrame()
+
+print(f"\n🎯 Orders and frequent {args.level} pairs by segment:")
+for code, segment in enumerate(segments):
+    table = segment_tables[code]
+    top = f"{str(table['item_a'].iat[0])[:32]} + {str(table['item_b'].iat[0])[:32]}" if len(table) else '-'
+    print(f"   {segment:<22} {accumulator.orders[code]:>8,} orders   {len(table):>5,} frequent pairs   top: {top}")
+
+# Save results
+print("\n💾 Saving market-basket results...")
+if not os.path.exists(reports_dir):
+    os.makedirs(reports_dir)
+pairs_file = os.path.join(reports_dir, f'basket_pairs_{args.level}.csv')
+pairs.round(6).to_csv(pairs_file, index=False)
+print(f"   ✅ Frequent pairs saved to: {pairs_file}")
+
+segment_file = os.path.join(reports_dir, f'basket_pairs_{args.level}_by_segment.csv')
+segment_pairs.round(6).to_csv(segment_file, index=False)
+print(f"   ✅ Per-segment pairs saved to: {segment_file}")
+
+print("\n" + "=" * 60)
+print("✅ MARKET BASKET ANALYSIS COMPLETE!")
+print("=" * 60)
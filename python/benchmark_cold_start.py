@@ -0,0 +1,97 @@
+# benchmark_cold_start.py
+# ============================================
+# BENCHMARK: CLI COLD START BUDGET
+# ============================================
+#
+# Spawns `python -m segmentation` in fresh interpreters, the way the
+# scheduler does, and checks two things:
+#   - `import segmentation` and the `score` command never import
+#     matplotlib, seaborn or scipy (via python -X importtime)
+#   - the median wall time of each command stays under its budget
+# Exits with status 1 when a check fails, so it can gate a deploy.
+# Usage: python benchmark_cold_start.py [--runs N] [--score-budget SECONDS]
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_dir = os.path.dirname(current_dir)
+data_dir = os.path.join(project_dir, 'data')
+
+HEAVY_MODULES = ('matplotlib', 'seaborn', 'scipy')
+
+parser = argparse.ArgumentParser(description='Measure segmentation CLI cold start')
+parser.add_argument('--runs', type=int, default=5, help='Fresh interpreters per command (default: 5)')
+parser.add_argument('--import-budget', type=float, default=0.25,
+                    help='Budget for `import segmentation`, seconds (default: 0.25)')
+parser.add_argument('--score-budget', type=float, default=1.0,
+                    help='Budget for `python -m segmentation score`, seconds (default: 1.0)')
+args = parser.parse_args()
+
+print("=" * 60)
+print("BENCHMARK: SEGMENTATION CLI COLD START")
+print("=" * 60)
+
+if not os.path.exists(os.path.join(data_dir, 'customer_metrics.csv')):
+    print("❌ ERROR: customer_metrics.csv not found!")
+    print("Please run 03_customer_metrics.py first")
+    exit()
+
+score_output = os.path.join(data_dir, '.cold_start_scored.csv')
+commands = {
+    'import segmentation': ([sys.executable, '-c', 'import segmentation'], args.import_budget),
+    'score': ([sys.executable, '-m', 'segmentation', 'score', '--data-dir', data_dir,
+               '--output', score_output], args.score_budget),
+}
+
+
+def imported_modules(command):
+    """
+    Top-level package names imported by `command` (python -X importtime)
+    """
+    result = subprocess.run([command[0], '-X', 'importtime'] + command[1:], cwd=current_dir,
+                            capture_output=True, text=True, check=True)
+    names = set()
+    for line in result.stderr.splitlines():
+        if line.startswith('import time:') and '|' in line:
+            names.add(line.rsplit('|', 1)[1].strip().split('.')[0])
+    return names
+
+
+def wall_times(command, runs):
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(command, cwd=current_dir, capture_output=True, check=True)
+        times.append(time.perf_counter() - start)
+    return times
+
+
+failures = []
+print(f"\n{'command':<22}{'median':>10}{'max':>10}{'budget':>10}")
+for label, (command, budget) in commands.items():
+    heavy = sorted(imported_modules(command) & set(HEAVY_MODULES))
+    if heavy:
+        failures.append(f"{label} imports {', '.join(heavy)}")
+
+    times = wall_times(command, args.runs)
+    median = statistics.median(times)
+    status = '✅' if median <= budget else '❌'
+    print(f"{label:<22}{median:>9.3f}s{max(times):>9.3f}s{budget:>9.2f}s {status}")
+    if median > budget:
+        failures.append(f"{label} took {median:.3f}s (budget {budget:.2f}s)")
+
+if os.path.exists(score_output):
+    os.remove(score_output)
+
+if failures:
+    print("\n❌ Cold start budget exceeded:")
+    for failure in failures:
+        print(f"   • {failure}")
+    sys.exit(1)
+
+print("\n✅ Cold start within budget")
@@ -0,0 +1,78 @@
+# benchmark_id_codes.py
+# ============================================
+# BENCHMARK: STRING IDS VS INTEGER ID CODES
+# ============================================
+#
+# Times the pd.merge chain from 02_data_preparation.py and the
+# customer groupbys from 03_customer_metrics.py twice: once on the raw
+# hex string ids and once on the integer codes from id_codes.py.
+# Usage: python benchmark_id_codes.py [repeats]
+
+import os
+import sys
+import time
+
+import pandas as pd
+
+from data_loader import load_tables
+from id_codes import encode_tables
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_dir = os.path.dirname(current_dir)
+data_dir = os.path.join(project_dir, 'data')
+repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+
+
+def merge_chain(tables):
+    orders = tables['orders']
+    delivered_orders = orders[orders['order_status'] == 'delivered']
+    orders_items = pd.merge(delivered_orders, tables['items'], on='order_id', how='inner')
+    complete_data = pd.merge(orders_items, tables['customers'], on='customer_id', how='inner')
+    return pd.merge(complete_data, tables['payments'], on='order_id', how='left')
+
+
+def customer_groupbys(data):
+    metrics = data.groupby('customer_unique_id').agg({
+        'order_id': 'nunique',
+        'price': 'sum',
+        'freight_value': 'sum',
+        'customer_state': 'first',
+    })
+    diversity = data.groupby('customer_unique_id')['product_id'].nunique()
+    return metrics, diversity
+
+
+def best_of(func, *args):
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+print("=" * 60)
+print("BENCHMARK: STRING IDS VS INTEGER ID CODES")
+print("=" * 60)
+
+raw_tables, _ = load_tables(data_dir)
+coded_tables = {name: df.copy() for name, df in raw_tables.items()}
+encode_start = time.perf_counter()
+encode_tables(coded_tables)
+encode_seconds = time.perf_counter() - encode_start
+
+results = {}
+for label, tables in [('string ids', raw_tables), ('integer codes', coded_tables)]:
+    merge_seconds, merged = best_of(merge_chain, tables)
+    groupby_seconds, _ = best_of(customer_groupbys, merged)
+    memory_mb = merged.memory_usage(deep=True).sum() / 1024**2
+    results[label] = (merge_seconds, groupby_seconds, memory_mb)
+
+print(f"\nOne-off encoding cost: {encode_seconds * 1000:.0f} ms")
+print(f"\n{'':<15}{'merge chain':>14}{'03 groupbys':>14}{'merged size':>14}")
+for label, (merge_seconds, groupby_seconds, memory_mb) in results.items():
+    print(f"{label:<15}{merge_seconds * 1000:>11.0f} ms{groupby_seconds * 1000:>11.0f} ms{memory_mb:>11.1f} MB")
+
+base, coded = results['string ids'], results['integer codes']
+print(f"\nSpeedup: merge {base[0] / coded[0]:.1f}x, groupbys {base[1] / coded[1]:.1f}x, "
+      f"memory {base[2] / coded[2]:.1f}x smaller")
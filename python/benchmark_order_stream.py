@@ -0,0 +1,78 @@
+# benchmark_order_stream.py
+# ============================================
+# BENCHMARK: ORDER EVENT REPLAY
+# ============================================
+#
+# Replays the delivered orders from prepared_data.csv as a JSONL event
+# stream, in purchase order, through order_stream.OrderConsumer on one
+# core, and reports sustained events per second. Fails (exit status 1)
+# below --min-rate.
+# Usage: python benchmark_order_stream.py [--batch-bytes N] [--min-rate EVENTS_PER_SECOND]
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+from order_stream import OrderConsumer
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_dir = os.path.dirname(current_dir)
+data_dir = os.path.join(project_dir, 'data')
+
+parser = argparse.ArgumentParser(description='Replay orders through the streaming consumer')
+parser.add_argument('--batch-bytes', type=int, default=1 << 20,
+                    help='Bytes read per micro-batch (default: 1 MiB, about 10k events)')
+parser.add_argument('--min-rate', type=float, default=5000, help='Required events per second (default: 5000)')
+args = parser.parse_args()
+
+print("=" * 60)
+print("BENCHMARK: ORDER EVENT REPLAY")
+print("=" * 60)
+
+data_file = os.path.join(data_dir, 'prepared_data.csv')
+if not os.path.exists(data_file):
+    print("❌ ERROR: prepared_data.csv not found!")
+    print("Please run 02_data_preparation.py first")
+    exit()
+
+# One event per order, in purchase order
+data = pd.read_csv(data_file, usecols=['order_id', 'customer_unique_id', 'order_purchase_timestamp', 'price'])
+orders = data.groupby('order_id', sort=False).agg(
+    customer_id=('customer_unique_id', 'first'),
+    timestamp=('order_purchase_timestamp', 'first'),
+    amount=('price', 'sum'),
+).reset_index().sort_values('timestamp', kind='stable')
+
+with tempfile.TemporaryDirectory() as work_dir:
+    events_file = os.path.join(work_dir, 'order_events.jsonl')
+    changes_file = os.path.join(work_dir, 'segment_changes.jsonl')
+    with open(events_file, 'w') as handle:
+        for record in orders.to_dict('records'):
+            handle.write(json.dumps({key: value.item() if hasattr(value, 'item') else value
+                                     for key, value in record.items()}) + '\n')
+
+    consumer = OrderConsumer(events_file, changes_file, os.path.join(work_dir, 'state.npz'))
+    start = time.perf_counter()
+    consumer.run(follow=False, max_bytes=args.batch_bytes)
+    elapsed = time.perf_counter() - start
+
+    # Restarting from the final checkpoint must not replay anything
+    resumed = OrderConsumer(events_file, changes_file, os.path.join(work_dir, 'state.npz'))
+    resumed.run(follow=False)
+
+rate = consumer.events / elapsed
+print(f"\n📡 Replayed {consumer.events:,} events in {consumer.batches:,} micro-batches")
+print(f"   Customers: {len(consumer.state):,}")
+print(f"   Segment changes: {consumer.changes:,}")
+print(f"   Elapsed: {elapsed:.2f}s -> {rate:,.0f} events/second")
+print(f"   Events replayed after restart: {resumed.events}")
+
+if rate < args.min_rate or resumed.events:
+    print(f"\n❌ Below {args.min_rate:,.0f} events/second or restart replayed events")
+    sys.exit(1)
+print(f"\n✅ Keeps up with {args.min_rate:,.0f} events/second")
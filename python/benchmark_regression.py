@@ -0,0 +1,115 @@
+# benchmark_regression.py
+# ============================================
+# BENCHMARK: PIPELINE REGRESSION GATE
+# ============================================
+#
+# Runs stages 02-06 on the fixture dataset in regression/fixture and
+# checks that:
+#   - customer_metrics, segmented_customers (RFM scores and segments),
+#     segment_analysis and segment_summary match regression/golden
+#   - no stage's wall time or peak RSS exceeds regression/budgets.json
+# Every run's per-stage timings are appended to regression/history.csv
+# (local to this machine, not committed).
+# Exits with status 1 when a check fails, so it can gate a merge.
+# Usage: python benchmark_regression.py [--runs N] [--plot]
+#        python benchmark_regression.py --update-golden   (after an intended output change)
+#        python benchmark_regression.py --update-budgets  (after an intended cost change)
+
+import argparse
+import os
+import sys
+import tempfile
+
+import pandas as pd
+
+from regression_gate import (FIXTURE_DIR, GOLDEN_DIR, BUDGETS_FILE, HISTORY_FILE, REGRESSION_DIR,
+                             make_fixture, run_fixture, check_outputs, update_golden,
+                             load_budgets, save_budgets, check_budgets, append_history, plot_history)
+
+parser = argparse.ArgumentParser(description='Check pipeline outputs and stage budgets on the fixture dataset')
+parser.add_argument('--runs', type=int, default=3,
+                    help='Fixture runs; each stage is judged on its median time and peak memory (default: 3)')
+parser.add_argument('--tolerance', type=float, default=1e-6,
+                    help='Relative and absolute tolerance for numeric golden columns (default: 1e-6)')
+parser.add_argument('--update-golden', action='store_true', help='Replace the golden outputs with this run')
+parser.add_argument('--update-budgets', action='store_true', help='Set the budgets from this run')
+parser.add_argument('--headroom', type=float, default=2.0,
+                    help='Budget = measured cost x headroom (at least +1s), with --update-budgets (default: 2)')
+parser.add_argument('--regenerate-fixture', action='store_true', help='Rebuild the fixture CSVs first')
+parser.add_argument('--no-history', action='store_true', help="Don't append this run to the history")
+parser.add_argument('--plot', action='store_true', help='Plot the history to regression/history.png')
+args = parser.parse_args()
+
+print("=" * 60)
+print("BENCHMARK: PIPELINE REGRESSION GATE")
+print("=" * 60)
+
+if args.regenerate_fixture or not os.path.exists(FIXTURE_DIR):
+    orders = make_fixture(FIXTURE_DIR)
+    print(f"\n🧪 Fixture written to {FIXTURE_DIR} ({orders:,} orders)")
+
+# ============================================
+# RUN THE STAGES
+# ============================================
+runs = []
+with tempfile.TemporaryDirectory() as work_dir:
+    for run in range(args.runs):
+        project_dir = os.path.join(work_dir, f'run{run}')
+        runs.append(pd.DataFrame(run_fixture(project_dir)))
+
+    timings = pd.concat(runs).groupby('stage', sort=False).agg(
+        status=('status', lambda s: 'ok' if (s == 'ok').all() else 'failed'),
+        seconds=('seconds', 'median'), peak_rss_mb=('peak_rss_mb', 'median')).reset_index()
+    # Outputs of a run that stopped early are incomplete; judge those of the last full run
+    complete = [run for run, records in enumerate(runs) if (records['status'] == 'ok').all()]
+    output_dir = os.path.join(work_dir, f'run{complete[-1] if complete else args.runs - 1}')
+
+    print(f"\n⏱️ Stage timings (median of {args.runs} runs):")
+    budgets = load_budgets()
+    print(f"   {'stage':<8}{'seconds':>10}{'budget':>10}{'peak MB':>10}{'budget':>10}")
+    for row in timings.itertuples():
+        budget = budgets.get(row.stage, {})
+        print(f"   {row.stage:<8}{row.seconds:>10.2f}{budget.get('seconds', float('nan')):>10.2f}"
+              f"{row.peak_rss_mb:>10.0f}{budget.get('peak_rss_mb', float('nan')):>10.0f}  {row.status}")
+
+    failures = [f"stage {row.stage} failed" for row in timings.itertuples() if row.status != 'ok']
+
+    # ============================================
+    # GOLDEN OUTPUTS
+    # ============================================
+    if args.update_golden:
+        update_golden(output_dir)
+        print(f"\n📌 Golden outputs updated in {GOLDEN_DIR}")
+    else:
+        print(f"\n🔍 Comparing outputs to {GOLDEN_DIR}:")
+        for name, problems in check_outputs(output_dir, rtol=args.tolerance, atol=args.tolerance).items():
+            print(f"   {'✅' if not problems else '❌'} {name}")
+            for problem in problems:
+                print(f"      • {problem}")
+                failures.append(f"{name}: {problem}")
+
+# ============================================
+# BUDGETS AND HISTORY
+# ============================================
+if args.update_budgets:
+    budgets = save_budgets(timings, args.headroom)
+    print(f"\n📌 Budgets set to {args.headroom:g}x this run in {BUDGETS_FILE}")
+elif not budgets:
+    print(f"\n⚠️ No budgets in {BUDGETS_FILE}; run with --update-budgets to set them")
+else:
+    failures += check_budgets(timings, budgets)
+
+if not args.no_history:
+    append_history(timings)
+    print(f"\n🗂️ Appended to {HISTORY_FILE}")
+if args.plot and os.path.exists(HISTORY_FILE):
+    plot_file = os.path.join(REGRESSION_DIR, 'history.png')
+    plot_history(HISTORY_FILE, plot_file)
+    print(f"   ✅ Trend chart saved to: {plot_file}")
+
+if failures:
+    print("\n❌ Regression gate failed:")
+    for failure in failures:
+        print(f"   • {failure}")
+    sys.exit(1)
+print("\n✅ Outputs match the golden files and every stage is within budget")
@@ -0,0 +1,138 @@
+# bootstrap_ci.py
+# ============================================
+# BOOTSTRAP CONFIDENCE INTERVALS FOR SEGMENT KPIS
+# ============================================
+#
+# Used by 12_segment_confidence.py. Stratified bootstrap: every
+# replicate resamples each segment's customers with replacement, so
+# segment sizes stay fixed and small segments get honest intervals.
+# A replicate is a multinomial(n, 1/n) weight vector, the bincount of n
+# uniform indices, and a block of replicates is one weights @ values
+# matmul, which yields every KPI sum at once. A whole block of weights
+# is drawn in one call (one flat bincount, each replicate offset by n)
+# and blocks are sized from the memory budget. When a single replicate
+# of a large segment does not fit, the segment is walked in chunks of
+# customers with independent Poisson(1) weights instead, and each
+# replicate is rescaled to the segment size (n / total weight), the
+# usual streaming approximation of the multinomial. The customer
+# matrix is shared with the worker processes through a memory-mapped
+# .npy file rather than copied to each of them. revenue_pct depends on
+# all segments, so it is formed per replicate after the per-segment
+# sums come back.
+
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+# segment_analysis KPI -> customer column it averages
+KPI_COLUMNS = {
+    'avg_spent': 'monetary',
+    'avg_orders': 'frequency',
+    'avg_recency': 'recency_days',
+    'avg_order_value': 'avg_order_value',
+}
+
+
+def _replicate_sums(task):
+    """
+    Bootstrap column sums of one segment slice: (replicates, columns)
+    """
+    values_file, start, stop, replicates, seed, memory_bytes = task
+    values = np.load(values_file, mmap_mode='r')[start:stop]
+    n = stop - start
+    rng = np.random.default_rng(seed)
+
+    # Every weight cell costs 16 bytes: the draw and its float64 copy for the matmul
+    cells = max(1, memory_bytes // 16)
+    sums = np.zeros((replicates, values.shape[1]))
+    if n <= cells:
+        block = min(replicates, cells // n)
+        for first in range(0, replicates, block):
+            size = min(block, replicates - first)
+            draws = rng.integers(0, n, (size, n)) + (np.arange(size) * n)[:, np.newaxis]
+            counts = np.bincount(draws.ravel(), minlength=size * n)
+            del draws
+            sums[first:first + size] = counts.reshape(size, n).astype(float) @ values
+        return sums
+
+    # Poisson(1) weights per chunk of customers, rescaled to n per replicate
+    block = min(replicates, 64)
+    chunk = max(1, cells // block)
+    for first in range(0, replicates, block):
+        size = min(block, replicates - first)
+        totals = np.zeros(size)
+        for lo in range(0, n, chunk):
+            weights = rng.poisson(1.0, (size, min(chunk, n - lo))).astype(float)
+            totals += weights.sum(axis=1)
+            sums[first:first + size] += weights @ values[lo:lo + chunk]
+        sums[first:first + size] *= (n / np.maximum(totals, 1))[:, np.newaxis]
+    return sums
+
+
+def bootstrap_segment_kpis(customers, resamples=1000, confidence=0.95, workers=None,
+                           memory_bytes=512 * 1024**2, seed=0, by='segment', replicates_per_task=250):
+    """
+    Point estimates and percentile intervals for every KPI per segment.
+
+    Returns a DataFrame indexed by segment with <kpi>, <kpi>_low and
+    <kpi>_high for each KPI_COLUMNS entry plus total_revenue and
+    revenue_pct. `memory_bytes` bounds the resampling weights held by all
+    workers together; results depend on `seed` but not on `workers`.
+    """
+    kpis = {kpi: col for kpi, col in KPI_COLUMNS.items() if col in customers.columns}
+    columns = list(dict.fromkeys(['monetary'] + list(kpis.values())))
+
+    seg_codes, segments = pd.factorize(customers[by], sort=True)
+    order = np.argsort(seg_codes, kind='stable')
+    values = customers[columns].to_numpy(dtype=float)[order]
+    bounds = np.searchsorted(seg_codes[order], np.arange(len(segments) + 1))
+    sizes = np.diff(bounds)
+
+    workers = workers or os.cpu_count() or 1
+    worker_budget = memory_bytes // workers
+
+    # Split every segment's replicates into tasks with their own seeds
+    seeds = iter(np.random.SeedSequence(seed).spawn(len(segments) * (resamples // replicates_per_task + 1)))
+    tasks, owners = [], []
+    with tempfile.TemporaryDirectory() as work_dir:
+        values_file = os.path.join(work_dir, 'values.npy')
+        np.save(values_file, values)
+        for s in range(len(segments)):
+            for first in range(0, resamples, replicates_per_task):
+                count = min(replicates_per_task, resamples - first)
+                tasks.append((values_file, bounds[s], bounds[s + 1], count, next(seeds), worker_budget))
+                owners.append(s)
+
+        if workers == 1:
+            results = list(map(_replicate_sums, tasks))
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                results = list(pool.map(_replicate_sums, tasks))
+
+    # (segments, resamples, columns) replicate sums
+    sums = np.empty((len(segments), resamples, len(columns)))
+    filled = np.zeros(len(segments), dtype=int)
+    for s, result in zip(owners, results):
+        sums[s, filled[s]:filled[s] + len(result)] = result
+        filled[s] += len(result)
+
+    alpha = (1 - confidence) / 2
+    point_sums = np.add.reduceat(values, bounds[:-1], axis=0) if len(values) else np.zeros((0, len(columns)))
+    result = pd.DataFrame({'customers': sizes}, index=pd.Index(segments, name=by))
+
+    def add(name, estimate, replicates):
+        result[name] = estimate
+        result[f'{name}_low'], result[f'{name}_high'] = np.quantile(replicates, [alpha, 1 - alpha], axis=1)
+
+    for kpi, col in kpis.items():
+        c = columns.index(col)
+        add(kpi, point_sums[:, c] / sizes, sums[:, :, c] / sizes[:, None])
+
+    revenue = columns.index('monetary')
+    add('total_revenue', point_sums[:, revenue], sums[:, :, revenue])
+    add('revenue_pct', point_sums[:, revenue] / point_sums[:, revenue].sum() * 100,
+        sums[:, :, revenue] / sums[:, :, revenue].sum(axis=0, keepdims=True) * 100)
+    return result
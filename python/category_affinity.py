@@ -0,0 +1,87 @@
+# category_affinity.py
+# ============================================
+# SPARSE CUSTOMER x CATEGORY SPEND
+# ============================================
+#
+# Used by 09_category_affinity.py. Order items are mapped to their
+# English category through integer lookup arrays (product code ->
+# category code), then summed into a CSR matrix with one row per
+# customer code and one column per category. Segment mixes and
+# per-customer top categories are sparse reductions of that matrix;
+# nothing is pivoted to a dense customers x categories table.
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+UNKNOWN_CATEGORY = 'unknown'
+
+
+def category_lookup(products, translation, product_ids):
+    """
+    Integer lookup arrays for the items join.
+
+    `product_ids` is the product id dictionary (pd.Index, code = position).
+    Returns (product_to_category, categories): product_to_category[code]
+    is the category code of that product; products without a category
+    map to UNKNOWN_CATEGORY.
+    """
+    english = dict(zip(translation['product_category_name'], translation['product_category_name_english']))
+    names = products['product_category_name'].map(english).fillna(products['product_category_name'])
+    names = names.fillna(UNKNOWN_CATEGORY)
+
+    category_codes, categories = pd.factorize(names, sort=True)
+    categories = list(categories)
+    if UNKNOWN_CATEGORY not in categories:
+        categories.append(UNKNOWN_CATEGORY)
+    unknown = categories.index(UNKNOWN_CATEGORY)
+
+    product_to_category = np.full(len(product_ids), unknown, dtype=np.int32)
+    positions = product_ids.get_indexer(products['product_id'])
+    known = positions >= 0
+    product_to_category[positions[known]] = category_codes[known]
+    return product_to_category, categories
+
+
+def spend_matrix(customer_codes, category_codes, amounts, n_customers, n_categories):
+    """
+    CSR customer x category spend; duplicate cells are summed
+    """
+    matrix = sparse.coo_matrix(
+        (np.asarray(amounts, dtype=float), (np.asarray(customer_codes), np.asarray(category_codes))),
+        shape=(n_customers, n_categories)
+    ).tocsr()
+    matrix.sum_duplicates()
+    return matrix
+
+
+def segment_category_mix(matrix, segment_codes, n_segments):
+    """
+    Segments x categories spend: a sparse indicator product, no dense pivot.
+    Customers with segment code -1 are ignored.
+    """
+    valid = np.flatnonzero(segment_codes >= 0)
+    indicator = sparse.csr_matrix(
+        (np.ones(len(valid)), (segment_codes[valid], valid)),
+        shape=(n_segments, matrix.shape[0])
+    )
+    return (indicator @ matrix).tocsr()
+
+
+def top_categories(matrix, k=3):
+    """
+    Top-k categories per customer by spend, from the CSR rows.
+    Returns (codes, spend) arrays of shape (n_customers, k); -1 / 0 when absent.
+    """
+    counts = np.diff(matrix.indptr)
+    rows = np.repeat(np.arange(matrix.shape[0]), counts)
+    # Sort every row's entries by descending spend in one lexsort
+    order = np.lexsort((-matrix.data, rows))
+    rank = np.arange(len(order)) - matrix.indptr[rows[order]]
+    keep = rank < k
+
+    codes = np.full((matrix.shape[0], k), -1, dtype=np.int32)
+    spend = np.zeros((matrix.shape[0], k))
+    codes[rows[order][keep], rank[keep]] = matrix.indices[order][keep]
+    spend[rows[order][keep], rank[keep]] = matrix.data[order][keep]
+    return codes, spend
@@ -0,0 +1,115 @@
+# chart_cache.py
+# ============================================
+# CONTENT-ADDRESSED CHART CACHE
+# ============================================
+#
+# Used by 05_visualizations.py. A chart's key is a blake2b digest of the
+# aggregated data it plots plus the style parameters (dpi, style,
+# preview mode and the chart script itself, so editing the plotting
+# code invalidates its charts). When a key is already in the cache the
+# stored PNG is copied into place and matplotlib is never touched.
+# Entries are plain files named by key under figures/.cache; the
+# least recently used ones are evicted once the cache grows past its
+# size limit.
+
+import hashlib
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+
+def _feed(digest, value):
+    """
+    Feed a chart input into the digest: pandas objects by content,
+    arrays by bytes, containers recursively, everything else by repr
+    """
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        labels = list(value.columns) if isinstance(value, pd.DataFrame) else [value.name]
+        digest.update(repr((type(value).__name__, value.shape, labels,
+                            list(map(str, np.atleast_1d(value.dtypes))))).encode())
+        digest.update(pd.util.hash_pandas_object(value, index=True).to_numpy().tobytes())
+    elif isinstance(value, np.ndarray):
+        digest.update(repr((value.shape, str(value.dtype))).encode())
+        digest.update(np.ascontiguousarray(value).tobytes())
+    elif isinstance(value, dict):
+        for key in sorted(value, key=repr):
+            digest.update(repr(key).encode())
+            _feed(digest, value[key])
+    elif isinstance(value, (list, tuple)):
+        digest.update(f'{type(value).__name__}[{len(value)}]'.encode())
+        for item in value:
+            _feed(digest, item)
+    else:
+        digest.update(repr(value).encode())
+
+
+def content_key(*parts):
+    digest = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        _feed(digest, part)
+    return digest.hexdigest()
+
+
+class ChartCache:
+    """
+    PNG files keyed by the content they were rendered from
+    """
+
+    def __init__(self, cache_dir, style=None, max_bytes=200 * 1024**2):
+        self.cache_dir = cache_dir
+        self.style = style or {}
+        self.max_bytes = max_bytes
+        self.reused = []
+        self.rendered = []
+        self._pending = {}
+        os.makedirs(cache_dir, exist_ok=True)
+        # Apply a lowered size limit even when every chart is a hit
+        self.evict()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f'{key}.png')
+
+    def reuse(self, target, *inputs):
+        """
+        Copy the cached chart for `inputs` to `target`; False on a miss,
+        in which case the caller renders and calls store(target)
+        """
+        key = content_key(os.path.basename(target), self.style, *inputs)
+        cached = self._path(key)
+        if os.path.exists(cached):
+            shutil.copyfile(cached, target)
+            # Mark as recently used for eviction
+            os.utime(cached)
+            self.reused.append(target)
+            return True
+        self._pending[target] = key
+        return False
+
+    def store(self, target):
+        """
+        Add a freshly rendered `target` to the cache, then evict
+        """
+        key = self._pending.pop(target)
+        temp = self._path(key) + '.tmp'
+        shutil.copyfile(target, temp)
+        os.replace(temp, self._path(key))
+        self.rendered.append(target)
+        self.evict()
+
+    def evict(self):
+        """
+        Drop least recently used entries until the cache fits max_bytes
+        """
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if name.endswith('.png'):
+                stat = os.stat(os.path.join(self.cache_dir, name))
+                entries.append((stat.st_mtime, stat.st_size, name))
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            os.remove(os.path.join(self.cache_dir, name))
+            total -= size
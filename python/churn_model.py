@@ -0,0 +1,208 @@
+# churn_model.py
+# ============================================
+# CHURN PROBABILITY AND NEXT-PURCHASE SCORING
+# ============================================
+#
+# Used by 15_churn_scoring.py. Whether a customer comes back at all and
+# when they come back are estimated separately:
+#   - return probability: one Kaplan-Meier curve per repeat-status bucket
+#     (the gap after a customer's 1st, 2nd, 3rd-4th or 5th+ order), on
+#     days. Gap j is completed (an event) for customers with more than j
+#     orders and still open (censored at recency_days) for customers with
+#     exactly j. The level each curve settles at is the share of that
+#     bucket that never returns, so a one-time buyer and a customer with
+#     40 orders get very different odds of coming back.
+#   - timing: one Kaplan-Meier curve on a per-customer time scale
+#     (accelerated failure time), rescaled to the customers who return.
+#     Each customer's scale is their expected gap between orders:
+#       - repeat buyers: their own mean gap, lifetime / (frequency - 1),
+#         shrunk towards their segment's mean gap
+#       - one-time buyers, who have no gaps: their segment's mean gap,
+#         pooled over the segment's repeat buyers (or over everyone when
+#         the segment has too few gaps, e.g. New Customers)
+#     One pooled curve rather than one per segment: segments are cut on
+#     recency, so a per-segment curve would only see that segment's slice
+#     of open gaps and overstate returns past it.
+#
+# With p the bucket's return probability and F the returners' timing
+# curve, a customer has made no purchase t days out with probability
+#   S(t) = (1 - p) + p * F(t / scale)
+#
+#   churn probability   P(no purchase in the next `horizon` days | none for recency_days)
+#                       = S(recency + horizon) / S(recency)
+#   next purchase       median time of the next order for customers who do come back:
+#                       the t with F(t / scale) at half of F(recency / scale), missing
+#                       when no returns were seen that late
+#
+# Every step is a sort, cumulative sum, bincount or searchsorted over all
+# customers at once.
+
+import numpy as np
+import pandas as pd
+
+SCORE_COLUMNS = ['churn_probability', 'churn_probability_in_window', 'days_to_next_purchase',
+                 'expected_gap_days', 'return_probability']
+
+# Lowest order count of each repeat-status bucket (1, 2, 3-4, 5+ orders)
+FREQUENCY_BUCKETS = [1, 2, 3, 5]
+
+
+def survival_curve(durations, weights, events):
+    """
+    Weighted Kaplan-Meier curve: (distinct times, S(t) just after each)
+    """
+    times, inverse = np.unique(durations, return_inverse=True)
+    deaths = np.bincount(inverse, weights=weights * events, minlength=len(times))
+    exits = np.bincount(inverse, weights=weights, minlength=len(times))
+    # Weight still at risk at each time: everything leaving at this time or later
+    at_risk = np.cumsum(exits[::-1])[::-1]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        factor = np.where(at_risk > 0, 1 - deaths / at_risk, 1.0)
+    return times, np.cumprod(factor)
+
+
+def survival_at(curve, t):
+    """
+    S(t) for every t (1 before the first step)
+    """
+    times, survival = curve
+    position = np.searchsorted(times, t, side='right') - 1
+    return np.where(position >= 0, survival[np.maximum(position, 0)], 1.0)
+
+
+def survival_quantile(curve, level):
+    """
+    First time the curve drops to `level` or below, per level (NaN when it never does)
+    """
+    times, survival = curve
+    # Survival only decreases, so its negation is sorted
+    position = np.searchsorted(-survival, -np.asarray(level), side='left')
+    return np.where(position < len(times), times[np.minimum(position, len(times) - 1)], np.nan)
+
+
+def expected_gaps(customers, by='segment', shrinkage=2.0, min_gaps=30):
+    """
+    Expected days between orders for every customer: repeat buyers' own
+    mean gap shrunk towards their segment's (`shrinkage` pseudo-gaps),
+    the segment mean for one-time buyers. Segments with fewer than
+    `min_gaps` completed gaps use the mean over all customers.
+    Returns (expected gap, completed gaps, mean completed gap).
+    """
+    segments, _ = pd.factorize(customers[by], use_na_sentinel=False)
+    frequency = customers['frequency'].to_numpy(dtype=float)
+    lifetime = customers['lifetime_days'].to_numpy(dtype=float)
+
+    gaps = np.maximum(frequency - 1, 0)
+    repeat = gaps > 0
+    mean_gap = np.where(repeat, lifetime / np.where(repeat, gaps, 1), 0)
+
+    # Segment mean gap (total gap days over number of gaps)
+    gap_count = np.bincount(segments, weights=gaps)
+    gap_days = np.bincount(segments, weights=np.where(repeat, lifetime, 0))
+    overall = gap_days.sum() / gap_count.sum() if gap_count.sum() else 1.0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        segment_gap = np.where(gap_count >= min_gaps, gap_days / gap_count, overall)
+    segment_gap = np.maximum(segment_gap, 1.0)[segments]
+
+    expected = (gaps * mean_gap + shrinkage * segment_gap) / (gaps + shrinkage)
+    return np.maximum(expected, 1.0), gaps, mean_gap
+
+
+def return_probabilities(customers, min_gaps=30):
+    """
+    Probability of ever placing another order, per repeat-status bucket
+    (FREQUENCY_BUCKETS). Buckets where fewer than `min_gaps` customers
+    completed a gap share the estimate pooled over all repeat buyers.
+    Returns (probability per customer, probability per bucket).
+    """
+    frequency = customers['frequency'].to_numpy(dtype=float)
+    recency = customers['recency_days'].to_numpy(dtype=float)
+    lifetime = customers['lifetime_days'].to_numpy(dtype=float)
+    gaps = np.maximum(frequency - 1, 0)
+    mean_gap = np.where(gaps > 0, lifetime / np.where(gaps > 0, gaps, 1), 0)
+    bucket = np.searchsorted(FREQUENCY_BUCKETS, frequency, side='right') - 1
+
+    def settled_return(low, high):
+        # Gaps after order j, low <= j < high: completed by customers with more orders, open for the rest
+        completed = np.clip(np.minimum(frequency - 1, high - 1) - low + 1, 0, None)
+        waiting = (frequency >= low) & (frequency < high)
+        done = completed > 0
+        if done.sum() < min_gaps:
+            return None
+        curve = survival_curve(
+            np.concatenate([mean_gap[done], recency[waiting]]),
+            np.concatenate([completed[done], np.ones(waiting.sum())]),
+            np.concatenate([np.ones(done.sum()), np.zeros(waiting.sum())]))
+        return 1 - curve[1][-1]
+
+    pooled = settled_return(FREQUENCY_BUCKETS[1], np.inf)
+    probabilities = []
+    for low, high in zip(FREQUENCY_BUCKETS, FREQUENCY_BUCKETS[1:] + [np.inf]):
+        p = settled_return(low, high)
+        if p is None:
+            p = pooled if pooled is not None and low > 1 else 0.0
+        probabilities.append(p)
+    probabilities = np.array(probabilities)
+    return probabilities[bucket], probabilities
+
+
+def score_churn(customers, horizon=180, window=30, by='segment', shrinkage=2.0, min_gaps=30):
+    """
+    Churn probability and expected next purchase for every customer.
+
+    Returns a DataFrame aligned with `customers` holding SCORE_COLUMNS:
+    churn_probability (no purchase within `horizon` days from now),
+    churn_probability_in_window (the same, `window` days from now if
+    nothing is bought meanwhile), days_to_next_purchase (median wait for
+    the next order should the customer return, NaN when no returns were
+    observed that late), expected_gap_days (the customer's time scale)
+    and return_probability (of ever ordering again, by repeat status).
+    """
+    scale, gaps, mean_gap = expected_gaps(customers, by, shrinkage, min_gaps)
+    recency = customers['recency_days'].to_numpy(dtype=float)
+    repeat = gaps > 0
+    returns, _ = return_probabilities(customers, min_gaps)
+
+    # Completed gaps (events, weighted by their count) and open gaps (censored)
+    curve = survival_curve(
+        np.concatenate([mean_gap[repeat] / scale[repeat], recency / scale]),
+        np.concatenate([gaps[repeat], np.ones(len(recency))]),
+        np.concatenate([np.ones(repeat.sum()), np.zeros(len(recency))]))
+    floor = curve[1][-1] if len(curve[1]) else 1.0
+
+    def waiting(elapsed):
+        # F: the timing curve rescaled to the customers who return, from 1 down to 0
+        if floor >= 1:
+            return np.zeros(len(elapsed))
+        return np.clip((survival_at(curve, elapsed / scale) - floor) / (1 - floor), 0, 1)
+
+    def conditional_churn(elapsed):
+        now = (1 - returns) + returns * waiting(elapsed)
+        later = (1 - returns) + returns * waiting(elapsed + horizon)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(now > 0, later / now, 1.0)
+
+    churn = conditional_churn(recency)
+    churn_in_window = conditional_churn(recency + window)
+    # Halfway down the part of the timing curve still ahead
+    still_waiting = waiting(recency)
+    returning = still_waiting > 1e-12
+    level = floor + (1 - floor) * still_waiting / 2
+    next_purchase = np.where(returning, survival_quantile(curve, level) * scale, np.nan)
+
+    return pd.DataFrame({
+        'churn_probability': churn,
+        'churn_probability_in_window': churn_in_window,
+        'days_to_next_purchase': np.maximum(next_purchase - recency, 0),
+        'expected_gap_days': scale,
+        'return_probability': returns,
+    }, index=customers.index)
+
+
+def churn_watchlist(scored, threshold=0.8):
+    """
+    Scored customers under the churn threshold today who cross it within
+    the scoring window if they don't buy, highest spend first
+    """
+    crossing = (scored['churn_probability'] < threshold) & (scored['churn_probability_in_window'] >= threshold)
+    return scored[crossing].sort_values('monetary', ascending=False)
@@ -0,0 +1,141 @@
+# cohorts.py
+# ============================================
+# COHORT RETENTION KERNEL
+# ============================================
+#
+# Months are integer codes (year * 12 + month - 1), so a customer's
+# cohort is the minimum code over their orders and the cell of every
+# order row is (cohort, month - cohort). Cells are accumulated with
+# bincount over a flat cohort x offset index; the row-level frame is
+# never pivoted. All functions work chunk by chunk so prepared_data.csv
+# can be streamed with bounded memory.
+
+import numpy as np
+import pandas as pd
+
+
+def month_codes(years, months):
+    """
+    Integer month code from purchase_year / purchase_month columns
+    """
+    return np.asarray(years, dtype=np.int32) * 12 + np.asarray(months, dtype=np.int32) - 1
+
+
+def code_to_label(code):
+    """
+    Month code back to a 'YYYY-MM' label
+    """
+    return f"{code // 12}-{code % 12 + 1:02d}"
+
+
+def update_first_months(first_months, customer_ids, codes):
+    """
+    Fold one chunk into the running first-purchase month per customer
+    """
+    chunk_first = pd.Series(codes).groupby(np.asarray(customer_ids)).min()
+    if first_months is None:
+        return chunk_first
+    combined = pd.concat([first_months, chunk_first])
+    return combined.groupby(level=0).min()
+
+
+class CohortAccumulator:
+    """
+    Sparse cohort x months-since-first-purchase accumulation.
+
+    Built from the first-purchase month of every customer, then fed the
+    order rows chunk by chunk. Revenue is summed per cell; retention
+    counts distinct customers per cell from deduplicated
+    (customer, month offset) keys.
+    """
+
+    # Pending per-chunk keys are merged once they exceed this many entries
+    COMPACT_EVERY = 5_000_000
+
+    def __init__(self, first_months):
+        self.customers = first_months.index
+        self.first_codes = first_months.to_numpy(dtype=np.int32)
+        self.min_code = int(self.first_codes.min())
+        self.max_code = int(self.first_codes.max())
+        # Offsets are bounded by the cohort span; grown if later orders exceed it
+        self.n_cohorts = self.max_code - self.min_code + 1
+        self.n_offsets = self.n_cohorts
+        self.revenue = np.zeros(self.n_cohorts * self.n_offsets)
+        self.active_keys = np.empty(0, dtype=np.int64)
+        self.pending = []
+        self.pending_size = 0
+
+    def _grow(self, n_offsets):
+        revenue = np.zeros((self.n_cohorts, n_offsets))
+        revenue[:, :self.n_offsets] = self.revenue.reshape(self.n_cohorts, self.n_offsets)
+        self._compact()
+        cust, offset = np.divmod(self.active_keys, self.n_offsets)
+        self.active_keys = cust * n_offsets + offset
+        self.revenue = revenue.ravel()
+        self.n_offsets = n_offsets
+
+    def _compact(self):
+        if self.pending:
+            self.active_keys = np.unique(np.concatenate([self.active_keys] + self.pending))
+            self.pending = []
+            self.pending_size = 0
+
+    def add(self, customer_ids, codes, amounts):
+        codes = np.asarray(codes, dtype=np.int32)
+        cust = self.customers.get_indexer(customer_ids)
+        if (cust < 0).any():
+            raise ValueError("Order rows reference customers missing from the first-purchase pass")
+
+        self.max_code = max(self.max_code, int(codes.max()))
+        offset = codes - self.first_codes[cust]
+        if offset.max() >= self.n_offsets:
+            self._grow(int(offset.max()) + 1)
+
+        cohort = self.first_codes[cust] - self.min_code
+        cell = cohort * self.n_offsets + offset
+        self.revenue += np.bincount(cell, weights=np.asarray(amounts, dtype=float),
+                                    minlength=len(self.revenue))
+
+        # One key per (customer, offset), deduplicated within the chunk
+        keys = np.unique(cust.astype(np.int64) * self.n_offsets + offset)
+        self.pending.append(keys)
+        self.pending_size += len(keys)
+        if self.pending_size >= self.COMPACT_EVERY:
+            self._compact()
+
+    def result(self):
+        """
+        Returns (cohort_sizes, active, revenue) indexed by cohort label.
+        Cells past the end of the observed data are NaN.
+        """
+        self._compact()
+        cust, offset = np.divmod(self.active_keys, self.n_offsets)
+        cohort = self.first_codes[cust] - self.min_code
+        active = np.bincount(cohort * self.n_offsets + offset,
+                             minlength=self.n_cohorts * self.n_offsets).astype(float)
+
+        shape = (self.n_cohorts, self.n_offsets)
+        active = active.reshape(shape)
+        revenue = self.revenue.reshape(shape).copy()
+
+        # Cohort i can only be observed for (max_code - min_code - i) months
+        observable = np.arange(self.n_offsets)[None, :] <= (self.max_code - self.min_code - np.arange(self.n_cohorts))[:, None]
+        active[~observable] = np.nan
+        revenue[~observable] = np.nan
+
+        labels = pd.Index([code_to_label(self.min_code + i) for i in range(self.n_cohorts)], name='cohort')
+        columns = pd.RangeIndex(self.n_offsets, name='months_since_first_purchase')
+        active = pd.DataFrame(active, index=labels, columns=columns)
+        revenue = pd.DataFrame(revenue, index=labels, columns=columns)
+        sizes = active[0].rename('cohort_size')
+
+        # Drop calendar months in which no cohort started
+        keep = sizes > 0
+        return sizes[keep].astype(int), active[keep], revenue[keep]
+
+
+def retention_matrix(sizes, active):
+    """
+    Share of each cohort still purchasing N months after their first order (%)
+    """
+    return active.div(sizes, axis=0) * 100
@@ -0,0 +1,236 @@
+# daily_rollup.py
+# ============================================
+# DAILY REVENUE / ORDERS / NEW CUSTOMERS ROLLUP
+# ============================================
+#
+# Used by 16_daily_rollup.py. Purchase days are integer day numbers
+# (days since 1970-01-01), so every order row falls in a cell of a
+# segment x state x day cube, and the cube is filled with one bincount
+# per metric over the flat cell index; no groupby on datetimes. The
+# cube is small (segments x states x days) and is stored as a
+# compressed .npz next to the ids of the customers already seen and of
+# the orders already counted on the last day, which is all append()
+# needs to roll up new days of orders (and the rest of a partly loaded
+# last day) without re-reading the history.
+#
+# Revenue sums `price` over the prepared rows, the same definition as
+# monetary in 03_customer_metrics.py, so totals match the segment
+# reports. An order counts once, on its purchase day; a customer is new
+# on the day of their first order. Weekly (Monday start) and monthly
+# series are reduceat() sums over the day axis.
+
+import os
+
+import numpy as np
+import pandas as pd
+
+METRICS = ['revenue', 'orders', 'new_customers']
+
+# Segment of customers who first bought in appended data (not yet scored by step 4)
+UNSCORED = 'Unscored'
+
+ROLLUP_COLUMNS = ['customer_unique_id', 'order_id', 'order_purchase_timestamp', 'customer_state', 'price']
+
+
+def day_numbers(timestamps):
+    """
+    Days since 1970-01-01 for a datetime-like column
+    """
+    return pd.to_datetime(timestamps).to_numpy().astype('datetime64[D]').astype(np.int64)
+
+
+def _codes(values, labels):
+    """
+    Positions of `values` in `labels`, with unknown values appended to `labels`
+    """
+    index = pd.Index(labels)
+    codes = index.get_indexer(values)
+    unknown = codes < 0
+    if unknown.any():
+        extra = pd.unique(np.asarray(values)[unknown])
+        labels = list(labels) + list(extra)
+        codes[unknown] = len(index) + pd.Index(extra).get_indexer(np.asarray(values)[unknown])
+    return codes, list(labels)
+
+
+class DailyRollup:
+    """
+    Revenue, orders and new customers per segment x state x day.
+
+    Arrays are shaped (segments, states, days) with day 0 at
+    `start_day`; `customers` holds the ids of every customer seen so far
+    and `end_orders` the ids of the orders counted on end_day.
+    """
+
+    def __init__(self, start_day, segments=(), states=(), days=0):
+        self.start_day = int(start_day)
+        self.segments = list(segments)
+        self.states = list(states)
+        shape = (len(self.segments), len(self.states), days)
+        self.revenue = np.zeros(shape)
+        self.orders = np.zeros(shape, dtype=np.int32)
+        self.new_customers = np.zeros(shape, dtype=np.int32)
+        self.customers = pd.Index([], dtype=object)
+        self.end_orders = pd.Index([], dtype=object)
+
+    @property
+    def days(self):
+        return self.revenue.shape[2]
+
+    @property
+    def end_day(self):
+        """
+        Last day covered (start_day - 1 when empty)
+        """
+        return self.start_day + self.days - 1
+
+    def dates(self):
+        return pd.to_datetime(np.arange(self.start_day, self.start_day + self.days).astype('datetime64[D]'))
+
+    def _grow(self, days):
+        shape = (len(self.segments), len(self.states), days)
+        for name in METRICS:
+            old = getattr(self, name)
+            grown = np.zeros(shape, dtype=old.dtype)
+            grown[:old.shape[0], :old.shape[1], :old.shape[2]] = old
+            setattr(self, name, grown)
+
+    @classmethod
+    def from_orders(cls, rows, segment_of):
+        """
+        Rollup of prepared order rows (ROLLUP_COLUMNS); `segment_of` maps
+        customer_unique_id to segment
+        """
+        days = day_numbers(rows['order_purchase_timestamp'])
+        rollup = cls(days.min() if len(days) else 0, segments=pd.unique(segment_of.to_numpy()))
+        rollup._accumulate(rows, days, segment_of)
+        return rollup
+
+    def append(self, rows, segment_of):
+        """
+        Add order rows from end_day onward. Rows of earlier days, and rows
+        of orders already counted on end_day, are skipped (they are in the
+        rollup); returns how many rows were added.
+        """
+        days = day_numbers(rows['order_purchase_timestamp'])
+        new = (days > self.end_day) | ((days == self.end_day) & ~rows['order_id'].isin(self.end_orders).to_numpy())
+        if not new.all():
+            rows, days = rows[new], days[new]
+        if len(days) and not self.days:
+            self.start_day = int(days.min())
+        self._accumulate(rows, days, segment_of)
+        return len(days)
+
+    def _accumulate(self, rows, days, segment_of):
+        if not len(days):
+            return
+        previous_end = self.end_day
+        # Labels are looked up once per distinct customer and state, then spread to the rows
+        customer_codes, unique_ids = pd.factorize(rows['customer_unique_id'])
+        segments, self.segments = _codes(segment_of.reindex(unique_ids).fillna(UNSCORED).to_numpy(),
+                                         self.segments)
+        segments = segments[customer_codes]
+        state_codes, unique_states = pd.factorize(rows['customer_state'])
+        states, self.states = _codes(np.asarray(unique_states), self.states)
+        states = states[state_codes]
+        self._grow(max(self.days, int(days.max()) - self.start_day + 1))
+
+        n_states, n_days = len(self.states), self.days
+        cells = (segments.astype(np.int64) * n_states + states) * n_days + (days - self.start_day)
+        size = len(self.segments) * n_states * n_days
+        shape = self.revenue.shape
+
+        # Every row carries revenue
+        prices = rows['price'].to_numpy(dtype=float)
+        self.revenue += np.bincount(cells, weights=prices, minlength=size).reshape(shape)
+
+        # One row per order (rows fan out by item and payment)
+        _, first_rows = np.unique(pd.factorize(rows['order_id'])[0], return_index=True)
+        self.orders += np.bincount(cells[first_rows], minlength=size).reshape(shape).astype(np.int32)
+
+        # The earliest row of each customer not seen before
+        order = np.lexsort((days, customer_codes))
+        _, first = np.unique(customer_codes[order], return_index=True)
+        first_rows = order[first]
+        unseen = ~pd.Index(unique_ids).isin(self.customers)
+        self.new_customers += np.bincount(cells[first_rows[unseen]], minlength=size).reshape(shape).astype(np.int32)
+        self.customers = self.customers.append(pd.Index(unique_ids[unseen]))
+
+        # Orders of the last day, so the rest of that day can still be appended
+        last_day = pd.Index(pd.unique(rows['order_id'].to_numpy()[days == self.end_day]), dtype=object)
+        if self.end_day == previous_end:
+            last_day = self.end_orders.append(last_day)
+        self.end_orders = last_day
+
+    def series(self, metric='revenue', by='segment', freq='D'):
+        """
+        Time series of a metric, one column per segment or state (by=None
+        for the total). freq is 'D', 'W' (weeks starting Monday) or 'M'.
+        """
+        cube = getattr(self, metric)
+        if by == 'segment':
+            values, columns = cube.sum(axis=1), self.segments
+        elif by == 'state':
+            values, columns = cube.sum(axis=0), self.states
+        elif by is None:
+            values, columns = cube.sum(axis=(0, 1))[np.newaxis], [metric]
+        else:
+            raise ValueError("by must be 'segment', 'state' or None")
+
+        day_range = np.arange(self.start_day, self.start_day + self.days)
+        if freq == 'D':
+            index = self.dates()
+        elif freq in ('W', 'M'):
+            if freq == 'W':
+                # 1970-01-01 was a Thursday: day + 3 counts from the Monday before it
+                periods = (day_range + 3) // 7
+                starts = periods * 7 - 3
+            else:
+                periods = day_range.astype('datetime64[D]').astype('datetime64[M]').astype(np.int64)
+                starts = periods.astype('datetime64[M]').astype('datetime64[D]').astype(np.int64)
+            # Days are in order, so each period is one contiguous run of the day axis
+            boundaries = np.flatnonzero(np.r_[True, np.diff(periods) != 0])
+            values = np.add.reduceat(values, boundaries, axis=1) if self.days else values
+            index = pd.to_datetime(starts[boundaries].astype('datetime64[D]'))
+        else:
+            raise ValueError("freq must be 'D', 'W' or 'M'")
+        return pd.DataFrame(values.T, index=index.rename('period'), columns=columns)
+
+    def long_table(self, freq='W'):
+        """
+        All metrics by segment and by state in long format:
+        period, breakdown, group, revenue, orders, new_customers
+        """
+        tables = []
+        for by in ['segment', 'state']:
+            frames = [self.series(metric, by, freq).stack().rename(metric) for metric in METRICS]
+            table = pd.concat(frames, axis=1)
+            table.index.names = ['period', 'group']
+            table = table.reset_index()
+            table.insert(1, 'breakdown', by)
+            tables.append(table[(table[METRICS] != 0).any(axis=1)])
+        return pd.concat(tables, ignore_index=True)
+
+    def save(self, path):
+        """
+        Atomic write as a compressed .npz
+        """
+        temp = path + '.tmp'
+        with open(temp, 'wb') as handle:
+            np.savez_compressed(handle, start_day=self.start_day,
+                                segments=np.asarray(self.segments, dtype=object),
+                                states=np.asarray(self.states, dtype=object),
+                                customers=self.customers.to_numpy(dtype=object),
+                                end_orders=self.end_orders.to_numpy(dtype=object),
+                                **{name: getattr(self, name) for name in METRICS})
+        os.replace(temp, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=True) as saved:
+            rollup = cls(int(saved['start_day']), saved['segments'].tolist(), saved['states'].tolist())
+            for name in METRICS:
+                setattr(rollup, name, saved[name])
+            rollup.customers = pd.Index(saved['customers'], dtype=object)
+            rollup.end_orders = pd.Index(saved['end_orders'], dtype=object)
+        return rollup
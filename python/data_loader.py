@@ -0,0 +1,149 @@
+# data_loader.py
+# ============================================
+# SHARED SOURCE TABLE LOADER WITH BINARY SNAPSHOTS
+# ============================================
+#
+# Used by 01_data_exploration.py and 02_data_preparation.py.
+# The Olist CSVs are parsed concurrently (one thread per file, using
+# the multi-threaded pyarrow CSV engine when it is installed). After
+# the first parse each table is written to a binary snapshot under
+# data/.snapshots, keyed by the CSV's size, mtime and content hash,
+# so later runs skip CSV parsing entirely.
+
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+SOURCE_TABLES = {
+    'customers': 'olist_customers_dataset.csv',
+    'orders': 'olist_orders_dataset.csv',
+    'items': 'olist_order_items_dataset.csv',
+    'payments': 'olist_order_payments_dataset.csv',
+}
+
+SNAPSHOT_DIR = '.snapshots'
+
+
+def file_digest(path, block_size=1 << 20):
+    """
+    Content hash of a source file
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def read_csv_fast(path, **kwargs):
+    """
+    pd.read_csv with the multi-threaded pyarrow engine when available
+    """
+    if HAS_PYARROW and 'chunksize' not in kwargs:
+        return pd.read_csv(path, engine='pyarrow', **kwargs)
+    return pd.read_csv(path, **kwargs)
+
+
+def _snapshot_paths(snapshot_dir, name):
+    extension = 'feather' if HAS_PYARROW else 'pkl'
+    return (os.path.join(snapshot_dir, f'{name}.{extension}'),
+            os.path.join(snapshot_dir, f'{name}.json'))
+
+
+def _snapshot_is_current(csv_path, snapshot_file, manifest_file):
+    """
+    Returns (is_current, source signature, manifest needs rewrite). Size
+    and mtime are checked first; the content hash is only recomputed
+    when the mtime differs.
+    """
+    stat = os.stat(csv_path)
+    signature = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+    if not (os.path.exists(snapshot_file) and os.path.exists(manifest_file)):
+        return False, signature, True
+    with open(manifest_file) as f:
+        manifest = json.load(f)
+    if manifest.get('size') != stat.st_size:
+        return False, signature, True
+    if manifest.get('mtime_ns') == stat.st_mtime_ns:
+        signature['digest'] = manifest.get('digest')
+        return True, signature, False
+    # Touched but possibly unchanged: fall back to the content hash
+    signature['digest'] = file_digest(csv_path)
+    return manifest.get('digest') == signature['digest'], signature, True
+
+
+def load_table(data_dir, name, file_name, use_snapshot=True):
+    """
+    Load one source table. Returns (DataFrame, seconds, 'snapshot' | 'csv').
+    """
+    start = time.perf_counter()
+    csv_path = os.path.join(data_dir, file_name)
+    if not os.path.exists(csv_path):
+        raise FileNotFoundError(csv_path)
+
+    snapshot_dir = os.path.join(data_dir, SNAPSHOT_DIR)
+    snapshot_file, manifest_file = _snapshot_paths(snapshot_dir, name)
+
+    if use_snapshot:
+        is_current, signature, stale_manifest = _snapshot_is_current(csv_path, snapshot_file, manifest_file)
+        if is_current:
+            df = pd.read_feather(snapshot_file) if HAS_PYARROW else pd.read_pickle(snapshot_file)
+            if stale_manifest:
+                _write_manifest(manifest_file, signature)
+            return df, time.perf_counter() - start, 'snapshot'
+
+    df = read_csv_fast(csv_path)
+
+    if use_snapshot:
+        os.makedirs(snapshot_dir, exist_ok=True)
+        if HAS_PYARROW:
+            df.to_feather(snapshot_file)
+        else:
+            df.to_pickle(snapshot_file)
+        signature.setdefault('digest', file_digest(csv_path))
+        _write_manifest(manifest_file, signature)
+
+    return df, time.perf_counter() - start, 'csv'
+
+
+def _write_manifest(manifest_file, signature):
+    with open(manifest_file, 'w') as f:
+        json.dump(signature, f)
+
+
+def load_tables(data_dir, tables=SOURCE_TABLES, use_snapshot=True, max_workers=None):
+    """
+    Load several source tables concurrently.
+    Returns (frames, timings) where timings maps name -> (seconds, source).
+    """
+    frames, timings = {}, {}
+    if not tables:
+        return frames, timings
+    with ThreadPoolExecutor(max_workers=max_workers or len(tables)) as pool:
+        futures = {name: pool.submit(load_table, data_dir, name, file_name, use_snapshot)
+                   for name, file_name in tables.items()}
+        for name, future in futures.items():
+            df, seconds, source = future.result()
+            frames[name] = df
+            timings[name] = (seconds, source)
+    return frames, timings
+
+
+def print_timings(timings, total_seconds):
+    """
+    Cold (CSV parse) and warm (snapshot) load times per table
+    """
+    for name, (seconds, source) in timings.items():
+        kind = 'warm, snapshot' if source == 'snapshot' else 'cold, CSV parse'
+        print(f"   ⏱️ {name}: {seconds * 1000:.0f} ms ({kind})")
+    print(f"   ⏱️ Total wall time: {total_seconds * 1000:.0f} ms")
@@ -0,0 +1,57 @@
+# delivery_features.py
+# ============================================
+# DELIVERY EXPERIENCE FEATURES
+# ============================================
+#
+# Per-order delivery lead time, approval latency and lateness against
+# the estimated delivery date, computed column-wise on prepared_data.
+# prepared_data has one row per order item (and payment), so the order
+# values are only set on the first row of each order and left NaN on
+# the rest: the mean / max / sum / count aggregations in DELIVERY_EXTRA
+# then skip the duplicates and roll up per order, inside the same
+# fused groupby as the RFM metrics.
+
+import numpy as np
+import pandas as pd
+
+DELIVERY_SOURCE_COLUMNS = ['order_approved_at', 'order_delivered_customer_date', 'order_estimated_delivery_date']
+
+# Per-customer rollups, passed to rfm_metrics(extra=...)
+DELIVERY_EXTRA = {
+    'avg_lead_time_days': ('lead_time_days', 'mean'),
+    'max_lead_time_days': ('lead_time_days', 'max'),
+    'avg_approval_hours': ('approval_hours', 'mean'),
+    'max_late_days': ('late_days', 'max'),
+    'delivered_orders': ('lead_time_days', 'count'),
+    'late_orders': ('is_late', 'sum'),
+    'late_order_share': ('is_late', 'mean'),
+}
+
+DELIVERY_COLUMNS = list(DELIVERY_EXTRA)
+
+
+def has_delivery_columns(data):
+    return all(col in data.columns for col in DELIVERY_SOURCE_COLUMNS)
+
+
+def add_delivery_features(data, order='order_id', timestamp='order_purchase_timestamp'):
+    """
+    Add lead_time_days, approval_hours, late_days and is_late to `data`
+    in place (NaN except on the first row of each order)
+    """
+    first_row = ~data[order].duplicated().to_numpy()
+    purchase = pd.to_datetime(data[timestamp])
+    delivered = pd.to_datetime(data['order_delivered_customer_date'])
+    approved = pd.to_datetime(data['order_approved_at'])
+    estimated = pd.to_datetime(data['order_estimated_delivery_date'])
+
+    day, hour = pd.Timedelta(days=1), pd.Timedelta(hours=1)
+    lead_time = ((delivered - purchase) / day).to_numpy(dtype=float)
+    late_days = ((delivered - estimated) / day).to_numpy(dtype=float)
+
+    data['lead_time_days'] = np.where(first_row, lead_time, np.nan)
+    data['approval_hours'] = np.where(first_row, ((approved - purchase) / hour).to_numpy(dtype=float), np.nan)
+    data['late_days'] = np.where(first_row, late_days, np.nan)
+    # Delivered after the estimated date; unknown when either date is missing
+    data['is_late'] = np.where(first_row & ~np.isnan(late_days), late_days > 0, np.nan)
+    return data
@@ -0,0 +1,192 @@
+# fast_profile.py
+# ============================================
+# SINGLE-PASS, BOUNDED-MEMORY CSV PROFILER
+# ============================================
+#
+# Default mode of 01_data_exploration.py. Each file is streamed once in
+# chunks and every column keeps a fixed amount of state:
+#   - null and row counters
+#   - min / max / sum for numeric columns (min / max for text)
+#   - a HyperLogLog sketch for the distinct count (~0.8% error)
+#   - the exact set of values while it stays small (status-like columns)
+#   - a dtype merged across chunks
+# Preview rows come from a reservoir sample over the whole file, and
+# memory usage is extrapolated from the sample instead of measured with
+# memory_usage(deep=True) on the full table.
+
+import numpy as np
+import pandas as pd
+
+
+class HyperLogLog:
+    """
+    HyperLogLog distinct counter over 64-bit pandas hashes
+    """
+
+    def __init__(self, p=14):
+        self.p = p
+        self.m = 1 << p
+        self.registers = np.zeros(self.m, dtype=np.uint8)
+        self.low_bits = 64 - p
+        self.alpha = 0.7213 / (1 + 1.079 / self.m)
+
+    def update(self, values):
+        if len(values) == 0:
+            return
+        hashes = pd.util.hash_pandas_object(pd.Series(values), index=False).to_numpy()
+        index = (hashes >> np.uint64(self.low_bits)).astype(np.int64)
+        # The remaining 50 bits are exact as float64, so frexp gives their bit length
+        rest = (hashes & np.uint64((1 << self.low_bits) - 1)).astype(np.float64)
+        bit_length = np.frexp(rest)[1]
+        rank = (self.low_bits - bit_length + 1).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+
+    def estimate(self):
+        raw = self.alpha * self.m * self.m / np.sum(np.exp2(-self.registers.astype(np.float64)))
+        zeros = np.count_nonzero(self.registers == 0)
+        if raw <= 2.5 * self.m and zeros:
+            # Small-range correction (linear counting)
+            return self.m * np.log(self.m / zeros)
+        return raw
+
+
+class ColumnProfile:
+    """
+    Constant-size running summary of one column
+    """
+
+    MAX_TRACKED_VALUES = 50
+
+    def __init__(self, name):
+        self.name = name
+        self.nulls = 0
+        self.count = 0
+        self.dtype = None
+        self.minimum = None
+        self.maximum = None
+        self.total = 0.0
+        self.hll = HyperLogLog()
+        self.values = set()
+
+    def update(self, series):
+        self.count += len(series)
+        non_null = series.dropna()
+        self.nulls += len(series) - len(non_null)
+        self.dtype = _merge_dtypes(self.dtype, series.dtype)
+        if len(non_null) == 0:
+            return
+
+        self.hll.update(non_null)
+        if self.values is not None:
+            uniques = non_null.unique()
+            if len(uniques) > self.MAX_TRACKED_VALUES:
+                self.values = None
+            else:
+                self.values.update(uniques.tolist())
+                if len(self.values) > self.MAX_TRACKED_VALUES:
+                    self.values = None
+
+        is_numeric = pd.api.types.is_numeric_dtype(non_null)
+        low, high = non_null.min(), non_null.max()
+        if is_numeric:
+            self.total += float(non_null.sum())
+        else:
+            low, high = str(low), str(high)
+        try:
+            self.minimum = low if self.minimum is None else min(self.minimum, low)
+            self.maximum = high if self.maximum is None else max(self.maximum, high)
+        except TypeError:
+            # Column changed from numeric to text between chunks; compare as text
+            self.minimum = min(str(self.minimum), str(low))
+            self.maximum = max(str(self.maximum), str(high))
+
+    @property
+    def non_null(self):
+        return self.count - self.nulls
+
+    @property
+    def is_numeric(self):
+        return self.dtype is not None and pd.api.types.is_numeric_dtype(self.dtype)
+
+    def distinct(self):
+        """
+        Exact when the value set is still tracked, otherwise the HLL estimate
+        """
+        if self.values is not None:
+            return len(self.values), True
+        return int(round(self.hll.estimate())), False
+
+    def mean(self):
+        return self.total / self.non_null if self.is_numeric and self.non_null else None
+
+
+def _merge_dtypes(current, new):
+    if current is None or current == new:
+        return new
+    if pd.api.types.is_numeric_dtype(current) and pd.api.types.is_numeric_dtype(new):
+        return np.dtype('float64')
+    return np.dtype('object')
+
+
+class FileProfile:
+    """
+    Single-pass profile of one CSV: column profiles plus a reservoir sample
+    """
+
+    def __init__(self, sample_size=1000, seed=0):
+        self.sample_size = sample_size
+        self.rng = np.random.default_rng(seed)
+        self.rows = 0
+        self.columns = {}
+        self.sample = None
+
+    def update(self, chunk):
+        for col in chunk.columns:
+            if col not in self.columns:
+                self.columns[col] = ColumnProfile(col)
+            self.columns[col].update(chunk[col])
+        self._sample(chunk)
+        self.rows += len(chunk)
+
+    def _sample(self, chunk):
+        # Vectorized reservoir sampling (Algorithm R): row i of the stream
+        # replaces a random slot j < i + 1 when j falls inside the reservoir
+        k = self.sample_size
+        if self.sample is None:
+            self.sample = chunk.iloc[:0]
+        fill = min(k - len(self.sample), len(chunk))
+        if fill > 0:
+            self.sample = pd.concat([self.sample, chunk.iloc[:fill]], ignore_index=True)
+            chunk = chunk.iloc[fill:]
+        start = self.rows + max(fill, 0)
+        if len(chunk) == 0:
+            return
+        positions = np.arange(start, start + len(chunk))
+        slots = (self.rng.random(len(chunk)) * (positions + 1)).astype(np.int64)
+        accepted = np.flatnonzero(slots < k)
+        if len(accepted):
+            # Later rows win when two rows hit the same slot, as in the sequential algorithm
+            target = pd.Series(accepted, index=slots[accepted]).groupby(level=0).last()
+            replacement = chunk.iloc[target.to_numpy()].reset_index(drop=True)
+            replacement.index = target.index
+            self.sample = self.sample.astype(object)
+            self.sample.loc[target.index] = replacement.astype(object).to_numpy()
+
+    def memory_estimate(self):
+        """
+        Bytes for the full table, extrapolated from the sample
+        """
+        if self.sample is None or len(self.sample) == 0:
+            return 0
+        per_row = self.sample.infer_objects().memory_usage(deep=True, index=False).sum() / len(self.sample)
+        return per_row * self.rows
+
+
+def profile_csv(path, chunksize=500_000, sample_size=1000):
+    """
+    Stream a CSV once and return its FileProfile
+    """
+    profile = FileProfile(sample_size=sample_size)
+    for chunk in pd.read_csv(path, chunksize=chunksize):
+        profile.update(chunk)
+    return profile
@@ -0,0 +1,154 @@
+# geo_index.py
+# ============================================
+# HIERARCHICAL GEO ROLLUP (COUNTRY -> STATE -> CITY)
+# ============================================
+#
+# Built once from the segmented customers in 04_rfm_segmentation.py
+# and saved to data/geo_rollup.csv. Every row is one node of the
+# hierarchy with its customer count, revenue and segment mix, so
+# later stages read the answer instead of re-running value_counts.
+# Lookups go through a dict keyed on the node path (constant time),
+# and the children of any node are a contiguous slice of the table.
+
+import os
+
+import numpy as np
+import pandas as pd
+
+LEVELS = ['country', 'state', 'city', 'zip']
+KEY_COLUMNS = ['level', 'country', 'state', 'city', 'zip_prefix']
+BASE_COLUMNS = KEY_COLUMNS + ['customers', 'revenue']
+
+
+def build_geo_rollup(customers, country='BR', include_zip=None):
+    """
+    Roll customers up to country, state, city (and zip prefix when the
+    column is present) in one pass over integer-coded keys.
+    Returns a table sorted so that every node's children are contiguous.
+    """
+    if include_zip is None:
+        include_zip = 'zip_prefix' in customers.columns
+
+    seg_codes, segments = pd.factorize(customers['segment'], sort=True)
+    revenue = customers['monetary'].to_numpy(dtype=float)
+    keys = {
+        'country': pd.Series(country, index=customers.index),
+        'state': customers['state'].astype(str),
+        'city': customers['city'].astype(str),
+    }
+    if include_zip:
+        keys['zip_prefix'] = customers['zip_prefix'].astype(str).str.zfill(5)
+
+    tables = []
+    for depth, level in enumerate(LEVELS[:4 if include_zip else 3]):
+        path_columns = ['country', 'state', 'city', 'zip_prefix'][:depth + 1]
+        path = pd.DataFrame({col: keys[col] for col in path_columns})
+        node_codes, nodes = pd.factorize(pd.MultiIndex.from_frame(path))
+        nodes.names = path_columns
+        n_nodes = len(nodes)
+
+        mix = np.bincount(node_codes * len(segments) + seg_codes,
+                          minlength=n_nodes * len(segments)).reshape(n_nodes, len(segments))
+        table = nodes.to_frame(index=False)
+        for col in KEY_COLUMNS[1:]:
+            if col not in table.columns:
+                table[col] = ''
+        table['level'] = level
+        table['customers'] = np.bincount(node_codes, minlength=n_nodes)
+        table['revenue'] = np.bincount(node_codes, weights=revenue, minlength=n_nodes)
+        table[list(segments)] = mix
+        tables.append(table)
+
+    rollup = pd.concat(tables, ignore_index=True)
+    rollup['level'] = pd.Categorical(rollup['level'], categories=LEVELS, ordered=True)
+    rollup = rollup.sort_values(['level', 'country', 'state', 'city', 'zip_prefix'], ignore_index=True)
+    rollup['level'] = rollup['level'].astype(str)
+    return rollup[BASE_COLUMNS + list(segments)]
+
+
+class GeoIndex:
+    """
+    Constant-time access to any node of the geo rollup
+    """
+
+    def __init__(self, table):
+        self.table = table.reset_index(drop=True)
+        self.segments = [c for c in self.table.columns
+                         if c not in BASE_COLUMNS and not c.startswith('zip_')]
+        paths = list(zip(self.table['level'], self.table['state'], self.table['city'], self.table['zip_prefix']))
+        self._positions = {path: i for i, path in enumerate(paths)}
+
+        # Children of a node are contiguous: map (child level, parent path) -> (start, stop)
+        self._children = {}
+        positions = pd.Series(np.arange(len(self.table)), index=self.table.index)
+        for level, parent_cols in [('state', ['country']), ('city', ['state']), ('zip', ['state', 'city'])]:
+            rows = self.table['level'] == level
+            if not rows.any():
+                continue
+            bounds = positions[rows].groupby([self.table.loc[rows, col] for col in parent_cols]).agg(['min', 'max'])
+            for parent, (start, stop) in zip(bounds.index, bounds.to_numpy()):
+                parent = parent if isinstance(parent, tuple) else (parent,)
+                self._children[(level, parent if level != 'state' else ())] = (int(start), int(stop) + 1)
+
+    @classmethod
+    def load(cls, path):
+        table = pd.read_csv(path, dtype={col: str for col in KEY_COLUMNS}, keep_default_na=False)
+        return cls(table)
+
+    def save(self, path):
+        self.table.to_csv(path, index=False)
+
+    def node(self, state=None, city=None, zip_prefix=None):
+        """
+        Row for the country (no arguments), a state, a city or a zip prefix
+        """
+        level = 'zip' if zip_prefix else 'city' if city else 'state' if state else 'country'
+        key = (level, state or '', city or '', zip_prefix or '')
+        return self.table.iloc[self._positions[key]]
+
+    def children(self, state=None, city=None):
+        """
+        States of the country, cities of a state or zip prefixes of a city
+        """
+        if city:
+            start, stop = self._children.get(('zip', (state, city)), (0, 0))
+        elif state:
+            start, stop = self._children.get(('city', (state,)), (0, 0))
+        else:
+            start, stop = self._children.get(('state', ()), (0, 0))
+        return self.table.iloc[start:stop]
+
+    def top(self, n=10, by='customers', state=None, city=None):
+        """
+        Largest children of a node, e.g. top states by customers
+        """
+        return self.children(state, city).nlargest(n, by)
+
+    def segment_mix(self, state=None, city=None, zip_prefix=None, normalize=True):
+        mix = self.node(state, city, zip_prefix)[self.segments].astype(float)
+        return mix / mix.sum() * 100 if normalize else mix
+
+    def join_zip_data(self, zip_data, on='zip_prefix'):
+        """
+        Attach per-zip-prefix attributes (e.g. lat/lng from the Olist
+        geolocation table) to the zip-level rows. Only the rollup is
+        joined; customers are not scanned again.
+        """
+        zip_data = zip_data.copy()
+        zip_data[on] = zip_data[on].astype(str).str.zfill(5)
+        zip_data = zip_data.drop_duplicates(on).set_index(on)
+        zip_data.columns = [f'zip_{col}' for col in zip_data.columns]
+        zip_rows = self.table['level'] == 'zip'
+        for col in zip_data.columns:
+            self.table[col] = np.nan
+            self.table.loc[zip_rows, col] = self.table.loc[zip_rows, 'zip_prefix'].map(zip_data[col]).to_numpy()
+        return self
+
+
+def load_geo_index(geo_file, customers=None):
+    """
+    Load the saved rollup, or build it from the customers if 04 has not written one
+    """
+    if os.path.exists(geo_file):
+        return GeoIndex.load(geo_file)
+    return GeoIndex(build_geo_rollup(customers))
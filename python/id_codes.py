@@ -0,0 +1,102 @@
+# id_codes.py
+# ============================================
+# DENSE INTEGER CODES FOR HEX STRING IDS
+# ============================================
+#
+# The Olist ids are 32-character hex strings. 02_data_preparation.py
+# replaces every id column with a dense int32 code at ingestion, so the
+# merges in 02 and the groupbys in 03/04 hash and compare integers.
+# Each id space has one dictionary (code = position), persisted under
+# data/id_dictionaries and only ever appended to, so codes stay stable
+# across runs. Strings are restored only when customer-level results
+# are exported.
+
+import os
+
+import numpy as np
+import pandas as pd
+
+# id space -> (table, column) pairs that share it
+ID_SPACES = {
+    'order_id': [('orders', 'order_id'), ('items', 'order_id'), ('payments', 'order_id')],
+    'customer_id': [('customers', 'customer_id'), ('orders', 'customer_id')],
+    'customer_unique_id': [('customers', 'customer_unique_id')],
+    'product_id': [('items', 'product_id')],
+    'seller_id': [('items', 'seller_id')],
+}
+
+DICTIONARY_DIR = 'id_dictionaries'
+
+
+class IdDictionary:
+    """
+    Append-only mapping between id strings and dense integer codes
+    """
+
+    def __init__(self, values=None):
+        self.values = pd.Index(values if values is not None else [], dtype=object)
+
+    def __len__(self):
+        return len(self.values)
+
+    def encode(self, ids, extend=False):
+        """
+        Codes for `ids`; unseen ids get new codes appended when `extend` is set.
+        Missing ids (NaN/None) are rejected rather than given a code.
+        """
+        ids = np.asarray(ids, dtype=object)
+        blank = pd.isna(ids)
+        if blank.any():
+            raise ValueError(f"{blank.sum():,} missing id(s) (first at row {int(np.argmax(blank))}); "
+                             f"drop or fill them before encoding")
+        codes = self.values.get_indexer(ids) if len(self.values) else np.full(len(ids), -1)
+        missing = codes < 0
+        if missing.any():
+            if not extend:
+                raise KeyError("Ids missing from the dictionary")
+            new_codes, new_values = pd.factorize(ids[missing])
+            codes[missing] = new_codes + len(self.values)
+            self.values = self.values.append(pd.Index(new_values, dtype=object))
+        return codes.astype(np.int32)
+
+    def decode(self, codes):
+        return self.values.take(np.asarray(codes, dtype=np.int64)).to_numpy()
+
+
+def encode_tables(tables, dictionaries=None):
+    """
+    Replace every id column of the source tables with its integer code,
+    in place. Returns the (possibly extended) dictionaries.
+    """
+    dictionaries = dict(dictionaries or {})
+    for space, columns in ID_SPACES.items():
+        present = [(table, col) for table, col in columns if table in tables and col in tables[table].columns]
+        if not present:
+            continue
+        dictionary = dictionaries.setdefault(space, IdDictionary())
+        for table, col in present:
+            try:
+                tables[table][col] = dictionary.encode(tables[table][col], extend=True)
+            except ValueError as e:
+                raise ValueError(f"{table}.{col}: {e}") from None
+    return dictionaries
+
+
+def save_dictionaries(dictionaries, data_dir):
+    directory = os.path.join(data_dir, DICTIONARY_DIR)
+    os.makedirs(directory, exist_ok=True)
+    for space, dictionary in dictionaries.items():
+        pd.DataFrame({space: dictionary.values}).to_csv(os.path.join(directory, f'{space}.csv'), index=False)
+
+
+def load_dictionaries(data_dir, spaces=None):
+    """
+    Load persisted dictionaries (all spaces by default); missing ones are skipped
+    """
+    directory = os.path.join(data_dir, DICTIONARY_DIR)
+    dictionaries = {}
+    for space in spaces or ID_SPACES:
+        path = os.path.join(directory, f'{space}.csv')
+        if os.path.exists(path):
+            dictionaries[space] = IdDictionary(pd.read_csv(path, dtype=str, keep_default_na=False)[space])
+    return dictionaries
@@ -0,0 +1,165 @@
+# market_basket.py
+# ============================================
+# CO-PURCHASE MINING OVER ORDER ITEMS
+# ============================================
+#
+# Used by 17_market_basket.py. Each chunk of order rows becomes a sparse
+# order x item incidence matrix X (1 when the order contains the item,
+# however many item and payment rows it has), and X.T @ X counts, for
+# every pair of items, the orders containing both. Two passes, like the
+# cohort kernel:
+#   1. item support: orders per item, a bincount over the columns of X
+#   2. pair counts: items below the minimum support are dropped first
+#      (a pair is never more frequent than its rarer item), then only
+#      orders with two or more remaining items go into the product.
+#      One upper-triangular items x items matrix is kept per segment
+#      and the chunk products are added into it, so memory is bounded
+#      by the number of distinct frequent pairs, not by the orders.
+#
+# support(a, b) = orders with a and b / orders
+# confidence(a -> b) = orders with a and b / orders with a
+# lift(a, b) = support(a, b) / (support(a) * support(b))
+#
+# The input must keep every order's rows adjacent (grouped or sorted by
+# order_id); prepared_data.csv does, since 02's merges preserve the
+# order of the orders table. Chunks must not split an order, so
+# complete_orders() holds back the rows of each chunk's last order.
+# Only part of the requirement is checked, to keep memory bounded by
+# the chunk size: an order whose rows reappear later in the same or the
+# next chunk raises, but one whose rows come back several chunks later
+# goes undetected and is counted as two baskets.
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+
+def complete_orders(chunks, order='order_id'):
+    """
+    Re-cut a stream of row chunks so that no order spans two chunks.
+    Raises ValueError when an order's rows are not contiguous (checked
+    within a chunk and against the one before it).
+    """
+    previous = frozenset()
+
+    def checked(part):
+        nonlocal previous
+        ids = part[order].to_numpy()
+        runs = ids[np.r_[True, ids[1:] != ids[:-1]]]
+        if len(pd.unique(runs)) < len(runs) or not previous.isdisjoint(runs):
+            raise ValueError(f"rows of an {order} are not contiguous; sort the input by {order} first")
+        previous = frozenset(runs)
+        return part
+
+    carry = None
+    for chunk in chunks:
+        if carry is not None:
+            chunk = pd.concat([carry, chunk], ignore_index=True)
+        ids = chunk[order].to_numpy()
+        # Start of the run of rows belonging to the last order
+        different = np.flatnonzero(ids != ids[-1])
+        start = different[-1] + 1 if len(different) else 0
+        if start:
+            yield checked(chunk.iloc[:start])
+        carry = chunk.iloc[start:]
+    if carry is not None and len(carry):
+        yield checked(carry)
+
+
+def incidence_matrix(order_codes, item_codes, n_items):
+    """
+    CSR orders x items with 1 where the order contains the item.
+    Returns (matrix, row of every input row).
+    """
+    rows, orders = pd.factorize(np.asarray(order_codes))
+    matrix = sparse.csr_matrix((np.ones(len(rows), dtype=np.float64), (rows, np.asarray(item_codes))),
+                               shape=(len(orders), n_items))
+    # Repeated (order, item) rows were summed; only presence counts
+    matrix.data[:] = 1
+    return matrix, rows
+
+
+def item_support(order_codes, item_codes, n_items):
+    """
+    (orders per item, orders) for one chunk
+    """
+    matrix, _ = incidence_matrix(order_codes, item_codes, n_items)
+    return np.bincount(matrix.indices, minlength=n_items), matrix.shape[0]
+
+
+class BasketAccumulator:
+    """
+    Per-group pair counts over the frequent items, fed chunk by chunk.
+
+    Groups are segment codes 0..n_groups-1; orders of customers without
+    a segment (code -1) count towards the totals only.
+    """
+
+    def __init__(self, frequent_items, n_items, n_groups):
+        self.items = np.asarray(frequent_items)
+        self.n_groups = n_groups
+        # Item code -> column among the frequent items (-1 when pruned)
+        self.column = np.full(n_items, -1, dtype=np.int64)
+        self.column[self.items] = np.arange(len(self.items))
+        n = len(self.items)
+        # The last group collects orders without a segment
+        self.orders = np.zeros(n_groups + 1, dtype=np.int64)
+        self.item_orders = np.zeros((n_groups + 1, n), dtype=np.int64)
+        self.pairs = [sparse.csr_matrix((n, n), dtype=np.float64) for _ in range(n_groups + 1)]
+
+    def add(self, order_codes, item_codes, group_codes):
+        """
+        Fold one chunk of order rows (complete orders) into the counts
+        """
+        order_codes = np.asarray(order_codes)
+        group_codes = np.where(np.asarray(group_codes) >= 0, group_codes, self.n_groups)
+        rows, orders = pd.factorize(order_codes)
+        order_group = np.zeros(len(orders), dtype=np.int64)
+        order_group[rows] = group_codes
+        self.orders += np.bincount(order_group, minlength=self.n_groups + 1)
+
+        columns = self.column[np.asarray(item_codes)]
+        kept = columns >= 0
+        n = len(self.items)
+        matrix = sparse.csr_matrix((np.ones(kept.sum()), (rows[kept], columns[kept])), shape=(len(orders), n))
+        matrix.data[:] = 1
+
+        basket_size = np.diff(matrix.indptr)
+        cells = np.repeat(order_group, basket_size) * n + matrix.indices
+        self.item_orders += np.bincount(cells, minlength=(self.n_groups + 1) * n).reshape(self.item_orders.shape)
+
+        # Only baskets with two or more frequent items produce pairs
+        multi = basket_size >= 2
+        for group in np.unique(order_group[multi]):
+            baskets = matrix[multi & (order_group == group)]
+            self.pairs[group] = self.pairs[group] + sparse.triu(baskets.T @ baskets, k=1, format='csr')
+
+    def pair_counts(self, group=None):
+        """
+        Upper-triangular pair counts for one group (None for all orders)
+        """
+        if group is None:
+            total = self.pairs[0]
+            for pairs in self.pairs[1:]:
+                total = total + pairs
+            return total.tocoo()
+        return self.pairs[group].tocoo()
+
+
+def pair_table(counts, item_orders, n_orders, items, min_count=1):
+    """
+    Support, confidence and lift per item pair with at least `min_count`
+    orders. `counts` is a COO pair matrix over the columns of `items`.
+    """
+    keep = counts.data >= min_count
+    a, b, both = counts.row[keep], counts.col[keep], counts.data[keep]
+    n_a, n_b = item_orders[a], item_orders[b]
+    return pd.DataFrame({
+        'item_a': items[a],
+        'item_b': items[b],
+        'orders': both.astype(np.int64),
+        'support': both / n_orders,
+        'confidence_a_to_b': both / n_a,
+        'confidence_b_to_a': both / n_b,
+        'lift': both * n_orders / (n_a.astype(float) * n_b),
+    })
@@ -0,0 +1,425 @@
+# order_stream.py
+# ============================================
+# CONTINUOUS ORDER EVENTS -> LIVE RFM SEGMENTS
+# ============================================
+#
+# Used by 11_order_consumer.py and benchmark_order_stream.py. Order
+# events are appended to a JSONL file, one order per line:
+#     {"order_id": ..., "customer_id": ..., "timestamp": "2018-01-01 10:00:00", "amount": 12.5}
+# The consumer tails the file in micro-batches. Per-customer RFM state
+# lives in growable numpy arrays (dict id -> row), so a batch is a
+# handful of ufunc.at updates. Only the customers touched by the batch
+# are rescored, against quintile cut-points of the whole population,
+# and every segment change is appended to an output JSONL log. State
+# and the file offset are checkpointed atomically, and only between
+# batches, so a restart resumes exactly after the last checkpointed
+# event. Ctrl+C only asks the consumer to stop: the current batch is
+# finished and checkpointed first, so the change log never holds lines
+# past the checkpoint that a restart would write again.
+#
+# Ids of the orders applied in the last `dedupe_days` of event time are
+# part of the state and repeats are dropped, so an order re-sent within
+# that window is counted once; one re-sent after it (by event time) is
+# counted again. The window keeps memory and checkpoint size bounded by
+# recent volume rather than the full history.
+#
+# Lines that are not valid events (bad JSON, missing fields, longer
+# than a read) are skipped with a warning and appended to an optional
+# reject file, and the offset moves past them, so one bad line can't
+# stop the consumer or make every restart fail at the same place.
+#
+# Streaming scores use value cut-points, so tied values share a score
+# (create_rfm_scores splits ties by position); segments therefore track
+# the batch pipeline closely but not row for row.
+
+import json
+import logging
+import os
+import signal
+import threading
+import time
+
+import numpy as np
+
+from rfm_engine import segment_codes, SEGMENT_NAMES
+
+QUINTILES = [0.2, 0.4, 0.6, 0.8]
+UNSCORED = -1
+DAY = 86400
+EVENT_FIELDS = ('order_id', 'customer_id', 'timestamp', 'amount')
+
+log = logging.getLogger(__name__)
+
+
+class CustomerState:
+    """
+    Per-customer first/last purchase, order count and spend
+    """
+
+    def __init__(self, capacity=1024, dedupe_days=30):
+        self.ids = []
+        self.index = {}
+        self.first_ts = np.zeros(capacity, dtype=np.int64)
+        self.last_ts = np.zeros(capacity, dtype=np.int64)
+        self.orders = np.zeros(capacity, dtype=np.int64)
+        self.monetary = np.zeros(capacity, dtype=np.float64)
+        self.segment = np.full(capacity, UNSCORED, dtype=np.int16)
+        # order id -> event day, for orders within `dedupe_days` of `now`
+        self.dedupe_days = dedupe_days
+        self.order_days = {}
+        self.pruned_day = 0
+        self.now = 0
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _grow(self, size):
+        capacity = len(self.orders)
+        if size <= capacity:
+            return
+        while capacity < size:
+            capacity *= 2
+        for name in ['first_ts', 'last_ts', 'orders', 'monetary', 'segment']:
+            old = getattr(self, name)
+            new = np.full(capacity, UNSCORED if name == 'segment' else 0, dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
+
+    def positions(self, customer_ids):
+        """
+        Row of every customer id, adding rows for new customers
+        """
+        index = self.index
+        rows = np.empty(len(customer_ids), dtype=np.int64)
+        start = len(self.ids)
+        for i, customer in enumerate(customer_ids):
+            row = index.get(customer)
+            if row is None:
+                row = index[customer] = len(self.ids)
+                self.ids.append(customer)
+            rows[i] = row
+        if len(self.ids) > start:
+            self._grow(len(self.ids))
+            self.first_ts[start:len(self.ids)] = np.iinfo(np.int64).max
+        return rows
+
+    def new_orders(self, order_ids, timestamps):
+        """
+        Mask of the orders not applied yet (first copy of repeats within
+        the batch); their ids are recorded. Orders older than the window
+        can't be checked and are let through.
+        """
+        seen = self.order_days
+        days = (timestamps // DAY).tolist()
+        fresh = np.ones(len(order_ids), dtype=bool)
+        for i, (order_id, day) in enumerate(zip(order_ids, days)):
+            if order_id in seen:
+                fresh[i] = False
+            else:
+                seen[order_id] = day
+        return fresh
+
+    def prune_orders(self):
+        """
+        Forget order ids that fell out of the dedupe window (at most once
+        per day of event time)
+        """
+        today = self.now // DAY
+        if today <= self.pruned_day:
+            return
+        cutoff = today - self.dedupe_days
+        self.order_days = {order_id: day for order_id, day in self.order_days.items() if day >= cutoff}
+        self.pruned_day = today
+
+    def apply(self, customer_ids, timestamps, amounts):
+        """
+        Fold a batch of orders into the state; returns the affected rows
+        """
+        rows = self.positions(customer_ids)
+        np.minimum.at(self.first_ts, rows, timestamps)
+        np.maximum.at(self.last_ts, rows, timestamps)
+        np.add.at(self.orders, rows, 1)
+        np.add.at(self.monetary, rows, amounts)
+        self.now = max(self.now, int(timestamps.max()))
+        return np.unique(rows)
+
+    def scores(self, rows):
+        """
+        (r, f, m) scores of `rows` against population quintile cut-points
+        """
+        n = len(self.ids)
+        recency = (self.now - self.last_ts[:n]) // 86400
+        orders, monetary = self.orders[:n], self.monetary[:n]
+
+        # Bins are right-closed like pd.qcut; lower recency = higher score
+        r = 5 - np.searchsorted(np.quantile(recency, QUINTILES), recency[rows], side='left')
+        f = np.searchsorted(np.quantile(orders, QUINTILES), orders[rows], side='left') + 1
+        m = np.searchsorted(np.quantile(monetary, QUINTILES), monetary[rows], side='left') + 1
+        return r, f, m
+
+    def rescore(self, rows):
+        """
+        Recompute the segment of `rows`; returns (rows, old, new) for the
+        customers whose segment changed
+        """
+        if len(rows) == 0:
+            return rows, rows, rows
+        new = segment_codes(*self.scores(rows)).astype(np.int16)
+        old = self.segment[rows]
+        self.segment[rows] = new
+        changed = old != new
+        return rows[changed], old[changed], new[changed]
+
+    def save(self, path, offset):
+        """
+        Atomic checkpoint of the state and the event file offset
+        """
+        n = len(self.ids)
+        temp = path + '.tmp'
+        with open(temp, 'wb') as handle:
+            np.savez(handle, ids=np.asarray(self.ids, dtype=object), first_ts=self.first_ts[:n],
+                     last_ts=self.last_ts[:n], orders=self.orders[:n], monetary=self.monetary[:n],
+                     segment=self.segment[:n], order_ids=np.asarray(list(self.order_days), dtype=object),
+                     order_days=np.fromiter(self.order_days.values(), dtype=np.int64, count=len(self.order_days)),
+                     dedupe_days=self.dedupe_days, now=self.now, offset=offset)
+        os.replace(temp, path)
+
+    @classmethod
+    def load(cls, path, dedupe_days=None):
+        """
+        (state, offset) from a checkpoint written by save(); `dedupe_days`
+        overrides the saved window
+        """
+        with np.load(path, allow_pickle=True) as saved:
+            if dedupe_days is None:
+                dedupe_days = int(saved['dedupe_days']) if 'dedupe_days' in saved.files else 30
+            state = cls(capacity=max(1024, len(saved['ids'])), dedupe_days=dedupe_days)
+            state.ids = list(saved['ids'])
+            state.index = {customer: row for row, customer in enumerate(state.ids)}
+            n = len(state.ids)
+            for name in ['first_ts', 'last_ts', 'orders', 'monetary', 'segment']:
+                getattr(state, name)[:n] = saved[name]
+            state.now = int(saved['now'])
+            if 'order_ids' in saved.files:
+                # Checkpoints from before the window have ids only; date them now
+                days = (saved['order_days'].tolist() if 'order_days' in saved.files
+                        else [state.now // DAY] * len(saved['order_ids']))
+                state.order_days = dict(zip(saved['order_ids'].tolist(), days))
+                state.prune_orders()
+            return state, int(saved['offset'])
+
+
+def parse_event(line):
+    """
+    Event dict from one JSONL line; raises ValueError when it is not a
+    valid order event
+    """
+    try:
+        event = json.loads(line)
+    except (json.JSONDecodeError, UnicodeDecodeError) as e:
+        raise ValueError(f"invalid JSON: {e}") from None
+    if not isinstance(event, dict):
+        raise ValueError("not a JSON object")
+    missing = [field for field in EVENT_FIELDS if field not in event]
+    if missing:
+        raise ValueError(f"missing {', '.join(missing)}")
+    for field in ('order_id', 'customer_id'):
+        if not isinstance(event[field], (str, int)) or isinstance(event[field], bool):
+            raise ValueError(f"{field} must be a string or integer")
+    try:
+        np.datetime64(event['timestamp'], 's')
+        amount = float(event['amount'])
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"bad timestamp or amount: {e}") from None
+    if not np.isfinite(amount):
+        raise ValueError("amount is not finite")
+    return event
+
+
+def read_events(handle, max_bytes=4 << 20):
+    """
+    Complete JSONL lines available from the handle's position (at most
+    about `max_bytes`); a trailing partial line is left for the next read.
+    A complete line longer than `max_bytes` is skipped whole. Returns
+    (events, rejects, bytes consumed); rejects are (offset, error, line
+    prefix) for the lines that are not valid events.
+    """
+    start = handle.tell()
+    chunk = handle.read(max_bytes)
+    end = chunk.rfind(b'\n') + 1
+    if end == 0:
+        if len(chunk) < max_bytes:
+            # Partial last line; wait for the writer to finish it
+            handle.seek(start)
+            return [], [], 0
+        rejects, consumed = _skip_long_line(handle, start, chunk, max_bytes)
+        return [], rejects, consumed
+
+    handle.seek(start + end)
+    events, rejects = [], []
+    position = start
+    for line in chunk[:end].split(b'\n')[:-1]:
+        if line.strip():
+            try:
+                events.append(parse_event(line))
+            except ValueError as e:
+                rejects.append((position, str(e), line[:200].decode('utf-8', 'replace')))
+        position += len(line) + 1
+    return events, rejects, end
+
+
+def _skip_long_line(handle, start, head, max_bytes):
+    """
+    (rejects, bytes consumed) past a line longer than one read that
+    starts at `start`; nothing is consumed until its newline is written
+    """
+    consumed = len(head)
+    while True:
+        more = handle.read(max_bytes)
+        newline = more.find(b'\n')
+        if newline >= 0:
+            consumed += newline + 1
+            handle.seek(start + consumed)
+            return [(start, f"line longer than {len(head):,} bytes ({consumed:,})",
+                     head[:200].decode('utf-8', 'replace'))], consumed
+        if not more:
+            handle.seek(start)
+            return [], 0
+        consumed += len(more)
+
+
+def event_arrays(events):
+    """
+    Column arrays (order ids, customer ids, epoch seconds, amounts) for a batch
+    """
+    orders = [event['order_id'] for event in events]
+    customers = np.array([event['customer_id'] for event in events], dtype=object)
+    timestamps = np.array([event['timestamp'] for event in events], dtype='datetime64[s]').astype(np.int64)
+    amounts = np.array([event['amount'] for event in events], dtype=np.float64)
+    return orders, customers, timestamps, amounts
+
+
+class OrderConsumer:
+    """
+    Tails an order event file and keeps live segments for every customer
+    """
+
+    def __init__(self, events_path, changes_path, checkpoint_path=None,
+                 checkpoint_interval=30.0, full_rescore_every=100, dedupe_days=30, rejects_path=None):
+        self.events_path = events_path
+        self.changes_path = changes_path
+        self.rejects_path = rejects_path
+        self.checkpoint_path = checkpoint_path
+        self.checkpoint_interval = checkpoint_interval
+        self.full_rescore_every = full_rescore_every
+        self.offset = 0
+        self.state = CustomerState(dedupe_days=dedupe_days)
+        if checkpoint_path and os.path.exists(checkpoint_path):
+            self.state, self.offset = CustomerState.load(checkpoint_path, dedupe_days)
+        self.events = 0
+        self.duplicates = 0
+        self.rejected = 0
+        self.changes = 0
+        self.batches = 0
+        self.stopping = False
+
+    def stop(self):
+        """
+        Ask run() to return after the current batch (safe from a signal handler)
+        """
+        self.stopping = True
+
+    def checkpoint(self):
+        if self.checkpoint_path:
+            self.state.save(self.checkpoint_path, self.offset)
+
+    def reject(self, rejects):
+        """
+        Log lines that are not valid events and append them to the reject file
+        """
+        for offset, error, line in rejects:
+            log.warning("Skipping event at byte %d of %s: %s", offset, self.events_path, error)
+        if self.rejects_path:
+            with open(self.rejects_path, 'a') as handle:
+                handle.writelines(json.dumps({'offset': offset, 'error': error, 'line': line}) + '\n'
+                                  for offset, error, line in rejects)
+        self.rejected += len(rejects)
+
+    def process(self, events, changes_log):
+        """
+        Apply one micro-batch and log the segment changes it caused
+        """
+        orders, customers, timestamps, amounts = event_arrays(events)
+        fresh = self.state.new_orders(orders, timestamps)
+        self.duplicates += len(events) - int(fresh.sum())
+        if not fresh.any():
+            return
+        customers, timestamps, amounts = customers[fresh], timestamps[fresh], amounts[fresh]
+        rows = self.state.apply(customers, timestamps, amounts)
+        self.state.prune_orders()
+        self.batches += 1
+        # Recency drifts for everyone as time moves on, so rescore the
+        # whole population every `full_rescore_every` batches
+        if self.full_rescore_every and self.batches % self.full_rescore_every == 0:
+            rows = np.arange(len(self.state))
+        changed, old, new = self.state.rescore(rows)
+
+        event_time = str(np.datetime64(self.state.now, 's')).replace('T', ' ')
+        ids = self.state.ids
+        changes_log.writelines(
+            json.dumps({'customer_id': ids[row], 'old_segment': SEGMENT_NAMES[o] if o >= 0 else None,
+                        'new_segment': SEGMENT_NAMES[n], 'event_time': event_time}) + '\n'
+            for row, o, n in zip(changed.tolist(), old.tolist(), new.tolist())
+        )
+        self.events += len(timestamps)
+        self.changes += len(changed)
+
+    def run(self, follow=True, poll_interval=0.5, max_bytes=4 << 20):
+        """
+        Consume until the end of the file (follow=False), forever, or until
+        stop() is called. Checkpoints are only taken between batches, once
+        the batch and its offset are both applied. Run from the main thread,
+        the first Ctrl+C calls stop(); a second one interrupts at once
+        (without a final checkpoint).
+        """
+        self.stopping = False
+        handle_interrupt = threading.current_thread() is threading.main_thread()
+        if handle_interrupt:
+            previous_handler = signal.getsignal(signal.SIGINT)
+            if previous_handler is None:  # installed outside Python
+                previous_handler = signal.default_int_handler
+
+            def on_interrupt(signum, frame):
+                signal.signal(signal.SIGINT, previous_handler)
+                self.stop()
+            signal.signal(signal.SIGINT, on_interrupt)
+        try:
+            self._consume(follow, poll_interval, max_bytes)
+        finally:
+            if handle_interrupt:
+                signal.signal(signal.SIGINT, previous_handler)
+        self.checkpoint()
+
+    def _consume(self, follow, poll_interval, max_bytes):
+        last_checkpoint = time.monotonic()
+        with open(self.events_path, 'rb') as events_file, open(self.changes_path, 'a') as changes_log:
+            events_file.seek(self.offset)
+            while True:
+                events, rejects, consumed = read_events(events_file, max_bytes)
+                if rejects:
+                    self.reject(rejects)
+                if events:
+                    self.process(events, changes_log)
+                self.offset += consumed
+
+                if time.monotonic() - last_checkpoint >= self.checkpoint_interval:
+                    changes_log.flush()
+                    self.checkpoint()
+                    last_checkpoint = time.monotonic()
+
+                if self.stopping:
+                    break
+                if not consumed:
+                    if not follow:
+                        break
+                    time.sleep(poll_interval)
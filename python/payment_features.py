@@ -0,0 +1,74 @@
+# payment_features.py
+# ============================================
+# PAYMENT BEHAVIOUR FEATURES
+# ============================================
+#
+# prepared_data repeats every payment once per order item, so payments
+# are first reduced to one row per (order, payment_sequential). Orders
+# and payment types are then integer codes and every order and
+# customer total is a bincount over them: installments, payment value
+# per type and number of payments per order, rolled up to the
+# customer. The result has exactly one row per customer and is
+# aligned onto the metrics by index, so joining it cannot fan out.
+
+import numpy as np
+import pandas as pd
+
+PAYMENT_SOURCE_COLUMNS = ['order_id', 'payment_sequential', 'payment_type', 'payment_installments', 'payment_value']
+
+# Fixed column set; any other payment type is counted as 'other'
+PAYMENT_TYPES = ['credit_card', 'boleto', 'voucher', 'debit_card', 'other']
+
+PAYMENT_COLUMNS = ['avg_installments', 'installment_order_share', 'split_payment_share'] + \
+                  [f'payment_share_{payment_type}' for payment_type in PAYMENT_TYPES]
+
+
+def has_payment_columns(data):
+    return all(col in data.columns for col in PAYMENT_SOURCE_COLUMNS)
+
+
+def payment_features(data, customer='customer_unique_id'):
+    """
+    One row per customer (index) with PAYMENT_COLUMNS:
+      avg_installments          mean of each order's largest installment count
+      installment_order_share   share of orders paid in more than one installment
+      split_payment_share       share of orders paid with more than one payment
+      payment_share_<type>      share of the customer's payment value per type
+    """
+    payments = data[[customer] + PAYMENT_SOURCE_COLUMNS].dropna(subset=['payment_value'])
+    payments = payments.drop_duplicates(['order_id', 'payment_sequential'])
+
+    order_codes, orders = pd.factorize(payments['order_id'])
+    type_codes = pd.Categorical(payments['payment_type'], categories=PAYMENT_TYPES).codes.astype(np.int64)
+    type_codes[type_codes < 0] = PAYMENT_TYPES.index('other')
+    n_orders, n_types = len(orders), len(PAYMENT_TYPES)
+
+    # Order level
+    payments_per_order = np.bincount(order_codes, minlength=n_orders)
+    installments = np.zeros(n_orders)
+    np.maximum.at(installments, order_codes, payments['payment_installments'].to_numpy(dtype=float))
+    value = payments['payment_value'].to_numpy(dtype=float)
+    order_type_value = np.bincount(order_codes * n_types + type_codes, weights=value,
+                                   minlength=n_orders * n_types).reshape(n_orders, n_types)
+
+    # Customer of each order; factorize numbers orders by first appearance,
+    # so the first rows come out in order-code order
+    first_rows = ~payments['order_id'].duplicated().to_numpy()
+    customer_codes, customers = pd.factorize(payments[customer].to_numpy()[first_rows])
+    n_customers = len(customers)
+
+    # Customer level
+    order_count = np.bincount(customer_codes, minlength=n_customers)
+    type_value = np.column_stack([np.bincount(customer_codes, weights=order_type_value[:, t], minlength=n_customers)
+                                  for t in range(n_types)])
+    total_value = type_value.sum(axis=1, keepdims=True)
+
+    features = pd.DataFrame({
+        'avg_installments': np.bincount(customer_codes, weights=installments, minlength=n_customers) / order_count,
+        'installment_order_share': np.bincount(customer_codes, weights=installments > 1, minlength=n_customers) / order_count,
+        'split_payment_share': np.bincount(customer_codes, weights=payments_per_order > 1, minlength=n_customers) / order_count,
+    }, index=pd.Index(customers, name=customer))
+    shares = np.divide(type_value, total_value, out=np.zeros_like(type_value), where=total_value > 0)
+    for i, payment_type in enumerate(PAYMENT_TYPES):
+        features[f'payment_share_{payment_type}'] = shares[:, i]
+    return features
@@ -0,0 +1,278 @@
+# regression_gate.py
+# ============================================
+# FIXTURE RUNS, GOLDEN OUTPUTS AND BUDGETS
+# ============================================
+#
+# Used by benchmark_regression.py. The pipeline runs on a small fixed
+# fixture dataset (regression/fixture) in a scratch project directory,
+# one subprocess per stage, so each stage's wall time and peak RSS are
+# measured on their own. Stage outputs are compared to the golden
+# copies in regression/golden (numbers within a tolerance, everything
+# else exactly), timings are checked against regression/budgets.json,
+# and every run is appended to regression/history.csv so trends can be
+# plotted per commit. The history is local to the machine that ran the
+# gate (gitignored), since timings from different machines don't compare.
+
+import json
+import os
+import subprocess
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from data_loader import SOURCE_TABLES
+from tenant_batch import PIPELINE_STEPS, prepare_tenant, run_step
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+REGRESSION_DIR = os.path.join(os.path.dirname(SCRIPTS_DIR), 'regression')
+FIXTURE_DIR = os.path.join(REGRESSION_DIR, 'fixture')
+GOLDEN_DIR = os.path.join(REGRESSION_DIR, 'golden')
+BUDGETS_FILE = os.path.join(REGRESSION_DIR, 'budgets.json')
+HISTORY_FILE = os.path.join(REGRESSION_DIR, 'history.csv')
+
+# Golden output -> folder of the project dir it is written to
+GOLDEN_OUTPUTS = {
+    'customer_metrics.csv': 'data',         # 03
+    'segmented_customers.csv': 'data',      # 04: RFM scores and segments
+    'segment_analysis.csv': 'reports',      # 04
+    'segment_summary.csv': 'reports',       # 06
+}
+
+HISTORY_COLUMNS = ['run_at', 'commit', 'stage', 'seconds', 'peak_rss_mb', 'status']
+
+
+def make_fixture(output_dir, customers=1500, seed=7):
+    """
+    Write a small synthetic dataset in the Olist CSV layout: a few percent
+    repeat buyers, mostly delivered orders, 1-3 items and 1-2 payments per order
+    """
+    rng = np.random.default_rng(seed)
+    os.makedirs(output_dir, exist_ok=True)
+
+    def hex_ids(prefix, n):
+        return [f'{prefix}{i:031x}' for i in range(n)]
+
+    states = ['SP', 'RJ', 'MG', 'RS', 'PR', 'SC', 'BA', 'DF', 'GO', 'ES', 'PE', 'CE']
+    state_weights = np.array([42, 13, 12, 6, 5, 4, 3.5, 2.2, 2.1, 2, 1.7, 1.4])
+    unique_ids = hex_ids('u', customers)
+    state = rng.choice(states, customers, p=state_weights / state_weights.sum())
+
+    # One customer_id per order, several orders for repeat buyers
+    orders_per_customer = np.where(rng.random(customers) < 0.04, rng.integers(2, 5, customers), 1)
+    owner = np.repeat(np.arange(customers), orders_per_customer)
+    n_orders = len(owner)
+    customer_ids = hex_ids('c', n_orders)
+    order_ids = hex_ids('o', n_orders)
+
+    pd.DataFrame({
+        'customer_id': customer_ids,
+        'customer_unique_id': np.asarray(unique_ids)[owner],
+        'customer_zip_code_prefix': rng.integers(1000, 99999, customers)[owner],
+        'customer_city': np.char.add('city_', (rng.integers(0, 60, customers)).astype(str))[owner],
+        'customer_state': state[owner],
+    }).to_csv(os.path.join(output_dir, SOURCE_TABLES['customers']), index=False)
+
+    start = pd.Timestamp('2016-10-01')
+    purchase = start + pd.to_timedelta(rng.integers(0, 700 * 86400, n_orders), unit='s')
+    approved = purchase + pd.to_timedelta(rng.integers(600, 2 * 86400, n_orders), unit='s')
+    carrier = approved + pd.to_timedelta(rng.integers(86400, 5 * 86400, n_orders), unit='s')
+    delivered = carrier + pd.to_timedelta(rng.integers(86400, 25 * 86400, n_orders), unit='s')
+    estimated = purchase + pd.to_timedelta(rng.integers(10, 35, n_orders), unit='D')
+    status = rng.choice(['delivered', 'shipped', 'canceled', 'invoiced'], n_orders, p=[0.94, 0.03, 0.02, 0.01])
+    fmt = '%Y-%m-%d %H:%M:%S'
+    pd.DataFrame({
+        'order_id': order_ids,
+        'customer_id': customer_ids,
+        'order_status': status,
+        'order_purchase_timestamp': purchase.strftime(fmt),
+        'order_approved_at': approved.strftime(fmt),
+        'order_delivered_carrier_date': carrier.strftime(fmt),
+        'order_delivered_customer_date': np.where(status == 'delivered', delivered.strftime(fmt), ''),
+        'order_estimated_delivery_date': estimated.strftime(fmt),
+    }).to_csv(os.path.join(output_dir, SOURCE_TABLES['orders']), index=False)
+
+    items_per_order = rng.choice([1, 2, 3], n_orders, p=[0.85, 0.11, 0.04])
+    item_order = np.repeat(np.arange(n_orders), items_per_order)
+    item_number = np.concatenate([np.arange(1, k + 1) for k in items_per_order])
+    price = np.round(rng.lognormal(4.4, 0.8, len(item_order)), 2)
+    items = pd.DataFrame({
+        'order_id': np.asarray(order_ids)[item_order],
+        'order_item_id': item_number,
+        'product_id': np.asarray(hex_ids('p', 300))[rng.integers(0, 300, len(item_order))],
+        'seller_id': np.asarray(hex_ids('s', 80))[rng.integers(0, 80, len(item_order))],
+        'shipping_limit_date': (purchase[item_order] + pd.Timedelta(days=6)).strftime(fmt),
+        'price': price,
+        'freight_value': np.round(rng.uniform(5, 40, len(item_order)), 2),
+    })
+    items.to_csv(os.path.join(output_dir, SOURCE_TABLES['items']), index=False)
+
+    # Payments add up to the order total; some orders split it over two methods
+    order_total = np.bincount(item_order, weights=price + items['freight_value'].to_numpy(), minlength=n_orders)
+    split = rng.random(n_orders) < 0.05
+    share = np.where(split, rng.uniform(0.2, 0.8, n_orders), 1.0)
+    first_type = rng.choice(['credit_card', 'boleto', 'voucher', 'debit_card'], n_orders, p=[0.74, 0.19, 0.05, 0.02])
+    payments = pd.DataFrame({
+        'order_id': np.concatenate([order_ids, np.asarray(order_ids)[split]]),
+        'payment_sequential': np.concatenate([np.ones(n_orders, dtype=int), np.full(split.sum(), 2)]),
+        'payment_type': np.concatenate([first_type, np.full(split.sum(), 'voucher')]),
+        'payment_installments': np.concatenate([np.where(first_type == 'credit_card',
+                                                         rng.integers(1, 11, n_orders), 1),
+                                                np.ones(split.sum(), dtype=int)]),
+        'payment_value': np.round(np.concatenate([order_total * share, (order_total * (1 - share))[split]]), 2),
+    }).sort_values(['order_id', 'payment_sequential'])
+    payments.to_csv(os.path.join(output_dir, SOURCE_TABLES['payments']), index=False)
+    return n_orders
+
+
+def run_fixture(project_dir, steps=PIPELINE_STEPS, fixture_dir=FIXTURE_DIR, memory_bytes=None):
+    """
+    Run the pipeline stages on the fixture in `project_dir`. Returns one
+    record per stage: stage, status, seconds, peak_rss_mb.
+    """
+    prepare_tenant(fixture_dir, project_dir)
+    records = []
+    for script in steps:
+        returncode, seconds, peak_rss = run_step(script, project_dir, memory_bytes)
+        records.append({'stage': script.split('_')[0], 'status': 'ok' if returncode == 0 else 'failed',
+                        'seconds': seconds,
+                        'peak_rss_mb': peak_rss / 1024**2 if peak_rss is not None else np.nan})
+        if returncode != 0:
+            break
+    return records
+
+
+def compare_frames(actual, golden, rtol=1e-6, atol=1e-6):
+    """
+    Differences between an output and its golden copy, as messages
+    (empty when they match)
+    """
+    problems = []
+    if list(actual.columns) != list(golden.columns):
+        missing = [c for c in golden.columns if c not in actual.columns]
+        extra = [c for c in actual.columns if c not in golden.columns]
+        problems.append(f"columns differ (missing: {missing or '-'}, new: {extra or '-'})")
+    if len(actual) != len(golden):
+        problems.append(f"{len(actual):,} rows, golden has {len(golden):,}")
+        return problems
+
+    for col in [c for c in golden.columns if c in actual.columns]:
+        a, g = actual[col], golden[col]
+        if pd.api.types.is_numeric_dtype(g) and pd.api.types.is_numeric_dtype(a):
+            close = np.isclose(a.to_numpy(dtype=float), g.to_numpy(dtype=float), rtol=rtol, atol=atol, equal_nan=True)
+        else:
+            close = (a.astype(str) == g.astype(str)).to_numpy()
+        if not close.all():
+            row = int(np.argmin(close))
+            problems.append(f"{col}: {(~close).sum():,} rows differ (first at row {row}: "
+                            f"{a.iloc[row]}, golden {g.iloc[row]})")
+    return problems
+
+
+def check_outputs(project_dir, golden_dir=GOLDEN_DIR, rtol=1e-6, atol=1e-6):
+    """
+    {golden file: [problems]} for every golden output
+    """
+    results = {}
+    for name, folder in GOLDEN_OUTPUTS.items():
+        path = os.path.join(project_dir, folder, name)
+        if not os.path.exists(path):
+            results[name] = ['not produced']
+            continue
+        results[name] = compare_frames(pd.read_csv(path), pd.read_csv(os.path.join(golden_dir, name)), rtol, atol)
+    return results
+
+
+def update_golden(project_dir, golden_dir=GOLDEN_DIR):
+    os.makedirs(golden_dir, exist_ok=True)
+    for name, folder in GOLDEN_OUTPUTS.items():
+        pd.read_csv(os.path.join(project_dir, folder, name)).to_csv(os.path.join(golden_dir, name), index=False)
+
+
+def load_budgets(budgets_file=BUDGETS_FILE):
+    if not os.path.exists(budgets_file):
+        return {}
+    with open(budgets_file) as handle:
+        return json.load(handle)
+
+
+def save_budgets(timings, headroom, budgets_file=BUDGETS_FILE, min_slack_seconds=1.0):
+    """
+    Budgets from a run's timings: each stage's seconds and peak RSS times
+    `headroom`, with at least `min_slack_seconds` of slack so sub-second
+    stages don't fail on scheduler noise or a slower machine
+    """
+    budgets = {row.stage: {'seconds': round(max(row.seconds * headroom, row.seconds + min_slack_seconds), 2),
+                           'peak_rss_mb': round(row.peak_rss_mb * headroom, 1)}
+               for row in timings.itertuples()}
+    with open(budgets_file, 'w') as handle:
+        json.dump(budgets, handle, indent=2, sort_keys=True)
+        handle.write('\n')
+    return budgets
+
+
+def check_budgets(timings, budgets):
+    """
+    Messages for every stage over its time or memory budget
+    """
+    problems = []
+    for row in timings.itertuples():
+        budget = budgets.get(row.stage)
+        if not budget:
+            continue
+        if row.seconds > budget['seconds']:
+            problems.append(f"stage {row.stage} took {row.seconds:.2f}s (budget {budget['seconds']:.2f}s)")
+        if row.peak_rss_mb > budget['peak_rss_mb']:
+            problems.append(f"stage {row.stage} peaked at {row.peak_rss_mb:.0f} MB "
+                            f"(budget {budget['peak_rss_mb']:.0f} MB)")
+    return problems
+
+
+def current_commit():
+    """
+    Short hash of the checked-out commit, '+dirty' when the tree has changes
+    """
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=SCRIPTS_DIR,
+                                capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=SCRIPTS_DIR,
+                               capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+    return commit + ('+dirty' if dirty else '')
+
+
+def append_history(timings, history_file=HISTORY_FILE, commit=None):
+    """
+    Add a run's per-stage timings to the history CSV
+    """
+    history = timings.assign(run_at=datetime.now().isoformat(timespec='seconds'),
+                             commit=commit or current_commit())[HISTORY_COLUMNS]
+    history.round({'seconds': 3, 'peak_rss_mb': 1}).to_csv(
+        history_file, mode='a', header=not os.path.exists(history_file), index=False)
+
+
+def plot_history(history_file, output_file):
+    """
+    Seconds and peak RSS per stage over the recorded runs
+    """
+    from segmentation.plotting import load_plotting
+    plt, _ = load_plotting()
+
+    history = pd.read_csv(history_file)
+    runs = history[['run_at', 'commit']].drop_duplicates().reset_index(drop=True)
+    run_index = {run: i for i, run in enumerate(runs['run_at'])}
+    fig, axes = plt.subplots(2, 1, figsize=(12, 8), sharex=True)
+    for stage, rows in history.groupby('stage'):
+        x = rows['run_at'].map(run_index)
+        axes[0].plot(x, rows['seconds'], marker='o', label=stage)
+        axes[1].plot(x, rows['peak_rss_mb'], marker='o', label=stage)
+    axes[0].set_ylabel('Wall time (s)')
+    axes[1].set_ylabel('Peak RSS (MB)')
+    axes[1].set_xticks(range(len(runs)))
+    axes[1].set_xticklabels(runs['commit'], rotation=45, ha='right', fontsize=8)
+    axes[0].legend(title='Stage', ncol=len(history['stage'].unique()))
+    axes[0].set_title('Pipeline stage performance by commit', fontsize=14, fontweight='bold')
+    plt.tight_layout()
+    plt.savefig(output_file, dpi=150)
+    plt.close()
@@ -0,0 +1,120 @@
+# report_renderer.py
+# ============================================
+# COMPILED HTML TEMPLATES WITH CACHED PARTIALS
+# ============================================
+#
+# Templates use the same placeholder syntax as f-strings
+# ("{total_customers:,}", literal braces written as "{{" / "}}"),
+# but are parsed once into literal/field chunks so rendering is a
+# plain join. Each report section is rendered from its own context
+# dict; the rendered HTML is cached on disk keyed by a hash of that
+# context, so a section is only re-rendered when its inputs change.
+
+import base64
+import hashlib
+import json
+import os
+import string
+
+_formatter = string.Formatter()
+
+
+class CompiledTemplate:
+    """
+    A template parsed once into (literal, field, format_spec) chunks
+    """
+
+    def __init__(self, source):
+        self.chunks = []
+        for literal, field, spec, conversion in _formatter.parse(source):
+            if conversion:
+                raise ValueError(f"Conversions are not supported: !{conversion}")
+            self.chunks.append((literal, field, spec or ''))
+
+    def render(self, context):
+        parts = []
+        for literal, field, spec in self.chunks:
+            parts.append(literal)
+            if field is not None:
+                parts.append(format(context[field], spec))
+        return ''.join(parts)
+
+
+def context_key(context):
+    """
+    Stable hash of a section's input aggregates
+    """
+    payload = json.dumps(context, sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+class ReportRenderer:
+    """
+    Renders named sections and reuses cached partials whose inputs are unchanged
+    """
+
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+        self.cache_file = os.path.join(cache_dir, 'partials.json')
+        self.templates = {}
+        self.rendered = []
+        self.reused = []
+        os.makedirs(cache_dir, exist_ok=True)
+        try:
+            with open(self.cache_file, encoding='utf-8') as f:
+                self.cache = json.load(f)
+        except (OSError, ValueError):
+            self.cache = {}
+
+    def compile(self, name, source):
+        if name not in self.templates:
+            self.templates[name] = CompiledTemplate(source)
+        return self.templates[name]
+
+    def section(self, name, source, context=None, rows=None, row_source=None):
+        """
+        Render one section. `rows` is an optional list of row contexts
+        rendered with `row_source` and exposed to the section as {rows}.
+        """
+        context = dict(context or {})
+        key = context_key({'context': context, 'rows': rows, 'source': source, 'row_source': row_source})
+
+        cached = self.cache.get(name)
+        if cached and cached['key'] == key:
+            self.reused.append(name)
+            return cached['html']
+
+        if rows is not None:
+            row_template = self.compile(name + ':row', row_source)
+            context['rows'] = ''.join(row_template.render(row) for row in rows)
+        html = self.compile(name, source).render(context)
+
+        self.cache[name] = {'key': key, 'html': html}
+        self.rendered.append(name)
+        return html
+
+    def save(self):
+        with open(self.cache_file, 'w', encoding='utf-8') as f:
+            json.dump(self.cache, f)
+
+
+def thumbnail_data_uri(image_path, cache_dir, scale=0.25):
+    """
+    Downscale a PNG chart and return it as a base64 data URI.
+    Thumbnails are cached by source size, mtime and scale.
+    """
+    stat = os.stat(image_path)
+    tag = f"{os.path.basename(image_path)}|{stat.st_size}|{stat.st_mtime_ns}|{scale}"
+    thumb_file = os.path.join(cache_dir, 'thumb_' + hashlib.sha1(tag.encode('utf-8')).hexdigest() + '.png')
+
+    if not os.path.exists(thumb_file):
+        # Imported here so plain report runs never pay for matplotlib
+        import matplotlib
+        matplotlib.use('Agg')
+        import matplotlib.image as mpimg
+        os.makedirs(cache_dir, exist_ok=True)
+        mpimg.thumbnail(image_path, thumb_file, scale=scale)
+
+    with open(thumb_file, 'rb') as f:
+        encoded = base64.b64encode(f.read()).decode('ascii')
+    return f"data:image/png;base64,{encoded}"
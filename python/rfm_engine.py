@@ -0,0 +1,141 @@
+# rfm_engine.py
+# ============================================
+# ENTITY-AGNOSTIC RFM ENGINE
+# ============================================
+#
+# The metrics from 03_customer_metrics.py and the scoring/segment rules
+# from 04_rfm_segmentation.py, generalized to any entity key. The input
+# is (entity key, timestamp, order key, amount) rows, so the same code
+# segments customers, sellers, product categories or states.
+# 03 loads prepared_data.csv once and runs rfm_metrics() for customers
+# and sellers on the same in-memory frame.
+
+import numpy as np
+import pandas as pd
+
+
+def rfm_metrics(data, entity, timestamp='order_purchase_timestamp', order='order_id',
+                amount='price', latest_date=None, extra=None):
+    """
+    Vectorized RFM metrics per entity.
+
+    Returns one row per entity with: <entity>, recency_days, frequency,
+    monetary, any `extra` named aggregations ({name: (column, func)}),
+    avg_order_value, lifetime_days, is_repeat and avg_days_between.
+    """
+    if latest_date is None:
+        latest_date = data[timestamp].max()
+
+    aggregations = {
+        'last_purchase': (timestamp, 'max'),
+        'first_purchase': (timestamp, 'min'),
+        'frequency': (order, 'nunique'),
+        'monetary': (amount, 'sum'),
+        'rows': (timestamp, 'size'),
+    }
+    aggregations.update(extra or {})
+    metrics = data.groupby(entity).agg(**aggregations).reset_index()
+
+    metrics.insert(1, 'recency_days', (latest_date - metrics['last_purchase']).dt.days)
+    metrics['avg_order_value'] = metrics['monetary'] / metrics['frequency']
+    metrics['lifetime_days'] = (metrics['last_purchase'] - metrics['first_purchase']).dt.days
+    metrics['is_repeat'] = (metrics['frequency'] > 1).astype(int)
+    # Span between first and last purchase row, spread over the rows in between
+    rows = metrics['rows']
+    metrics['avg_days_between'] = np.where(rows > 1, metrics['lifetime_days'] / (rows - 1).clip(lower=1), 0)
+
+    ordered = [entity, 'recency_days', 'frequency', 'monetary'] + list(extra or {}) + \
+              ['avg_order_value', 'lifetime_days', 'is_repeat', 'avg_days_between']
+    return metrics[ordered]
+
+
+def create_rfm_scores(df):
+    """
+    Create RFM scores for each entity
+    """
+    df_copy = df.copy()
+
+    # Recency score: lower days = higher score
+    # Use quantiles to create 5 groups
+    try:
+        df_copy['r_quartile'] = pd.qcut(df_copy['recency_days'], q=5, labels=False, duplicates='drop')
+        # Reverse so that lower recency gets higher score
+        df_copy['r_score'] = 5 - df_copy['r_quartile']
+    except:
+        # If quantiles fail, use manual bins
+        bins = [0, 30, 60, 90, 180, df_copy['recency_days'].max()]
+        df_copy['r_score'] = pd.cut(df_copy['recency_days'], bins=bins, labels=[5,4,3,2,1])
+
+    # Frequency score: higher frequency = higher score
+    try:
+        df_copy['f_score'] = pd.qcut(df_copy['frequency'].rank(method='first'), q=5, labels=False, duplicates='drop') + 1
+    except:
+        # If quantiles fail, use manual bins
+        bins = [0, 1, 2, 3, 5, df_copy['frequency'].max()]
+        df_copy['f_score'] = pd.cut(df_copy['frequency'], bins=bins, labels=[1,2,3,4,5])
+
+    # Monetary score: higher spend = higher score
+    try:
+        df_copy['m_score'] = pd.qcut(df_copy['monetary'].rank(method='first'), q=5, labels=False, duplicates='drop') + 1
+    except:
+        # If quantiles fail, use manual bins
+        bins = [0, 100, 500, 1000, 2000, df_copy['monetary'].max()]
+        df_copy['m_score'] = pd.cut(df_copy['monetary'], bins=bins, labels=[1,2,3,4,5])
+
+    # Convert to integers
+    df_copy['r_score'] = df_copy['r_score'].astype(int)
+    df_copy['f_score'] = df_copy['f_score'].astype(int)
+    df_copy['m_score'] = df_copy['m_score'].astype(int)
+
+    # Calculate total RFM score
+    df_copy['rfm_total'] = df_copy['r_score'] + df_copy['f_score'] + df_copy['m_score']
+
+    return df_copy
+
+
+# Score thresholds used by the segment rules (1-5 scale)
+DEFAULT_THRESHOLDS = {'high': 4, 'mid': 3, 'low': 2, 'lowest': 1}
+
+# Segment rules in priority order: the first matching rule wins
+SEGMENT_RULES = [
+    # Champions: high on everything (bought recently, buy often, spend a lot)
+    ('Champions', lambda r, f, m, t: (r >= t['high']) & (f >= t['high']) & (m >= t['high'])),
+    # Loyal Customers: high frequency, good spenders
+    ('Loyal Customers', lambda r, f, m, t: (f >= t['high']) & (m >= t['high'])),
+    # Potential Loyalists: recent buyers, average spend
+    ('Potential Loyalists', lambda r, f, m, t: (r >= t['high']) & (m >= t['mid'])),
+    # New Customers: recent buyers, low frequency
+    ('New Customers', lambda r, f, m, t: (r >= t['high']) & (f <= t['low'])),
+    # Promising: recent buyers, average metrics
+    ('Promising', lambda r, f, m, t: r >= t['high']),
+    # Need Attention: average recency and frequency
+    ('Need Attention', lambda r, f, m, t: (r >= t['mid']) & (r < t['high']) & (f >= t['mid']) & (m >= t['mid'])),
+    # At Risk - High Value: haven't bought recently, but used to be good
+    ('At Risk - High Value', lambda r, f, m, t: (r <= t['low']) & (f >= t['mid']) & (m >= t['high'])),
+    # At Risk: haven't bought recently, average spend
+    ('At Risk', lambda r, f, m, t: (r <= t['low']) & (m >= t['low'])),
+    # Hibernating: long time no buy, low spend
+    ('Hibernating', lambda r, f, m, t: (r <= t['low']) & (m <= t['low'])),
+    # Lost: very long time no buy, very low spend
+    ('Lost', lambda r, f, m, t: (r <= t['lowest']) & (m <= t['lowest'])),
+]
+
+# Everything else
+SEGMENT_NAMES = [name for name, _ in SEGMENT_RULES] + ['Other']
+
+
+def segment_codes(r, f, m, thresholds=DEFAULT_THRESHOLDS):
+    """
+    Index into SEGMENT_NAMES for every (r, f, m) score triple
+    """
+    conditions = [rule(r, f, m, thresholds) for _, rule in SEGMENT_RULES]
+    return np.select(conditions, np.arange(len(SEGMENT_RULES)), default=len(SEGMENT_RULES))
+
+
+def assign_segments(df, thresholds=DEFAULT_THRESHOLDS):
+    """
+    Assign segments from RFM scores for every row at once
+    """
+    codes = segment_codes(df['r_score'].to_numpy(), df['f_score'].to_numpy(),
+                          df['m_score'].to_numpy(), thresholds)
+    return np.asarray(SEGMENT_NAMES, dtype=object)[codes]
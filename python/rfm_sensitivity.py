@@ -0,0 +1,143 @@
+# rfm_sensitivity.py
+# ============================================
+# BATCHED RFM SCORING SCHEMES AND THRESHOLDS
+# ============================================
+#
+# Used by 10_rfm_sensitivity.py. A segment depends only on the
+# (r, f, m) score triple, so each scoring scheme is applied once to
+# the customer arrays and reduced to a small cell table (customers
+# and revenue per score triple, via bincount). Every threshold
+# variant is then evaluated on those k^3 cells instead of on every
+# customer, which makes hundreds of configurations cost milliseconds.
+
+import itertools
+
+import numpy as np
+import pandas as pd
+
+from rfm_engine import create_rfm_scores, segment_codes, SEGMENT_NAMES
+
+# Manual bins from create_rfm_scores' fallbacks (upper bounds; the last bin is open)
+FIXED_BINS = {
+    'recency_days': [30, 60, 90, 180],
+    'frequency': [1, 2, 3, 5],
+    'monetary': [100, 500, 1000, 2000],
+}
+
+
+def rank_scores(values, k, ascending=True):
+    """
+    Equal-count scores 1..k from the rank of each value; ties share a score
+    """
+    ranks = pd.Series(values).rank(method='min', ascending=ascending).to_numpy()
+    return np.minimum((ranks - 1) * k // len(values), k - 1).astype(np.int64) + 1
+
+
+def bin_scores(values, upper_bounds, ascending=True):
+    """
+    Scores 1..len(upper_bounds) + 1 from right-closed bins, like pd.cut
+    """
+    scores = np.searchsorted(upper_bounds, values, side='left') + 1
+    return scores if ascending else len(upper_bounds) + 2 - scores
+
+
+def log_scores(values, k, ascending=True):
+    """
+    Scores 1..k from equal-width bins of log1p(value) between min and max
+    """
+    logs = np.log1p(np.maximum(values, 0))
+    edges = np.linspace(logs.min(), logs.max(), k + 1)[1:-1]
+    return bin_scores(logs, edges, ascending)
+
+
+def quintile_scores(customers):
+    """
+    The pipeline's own scheme: create_rfm_scores from rfm_engine
+    """
+    scored = create_rfm_scores(customers[['recency_days', 'frequency', 'monetary']])
+    return scored['r_score'].to_numpy(), scored['f_score'].to_numpy(), scored['m_score'].to_numpy()
+
+
+# scheme name -> (score scale k, function(customers) -> (r, f, m))
+SCHEMES = {
+    'quintile': (5, quintile_scores),
+    'decile': (10, lambda c: (rank_scores(c['recency_days'], 10, ascending=False),
+                              rank_scores(c['frequency'], 10),
+                              rank_scores(c['monetary'], 10))),
+    'fixed': (5, lambda c: (bin_scores(c['recency_days'], FIXED_BINS['recency_days'], ascending=False),
+                            bin_scores(c['frequency'], FIXED_BINS['frequency']),
+                            bin_scores(c['monetary'], FIXED_BINS['monetary']))),
+    'log': (5, lambda c: (log_scores(c['recency_days'].to_numpy(), 5, ascending=False),
+                          log_scores(c['frequency'].to_numpy(), 5),
+                          log_scores(c['monetary'].to_numpy(), 5))),
+}
+
+
+def threshold_grid(k=5):
+    """
+    Every ordered threshold set lowest <= low < mid <= high on a 1..k scale
+    (2..k for `high`, so at least one score counts as high)
+    """
+    grid = []
+    for lowest, low, mid, high in itertools.product(range(1, k + 1), repeat=4):
+        if lowest <= low < mid <= high and high >= 2:
+            grid.append({'high': high, 'mid': mid, 'low': low, 'lowest': lowest})
+    return grid
+
+
+def score_cells(r, f, m, amounts, k):
+    """
+    Customers and revenue per (r, f, m) cell; returns the cell score
+    arrays and the two k^3 totals
+    """
+    flat = ((np.asarray(r) - 1) * k + (np.asarray(f) - 1)) * k + (np.asarray(m) - 1)
+    customers = np.bincount(flat, minlength=k ** 3)
+    revenue = np.bincount(flat, weights=amounts, minlength=k ** 3)
+    cell_r, cell_f, cell_m = np.unravel_index(np.arange(k ** 3), (k, k, k))
+    return (cell_r + 1, cell_f + 1, cell_m + 1), customers, revenue
+
+
+def evaluate_variants(customers, schemes=None, thresholds=None):
+    """
+    Segment sizes and revenue share for every scheme x threshold variant.
+
+    `thresholds` maps scheme name -> list of threshold dicts (default:
+    threshold_grid on the scheme's scale). Returns a long frame with one
+    row per (variant, segment).
+    """
+    amounts = customers['monetary'].to_numpy(dtype=float)
+    total_customers, total_revenue = len(customers), amounts.sum()
+    n_segments = len(SEGMENT_NAMES)
+
+    frames = []
+    variant_id = 0
+    for scheme in schemes or SCHEMES:
+        k, score = SCHEMES[scheme]
+        (cell_r, cell_f, cell_m), cell_customers, cell_revenue = score_cells(*score(customers), amounts, k)
+        occupied = cell_customers > 0
+        cell_r, cell_f, cell_m = cell_r[occupied], cell_f[occupied], cell_m[occupied]
+        cell_customers, cell_revenue = cell_customers[occupied], cell_revenue[occupied]
+
+        variants = (thresholds or {}).get(scheme) or threshold_grid(k)
+        sizes = np.empty((len(variants), n_segments))
+        revenue = np.empty((len(variants), n_segments))
+        for i, t in enumerate(variants):
+            codes = segment_codes(cell_r, cell_f, cell_m, t)
+            sizes[i] = np.bincount(codes, weights=cell_customers, minlength=n_segments)
+            revenue[i] = np.bincount(codes, weights=cell_revenue, minlength=n_segments)
+
+        params = pd.DataFrame(variants)
+        frame = pd.DataFrame({
+            'variant_id': np.repeat(np.arange(variant_id, variant_id + len(variants)), n_segments),
+            'scheme': scheme,
+            **{col: np.repeat(params[col].to_numpy(), n_segments) for col in ['high', 'mid', 'low', 'lowest']},
+            'segment': np.tile(SEGMENT_NAMES, len(variants)),
+            'customers': sizes.ravel().astype(np.int64),
+            'customer_pct': sizes.ravel() / total_customers * 100,
+            'revenue': revenue.ravel(),
+            'revenue_pct': revenue.ravel() / total_revenue * 100,
+        })
+        frames.append(frame)
+        variant_id += len(variants)
+
+    return pd.concat(frames, ignore_index=True)
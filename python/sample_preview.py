@@ -0,0 +1,187 @@
+# sample_preview.py
+# ============================================
+# STRATIFIED-SAMPLE PREVIEW WITH ERROR BOUNDS
+# ============================================
+#
+# Used by 03_customer_metrics.py and 04_rfm_segmentation.py --preview.
+# Customers are stratified by state x one-time/repeat and the same
+# fraction is drawn from every stratum (at least two customers, so each
+# stratum has a variance estimate). Every sampled customer carries the
+# weight N_h / n_h of its stratum. Scoring uses weighted quantiles so the
+# score cut points are estimates of the full-population ones, and the
+# per-segment counts and revenue are scaled back up with the standard
+# stratified estimator; their error bounds come from its variance (with
+# finite population correction), and the share columns use the ratio
+# estimator's linearized variance.
+
+from statistics import NormalDist
+
+import numpy as np
+import pandas as pd
+
+WEIGHT_COLUMN = 'sample_weight'
+
+
+def stratified_sample(strata, fraction, seed=0, min_per_stratum=2):
+    """
+    Indices of a stratified random sample of units.
+
+    `strata` holds a dense stratum code per unit. Each stratum keeps
+    round(fraction * size) units, at least `min_per_stratum` (or all of
+    them when smaller). Returns (sorted unit indices, weight per selected unit).
+    """
+    strata = np.asarray(strata)
+    sizes = np.bincount(strata)
+    take = np.minimum(sizes, np.maximum(np.rint(sizes * fraction).astype(int), min_per_stratum))
+
+    # Random order within each stratum; keep the first `take` of each
+    keys = np.random.default_rng(seed).random(len(strata))
+    order = np.lexsort((keys, strata))
+    starts = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+    ranks = np.arange(len(order)) - starts[strata[order]]
+    chosen = np.sort(order[ranks < take[strata[order]]])
+    return chosen, sizes[strata[chosen]] / take[strata[chosen]]
+
+
+def customer_strata(customers):
+    """
+    Stratum code per customer: state x is_repeat
+    """
+    state_codes, _ = pd.factorize(customers['state'], use_na_sentinel=False)
+    return state_codes * 2 + (customers['frequency'].to_numpy() > 1)
+
+
+def sample_prepared_data(data, fraction, seed=0):
+    """
+    Rows of prepared_data for a stratified sample of customers.
+
+    Returns (sampled rows, Series of sample weights indexed by
+    customer_unique_id). Strata come from each customer's first-row state
+    and distinct order count, i.e. the state and is_repeat of step 3.
+    """
+    codes, customer_ids = pd.factorize(data['customer_unique_id'])
+    first_rows = ~pd.Series(codes).duplicated().to_numpy()
+    states = pd.Series(index=codes[first_rows], data=data['customer_state'].to_numpy()[first_rows]).sort_index()
+
+    orders = data[['order_id']].assign(customer=codes).drop_duplicates()
+    frequency = np.bincount(orders['customer'].to_numpy(), minlength=len(customer_ids))
+
+    strata = customer_strata(pd.DataFrame({'state': states.to_numpy(), 'frequency': frequency}))
+    chosen, weights = stratified_sample(strata, fraction, seed)
+
+    keep = np.zeros(len(customer_ids), dtype=bool)
+    keep[chosen] = True
+    return data[keep[codes]], pd.Series(weights, index=customer_ids[chosen], name=WEIGHT_COLUMN)
+
+
+def _weighted_positions(values, weights):
+    """
+    Mid-point cumulative weight share of every unit, ties in input order
+    (the weighted counterpart of rank(method='first'))
+    """
+    order = np.argsort(values, kind='stable')
+    sorted_weights = weights[order]
+    positions = np.empty(len(values))
+    positions[order] = (np.cumsum(sorted_weights) - sorted_weights / 2) / sorted_weights.sum()
+    return positions
+
+
+def weighted_rfm_scores(customers, weights, q=5):
+    """
+    create_rfm_scores() for a weighted sample: the same 1-5 scores, with
+    quantile cut points taken from the weighted distribution
+    """
+    scored = customers.copy()
+    weights = np.asarray(weights, dtype=float)
+
+    # Recency: weighted quantile edges of the values (duplicate edges dropped, as qcut does)
+    recency = scored['recency_days'].to_numpy(dtype=float)
+    order = np.argsort(recency, kind='stable')
+    positions = _weighted_positions(recency, weights)[order]
+    edges = np.unique(np.interp(np.linspace(0, 1, q + 1), positions, recency[order]))
+    labels = np.clip(np.searchsorted(edges, recency, side='left') - 1, 0, max(len(edges) - 2, 0))
+    scored['r_score'] = q - labels
+
+    # Frequency and monetary: buckets of the weighted rank
+    for col, score in (('frequency', 'f_score'), ('monetary', 'm_score')):
+        positions = _weighted_positions(scored[col].to_numpy(dtype=float), weights)
+        scored[score] = np.minimum((positions * q).astype(int), q - 1) + 1
+
+    for score in ('r_score', 'f_score', 'm_score'):
+        scored[score] = scored[score].astype(int)
+    scored['rfm_total'] = scored['r_score'] + scored['f_score'] + scored['m_score']
+    return scored
+
+
+def _cell_sums(strata, n_strata, groups, n_groups, values):
+    """
+    Per (stratum, group) sums of `values` and of their squares
+    """
+    cells = strata * n_groups + groups
+    shape = (n_strata, n_groups)
+    return (np.bincount(cells, weights=values, minlength=n_strata * n_groups).reshape(shape),
+            np.bincount(cells, weights=values ** 2, minlength=n_strata * n_groups).reshape(shape))
+
+
+def _stratified_estimate(sizes, taken, sums, squares):
+    """
+    Estimated population totals per group from (strata, groups) sample
+    sums, and the variance of each estimate
+    """
+    sizes, taken = sizes[:, None], taken[:, None]
+    totals = (sizes / taken * sums).sum(axis=0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sample_var = np.where(taken > 1, (squares - sums ** 2 / taken) / (taken - 1), 0)
+    variances = (sizes ** 2 * (1 - taken / sizes) * np.clip(sample_var, 0, None) / taken).sum(axis=0)
+    return totals, variances
+
+
+def estimate_segments(customers, weight_col=WEIGHT_COLUMN, by='segment', confidence=0.95):
+    """
+    Full-population estimates per segment from a weighted stratified sample.
+
+    Returns a DataFrame indexed by segment with sample_customers and
+    customer_count, customer_pct, total_revenue and revenue_pct, each
+    with a <col>_error half-width at the given confidence.
+    """
+    _, strata = np.unique(customer_strata(customers), return_inverse=True)
+    n_strata = strata.max() + 1
+    taken = np.bincount(strata).astype(float)
+    # Every customer of a stratum carries the same weight N_h / n_h
+    sizes = np.bincount(strata, weights=customers[weight_col].to_numpy(dtype=float))
+
+    seg_codes, segments = pd.factorize(customers[by])
+    n_segments = len(segments)
+    monetary = customers['monetary'].to_numpy(dtype=float)
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+
+    population = sizes.sum()
+    counts, count_var = _stratified_estimate(sizes, taken, *_cell_sums(
+        strata, n_strata, seg_codes, n_segments, np.ones(len(customers))))
+    revenue_sums, revenue_squares = _cell_sums(strata, n_strata, seg_codes, n_segments, monetary)
+    revenue, revenue_var = _stratified_estimate(sizes, taken, revenue_sums, revenue_squares)
+
+    # Revenue share R_s = Y_s / Y: variance of the estimated total of
+    # m_i * (1[i in s] - R_s), divided by Y^2. Its per-stratum sums follow
+    # from the segment sums and the stratum totals.
+    total_revenue = revenue.sum()
+    shares = revenue / total_revenue
+    stratum_sums = revenue_sums.sum(axis=1, keepdims=True)
+    stratum_squares = revenue_squares.sum(axis=1, keepdims=True)
+    _, share_var = _stratified_estimate(sizes, taken, revenue_sums - shares * stratum_sums,
+                                        revenue_squares * (1 - 2 * shares) + shares ** 2 * stratum_squares)
+    share_var /= total_revenue ** 2
+
+    result = pd.DataFrame({
+        'sample_customers': np.bincount(seg_codes, minlength=n_segments),
+        'customer_count': counts,
+        'customer_count_error': z * np.sqrt(count_var),
+        # The population size is known exactly, so the share error is the count error scaled
+        'customer_pct': counts / population * 100,
+        'customer_pct_error': z * np.sqrt(count_var) / population * 100,
+        'total_revenue': revenue,
+        'total_revenue_error': z * np.sqrt(revenue_var),
+        'revenue_pct': shares * 100,
+        'revenue_pct_error': z * np.sqrt(share_var) * 100,
+    }, index=pd.Index(segments, name=by))
+    return result.sort_values('customer_count', ascending=False)
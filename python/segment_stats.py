@@ -0,0 +1,66 @@
+# segment_stats.py
+# ============================================
+# ONE-PASS PER-SEGMENT AGGREGATION KERNEL
+# ============================================
+#
+# Shared by 04_rfm_segmentation.py, 06_final_report.py and
+# 07_dashboard.py. Segments (and states) are factorized to integer
+# codes once, then every count, sum and mean comes from a bincount
+# over those codes, so the cost is linear in the number of customers
+# instead of segments x rows.
+
+import numpy as np
+import pandas as pd
+
+# Numeric columns summarised per segment (skipped when absent)
+STAT_COLUMNS = ['monetary', 'frequency', 'recency_days', 'avg_order_value',
+                'r_score', 'f_score', 'm_score', 'rfm_total',
+                'avg_lead_time_days', 'avg_approval_hours', 'delivered_orders', 'late_orders']
+
+
+def segment_stats(customers, by='segment', columns=STAT_COLUMNS, medians=('monetary',), top_col='state'):
+    """
+    Per-segment statistics in one pass over the customer table.
+
+    Returns a DataFrame indexed by segment (sorted by name) with:
+      count, <col>_sum and <col>_mean for each column (NaN skipped),
+      <col>_median for each column in `medians`,
+      repeat_rate (% of customers with frequency > 1),
+      top_<top_col> (most common value, ties broken by first label).
+    """
+    seg_codes, segments = pd.factorize(customers[by], sort=True)
+    n_segments = len(segments)
+
+    counts = np.bincount(seg_codes, minlength=n_segments)
+    stats = {'count': counts}
+
+    for col in columns:
+        if col not in customers.columns:
+            continue
+        values = customers[col].to_numpy(dtype=float)
+        present = ~np.isnan(values)
+        sums = np.bincount(seg_codes, weights=np.where(present, values, 0), minlength=n_segments)
+        stats[f'{col}_sum'] = sums
+        # Missing values are left out of the mean, as in pandas
+        stats[f'{col}_mean'] = sums / np.bincount(seg_codes, weights=present, minlength=n_segments)
+
+    if 'frequency' in customers.columns:
+        repeats = np.bincount(seg_codes, weights=(customers['frequency'].to_numpy() > 1), minlength=n_segments)
+        stats['repeat_rate'] = repeats / counts * 100
+
+    result = pd.DataFrame(stats, index=pd.Index(segments, name=by))
+
+    for col in medians:
+        if col in customers.columns:
+            result[f'{col}_median'] = customers[col].groupby(seg_codes).median().to_numpy()
+
+    if top_col and top_col in customers.columns:
+        # Value-count argmax on a dense segment x value table
+        value_codes, values = pd.factorize(customers[top_col], sort=True)
+        valid = value_codes >= 0
+        table = np.bincount(seg_codes[valid] * len(values) + value_codes[valid],
+                            minlength=n_segments * len(values)).reshape(n_segments, len(values))
+        top = np.asarray(values, dtype=object)[table.argmax(axis=1)] if len(values) else np.full(n_segments, 'N/A')
+        result[f'top_{top_col}'] = np.where(table.sum(axis=1) > 0, top, 'N/A')
+
+    return result
@@ -0,0 +1,45 @@
+# segmentation/__init__.py
+# ============================================
+# CUSTOMER SEGMENTATION LIBRARY
+# ============================================
+#
+# The pipeline logic from the numbered scripts as importable functions.
+# Importing the package does no work: names are resolved on first
+# attribute access, and matplotlib / seaborn are only imported by
+# segmentation.plotting when a chart is actually drawn.
+#
+#     import segmentation
+#     customers = segmentation.score_segments(segmentation.load_customer_metrics(path))
+#
+# The package lives next to the helper modules in python/ and imports
+# them directly, so python/ must be on sys.path (it is when running the
+# scripts or `python -m segmentation` from python/).
+
+import importlib
+
+# public name -> submodule that defines it
+_EXPORTS = {
+    'load_prepared_data': 'pipeline',
+    'load_customer_metrics': 'pipeline',
+    'compute_customer_metrics': 'pipeline',
+    'compute_seller_metrics': 'pipeline',
+    'score_segments': 'pipeline',
+    'segment_summary': 'pipeline',
+    'decode_customer_ids': 'pipeline',
+    'decode_seller_ids': 'pipeline',
+    'load_plotting': 'plotting',
+}
+
+__all__ = sorted(_EXPORTS)
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module 'segmentation' has no attribute {name!r}")
+    value = getattr(importlib.import_module(f'.{_EXPORTS[name]}', __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
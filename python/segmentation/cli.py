@@ -0,0 +1,103 @@
+# segmentation/cli.py
+# ============================================
+# COMMAND LINE ENTRY POINT
+# ============================================
+#
+# python -m segmentation {metrics,score,summary,top} [--data-dir DIR]
+#
+# Each command imports only what it needs, inside its handler, so
+# `--help` and argument errors return without loading pandas.
+
+import argparse
+import os
+import sys
+import time
+
+PROJECT_DIR = os.environ.get('SEGMENTATION_PROJECT_DIR',
+                             os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+DEFAULT_DATA_DIR = os.path.join(PROJECT_DIR, 'data')
+
+
+def run_metrics(args):
+    """
+    prepared_data.csv -> customer_metrics.csv and seller_metrics.csv (step 3)
+    """
+    from .pipeline import load_prepared_data, compute_customer_metrics, compute_seller_metrics, decode_seller_ids
+
+    data = load_prepared_data(os.path.join(args.data_dir, 'prepared_data.csv'))
+    latest_date = data['order_purchase_timestamp'].max()
+    customers = compute_customer_metrics(data, latest_date)
+    customers.to_csv(os.path.join(args.data_dir, 'customer_metrics.csv'), index=False)
+    sellers = compute_seller_metrics(data, latest_date)
+    decode_seller_ids(sellers, args.data_dir).to_csv(os.path.join(args.data_dir, 'seller_metrics.csv'), index=False)
+    return f"{len(customers):,} customers, {len(sellers):,} sellers"
+
+
+def run_score(args):
+    """
+    customer_metrics.csv -> segmented_customers.csv (scoring part of step 4)
+    """
+    from .pipeline import load_customer_metrics, score_segments, decode_customer_ids
+
+    customers = score_segments(load_customer_metrics(os.path.join(args.data_dir, 'customer_metrics.csv')))
+    output = args.output or os.path.join(args.data_dir, 'segmented_customers.csv')
+    decode_customer_ids(customers, args.data_dir).to_csv(output, index=False)
+    return f"{len(customers):,} customers scored -> {output}"
+
+
+def run_summary(args):
+    """
+    segmented_customers.csv -> per-segment summary on stdout or to --output
+    """
+    import pandas as pd
+    from .pipeline import segment_summary
+
+    summary = segment_summary(pd.read_csv(os.path.join(args.data_dir, 'segmented_customers.csv')))
+    if args.output:
+        summary.to_csv(args.output)
+        return f"{len(summary)} segments -> {args.output}"
+    print(summary.to_string())
+    return f"{len(summary)} segments"
+
+
+def run_top(args):
+    """
+    segmented_customers.csv -> top-N customers per segment (or segment x ...)
+    """
+    from top_customers import top_n_csv
+
+    top = top_n_csv(os.path.join(args.data_dir, 'segmented_customers.csv'), args.metric, args.count,
+                    by=args.by, segments=args.segment, largest=not args.smallest)
+    if args.output:
+        top.to_csv(args.output, index=False)
+        return f"{len(top):,} customers -> {args.output}"
+    print(top.to_string(index=False))
+    return f"{len(top):,} customers"
+
+
+COMMANDS = {'metrics': run_metrics, 'score': run_score, 'summary': run_summary, 'top': run_top}
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='python -m segmentation', description='Customer segmentation pipeline')
+    parser.add_argument('command', choices=list(COMMANDS), help='Pipeline step to run')
+    parser.add_argument('--data-dir', default=DEFAULT_DATA_DIR, help='Directory with the pipeline CSV files')
+    parser.add_argument('--output', help='Output file (score / summary / top)')
+    parser.add_argument('--metric', default='monetary', help='Ranking metric for top (default: monetary)')
+    parser.add_argument('-n', '--count', type=int, default=100, help='Customers per group for top (default: 100)')
+    parser.add_argument('--by', nargs='*', default=['segment'],
+                        help='Group columns for top, e.g. --by segment state (default: segment)')
+    parser.add_argument('--segment', action='append', help='Restrict top to a segment (repeatable)')
+    parser.add_argument('--smallest', action='store_true', help='Rank ascending instead of descending')
+    parser.add_argument('--timings', action='store_true', help='Report import and run time on stderr')
+    return parser
+
+
+def main(argv=None):
+    start = time.perf_counter()
+    args = build_parser().parse_args(argv)
+    message = COMMANDS[args.command](args)
+    print(f"✅ {args.command}: {message}")
+    if args.timings:
+        print(f"⏱️ {args.command} finished in {time.perf_counter() - start:.3f}s", file=sys.stderr)
+    return 0
@@ -0,0 +1,142 @@
+# segmentation/pipeline.py
+# ============================================
+# LOAD, MEASURE, SCORE, SEGMENT, SUMMARIZE
+# ============================================
+#
+# Steps 3 and 4 of the pipeline as functions. Only numpy and pandas are
+# imported, so the scoring path starts quickly; 03_customer_metrics.py
+# and 04_rfm_segmentation.py are thin wrappers around these.
+
+from typing import Mapping, Optional, Sequence
+
+import pandas as pd
+
+from rfm_engine import rfm_metrics, create_rfm_scores, assign_segments, DEFAULT_THRESHOLDS
+from segment_stats import segment_stats
+from id_codes import load_dictionaries
+from delivery_features import DELIVERY_EXTRA, DELIVERY_COLUMNS, add_delivery_features, has_delivery_columns
+from payment_features import PAYMENT_COLUMNS, payment_features, has_payment_columns
+
+# Per-customer aggregations on top of the RFM core
+CUSTOMER_EXTRA = {
+    'total_freight': ('freight_value', 'sum'),
+    'state': ('customer_state', 'first'),
+    'city': ('customer_city', 'first'),
+    'zip_prefix': ('customer_zip_code_prefix', 'first'),
+    # Product diversity
+    'unique_products': ('product_id', 'nunique'),
+}
+
+# Column order of customer_metrics.csv
+CUSTOMER_COLUMNS = ['customer_id', 'recency_days', 'frequency', 'monetary',
+                    'total_freight', 'state', 'city', 'zip_prefix',
+                    'avg_order_value', 'lifetime_days', 'is_repeat',
+                    'avg_days_between', 'unique_products']
+
+SELLER_EXTRA = {
+    'unique_customers': ('customer_unique_id', 'nunique'),
+    'unique_products': ('product_id', 'nunique'),
+}
+
+
+def load_prepared_data(path: str, columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+    """
+    prepared_data.csv with the purchase timestamp parsed
+    """
+    data = pd.read_csv(path, usecols=columns)
+    data['order_purchase_timestamp'] = pd.to_datetime(data['order_purchase_timestamp'])
+    return data
+
+
+def load_customer_metrics(path: str) -> pd.DataFrame:
+    return pd.read_csv(path)
+
+
+def compute_customer_metrics(data: pd.DataFrame, latest_date: Optional[pd.Timestamp] = None) -> pd.DataFrame:
+    """
+    One row per customer_unique_id, in the customer_metrics.csv layout.
+    When the order dates are present, delivery experience columns are
+    added to `data` and rolled up in the same groupby; payment behaviour
+    columns are aligned on when the payment columns are present.
+    """
+    extra, columns = dict(CUSTOMER_EXTRA), list(CUSTOMER_COLUMNS)
+    if has_delivery_columns(data):
+        add_delivery_features(data)
+        extra.update(DELIVERY_EXTRA)
+        columns += DELIVERY_COLUMNS
+    metrics = rfm_metrics(data, 'customer_unique_id', latest_date=latest_date, extra=extra)
+    if has_payment_columns(data):
+        # One row per customer on both sides: aligned by index, no merge fan-out
+        payments = payment_features(data).reindex(metrics['customer_unique_id'])
+        for col in PAYMENT_COLUMNS:
+            metrics[col] = payments[col].to_numpy()
+        columns += PAYMENT_COLUMNS
+    metrics = metrics.rename(columns={'customer_unique_id': 'customer_id'})
+    return metrics[columns]
+
+
+def compute_seller_metrics(data: pd.DataFrame, latest_date: Optional[pd.Timestamp] = None) -> pd.DataFrame:
+    return rfm_metrics(data, 'seller_id', latest_date=latest_date, extra=SELLER_EXTRA)
+
+
+def score_segments(metrics: pd.DataFrame, thresholds: Mapping[str, int] = DEFAULT_THRESHOLDS) -> pd.DataFrame:
+    """
+    RFM scores plus the segment column, for any entity's metrics
+    """
+    scored = create_rfm_scores(metrics)
+    scored['segment'] = assign_segments(scored, thresholds)
+    return scored
+
+
+def segment_summary(customers: pd.DataFrame) -> pd.DataFrame:
+    """
+    Per-segment performance table (reports/segment_analysis.csv),
+    sorted by average spend
+    """
+    stats = segment_stats(customers)
+    summary = pd.DataFrame({
+        'customer_count': stats['count'],
+        'total_revenue': stats['monetary_sum'],
+        'avg_spent': stats['monetary_mean'],
+        'median_spent': stats['monetary_median'],
+        'avg_orders': stats['frequency_mean'],
+        'avg_recency': stats['recency_days_mean'],
+        'avg_order_value': stats['avg_order_value_mean'],
+        'avg_r': stats['r_score_mean'],
+        'avg_f': stats['f_score_mean'],
+        'avg_m': stats['m_score_mean']
+    }).round(2)
+
+    # Percentage of total customers and revenue
+    summary['customer_pct'] = (summary['customer_count'] / len(customers) * 100).round(1)
+    summary['revenue_pct'] = (summary['total_revenue'] / summary['total_revenue'].sum() * 100).round(1)
+
+    # Delivery experience (customer metrics from before the delivery features lack these)
+    if 'late_orders_sum' in stats.columns:
+        summary['avg_lead_time_days'] = stats['avg_lead_time_days_mean'].round(1)
+        summary['late_order_pct'] = (stats['late_orders_sum'] / stats['delivered_orders_sum'] * 100).round(1)
+    return summary.sort_values('avg_spent', ascending=False)
+
+
+def decode_customer_ids(customers: pd.DataFrame, data_dir: str) -> pd.DataFrame:
+    """
+    Copy of `customers` with integer customer codes replaced by the
+    original id strings (unchanged when 02 did not encode ids)
+    """
+    export = customers.copy()
+    customer_ids = load_dictionaries(data_dir, ['customer_unique_id']).get('customer_unique_id')
+    if customer_ids is not None and pd.api.types.is_integer_dtype(export['customer_id']):
+        export['customer_id'] = customer_ids.decode(export['customer_id'])
+    return export
+
+
+def decode_seller_ids(sellers: pd.DataFrame, data_dir: str) -> pd.DataFrame:
+    """
+    Copy of `sellers` with integer seller codes replaced by the original
+    id strings (unchanged when 02 did not encode ids)
+    """
+    export = sellers.copy()
+    seller_ids = load_dictionaries(data_dir, ['seller_id']).get('seller_id')
+    if seller_ids is not None and pd.api.types.is_integer_dtype(export['seller_id']):
+        export['seller_id'] = seller_ids.decode(export['seller_id'])
+    return export
@@ -0,0 +1,36 @@
+# segmentation/plotting.py
+# ============================================
+# LAZY MATPLOTLIB / SEABORN
+# ============================================
+#
+# matplotlib and seaborn take most of a chart script's startup time, so
+# they are imported (and the project chart style applied) on the first
+# load_plotting() call rather than at import time.
+
+from importlib.metadata import version
+
+_PLOTTING = None
+
+
+def load_plotting(style='seaborn-v0_8-darkgrid', palette='husl'):
+    """
+    (pyplot, seaborn) with the project chart style applied once
+    """
+    global _PLOTTING
+    if _PLOTTING is None:
+        import matplotlib
+        matplotlib.use('Agg')
+        import matplotlib.pyplot as plt
+        import seaborn as sns
+
+        plt.style.use(style)
+        sns.set_palette(palette)
+        _PLOTTING = (plt, sns)
+    return _PLOTTING
+
+
+def plotting_versions():
+    """
+    Installed matplotlib and seaborn versions, read without importing them
+    """
+    return {'matplotlib': version('matplotlib'), 'seaborn': version('seaborn')}
@@ -0,0 +1,167 @@
+# serving_db.py
+# ============================================
+# INDEXED SQLITE SERVING EXPORT
+# ============================================
+#
+# Used by 14_sqlite_export.py and benchmark_sqlite_export.py. Loads the
+# segmented customers, the per-segment summary and a state x segment
+# rollup into one SQLite file for BI tools and the CRM team. Rows go in
+# with batched executemany() inside a single transaction, indexes are
+# built after the load (one sort per index instead of a B-tree insert
+# per row), and the database is written next to the target and renamed
+# over it, so readers never open a half-written file.
+#
+# customers is indexed on customer_id and on segment, state and
+# segment + state, each followed by monetary: "At Risk customers in SP
+# by spend" is a range scan of (segment, state, monetary) read
+# backwards, with no sort step.
+
+import os
+import sqlite3
+
+import pandas as pd
+
+from segmentation.pipeline import segment_summary
+
+INDEXES = {
+    'customers': [
+        ('idx_customers_id', ['customer_id'], True),
+        ('idx_customers_segment_state', ['segment', 'state', 'monetary'], False),
+        ('idx_customers_segment', ['segment', 'monetary'], False),
+        ('idx_customers_state', ['state', 'monetary'], False),
+    ],
+}
+
+# Columns segment_customers() may sort by (all lead an index after the filters)
+SORT_COLUMNS = ['monetary']
+
+
+def _sql_type(dtype):
+    if dtype.kind in 'iub':
+        return 'INTEGER'
+    if dtype.kind == 'f':
+        return 'REAL'
+    return 'TEXT'
+
+
+def state_segment_rollup(customers):
+    """
+    Customers, revenue and average spend per state x segment
+    """
+    rollup = customers.groupby(['state', 'segment']).agg(
+        customer_count=('monetary', 'size'),
+        total_revenue=('monetary', 'sum'),
+        avg_spent=('monetary', 'mean'),
+        avg_orders=('frequency', 'mean'),
+        avg_recency=('recency_days', 'mean'),
+    ).reset_index()
+    state_totals = rollup.groupby('state')['total_revenue'].transform('sum')
+    rollup['state_revenue_pct'] = rollup['total_revenue'] / state_totals * 100
+    return rollup
+
+
+def _load_table(conn, name, frame, primary_key=None, batch_size=10000):
+    """
+    Create `name` from the frame's columns and insert its rows in batches.
+    Returns the number of rows loaded.
+    """
+    columns = ', '.join(f'"{col}" {_sql_type(frame[col].dtype)}' for col in frame.columns)
+    if primary_key:
+        columns += f", PRIMARY KEY ({', '.join(primary_key)})"
+    conn.execute(f'CREATE TABLE "{name}" ({columns})')
+
+    insert = f'INSERT INTO "{name}" VALUES ({", ".join("?" * len(frame.columns))})'
+    # Plain Python values per column (sqlite3 cannot bind numpy scalars); NaN is stored as NULL
+    values = [frame[col].to_numpy(dtype=object) if frame[col].dtype.kind in 'OSU'
+              else frame[col].to_numpy().tolist() for col in frame.columns]
+    for start in range(0, len(frame), batch_size):
+        conn.executemany(insert, zip(*(column[start:start + batch_size] for column in values)))
+    return len(frame)
+
+
+def export_database(db_file, customers, batch_size=10000):
+    """
+    Write the serving database for a segmented customer table.
+    Returns {table: rows loaded}.
+    """
+    customers = customers.reset_index(drop=True)
+    tables = {
+        'customers': (customers, None),
+        'segment_summary': (segment_summary(customers).reset_index(), ['segment']),
+        'state_segments': (state_segment_rollup(customers), ['state', 'segment']),
+    }
+
+    temp_file = f'{db_file}.tmp'
+    if os.path.exists(temp_file):
+        os.remove(temp_file)
+    # Autocommit mode so the single transaction below is explicit
+    conn = sqlite3.connect(temp_file, isolation_level=None)
+    try:
+        # The file is renamed into place only once complete, so no journal is needed
+        conn.execute('PRAGMA journal_mode = OFF')
+        conn.execute('PRAGMA synchronous = OFF')
+        conn.execute('BEGIN')
+        rows = {name: _load_table(conn, name, frame, key, batch_size) for name, (frame, key) in tables.items()}
+        for table, indexes in INDEXES.items():
+            for index, columns, unique in indexes:
+                conn.execute(f'CREATE {"UNIQUE " if unique else ""}INDEX "{index}" '
+                             f'ON "{table}" ({", ".join(columns)})')
+        conn.execute('COMMIT')
+        # Planner statistics for the indexes
+        conn.execute('ANALYZE')
+    finally:
+        conn.close()
+    os.replace(temp_file, db_file)
+    return rows
+
+
+def connect(db_file):
+    """
+    Read-only connection to a serving database
+    """
+    return sqlite3.connect(f'file:{db_file}?mode=ro', uri=True)
+
+
+def _customer_query(segment=None, state=None, order_by='monetary', descending=True, limit=None):
+    if order_by not in SORT_COLUMNS:
+        raise ValueError(f"order_by must be one of: {', '.join(SORT_COLUMNS)}")
+    filters, params = [], []
+    for col, value in (('segment', segment), ('state', state)):
+        if value is not None:
+            filters.append(f'{col} = ?')
+            params.append(value)
+    sql = 'SELECT * FROM customers'
+    if filters:
+        sql += ' WHERE ' + ' AND '.join(filters)
+    sql += f' ORDER BY {order_by} {"DESC" if descending else "ASC"}'
+    if limit is not None:
+        sql += ' LIMIT ?'
+        params.append(int(limit))
+    return sql, params
+
+
+def segment_customers(conn, segment=None, state=None, order_by='monetary', descending=True, limit=None):
+    """
+    Customers of a segment and/or state, sorted by spend (highest first)
+    """
+    sql, params = _customer_query(segment, state, order_by, descending, limit)
+    return pd.read_sql_query(sql, conn, params=params)
+
+
+def customer_query_plan(conn, segment=None, state=None, order_by='monetary', descending=True, limit=None):
+    """
+    SQLite's plan for a segment_customers() query, one step per line
+    """
+    sql, params = _customer_query(segment, state, order_by, descending, limit)
+    return '\n'.join(row[-1] for row in conn.execute(f'EXPLAIN QUERY PLAN {sql}', params))
+
+
+def lookup_customer(conn, customer_id):
+    """
+    One customer's row as a dict (None when unknown)
+    """
+    cursor = conn.execute('SELECT * FROM customers WHERE customer_id = ?', (customer_id,))
+    row = cursor.fetchone()
+    if row is None:
+        return None
+    return dict(zip([col[0] for col in cursor.description], row))
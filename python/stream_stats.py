@@ -0,0 +1,192 @@
+# stream_stats.py
+# ============================================
+# STREAMING, BOUNDED-MEMORY DISTRIBUTION STATS
+# ============================================
+#
+# Used by 05_visualizations.py, whose charts are all built from these
+# accumulators instead of the full customer table. Values are folded in
+# chunk by chunk, per segment, in a single pass:
+#   - FixedHistogram counts values into caller-supplied bin edges.
+#   - LogSketch keeps counts in log-spaced buckets (relative accuracy
+#     `alpha`, 0.5% by default), from which quartiles, whiskers and an
+#     equal-width display histogram are derived.
+#   - GroupTotals keeps the count and sum of a column per group, where
+#     a group can be a combination of columns (e.g. r_score x f_score).
+# Memory is a few thousand counters per segment, whatever the number
+# of customers.
+
+import numpy as np
+import pandas as pd
+
+
+class FixedHistogram:
+    """
+    Per-group counts over fixed bin edges (left-closed, like pd.cut(right=False))
+    """
+
+    def __init__(self, edges):
+        self.edges = np.asarray(edges, dtype=float)
+        self.counts = {}
+
+    def update(self, values, groups=None):
+        values = np.asarray(values, dtype=float)
+        bins = np.searchsorted(self.edges, values, side='right') - 1
+        inside = (bins >= 0) & (bins < len(self.edges) - 1)
+        group_codes, group_names = _factorize_groups(groups, len(values))
+        n_bins = len(self.edges) - 1
+        table = np.bincount(group_codes[inside] * n_bins + bins[inside],
+                            minlength=len(group_names) * n_bins).reshape(len(group_names), n_bins)
+        for name, row in zip(group_names, table):
+            self.counts[name] = self.counts.get(name, 0) + row
+        return self
+
+    def total(self):
+        return sum(self.counts.values())
+
+
+class LogSketch:
+    """
+    Per-group quantile sketch over log-spaced buckets of non-negative values
+    """
+
+    def __init__(self, alpha=0.005, min_value=1e-2, max_value=1e9):
+        self.gamma = (1 + alpha) / (1 - alpha)
+        self.log_gamma = np.log(self.gamma)
+        self.offset = int(np.floor(np.log(min_value) / self.log_gamma))
+        self.n_buckets = int(np.ceil(np.log(max_value) / self.log_gamma)) - self.offset + 1
+        # Bucket 0 holds values below min_value (including zeros)
+        self.counts = {}
+        self.minimum = {}
+        self.maximum = {}
+
+    def update(self, values, groups=None):
+        values = np.asarray(values, dtype=float)
+        group_codes, group_names = _factorize_groups(groups, len(values))
+        buckets = self._bucket(values)
+        table = np.bincount(group_codes * self.n_buckets + buckets,
+                            minlength=len(group_names) * self.n_buckets).reshape(len(group_names), self.n_buckets)
+        lows = pd.Series(values).groupby(group_codes).min()
+        highs = pd.Series(values).groupby(group_codes).max()
+        for code, name in enumerate(group_names):
+            self.counts[name] = self.counts.get(name, 0) + table[code]
+            if code in lows.index:
+                self.minimum[name] = min(self.minimum.get(name, np.inf), lows[code])
+                self.maximum[name] = max(self.maximum.get(name, -np.inf), highs[code])
+        return self
+
+    def _bucket(self, values):
+        with np.errstate(divide='ignore'):
+            index = np.ceil(np.log(values) / self.log_gamma).astype(np.int64) - self.offset
+        return np.clip(np.where(values > 0, index, 0), 0, self.n_buckets - 1)
+
+    def _values(self):
+        # Representative value of each bucket (relative error <= alpha)
+        index = np.arange(self.n_buckets) + self.offset
+        values = 2 * self.gamma ** index / (self.gamma + 1)
+        values[0] = 0.0
+        return values
+
+    def merged(self, groups=None):
+        """
+        Counts summed over the given groups (all groups by default)
+        """
+        groups = self.counts.keys() if groups is None else groups
+        return sum(self.counts[g] for g in groups)
+
+    def size(self, group):
+        return int(self.counts[group].sum())
+
+    def quantiles(self, qs, group=None):
+        counts = self.counts[group] if group is not None else self.merged()
+        lo, hi = self._range(group)
+        cumulative = np.cumsum(counts)
+        ranks = np.asarray(qs) * (cumulative[-1] - 1)
+        buckets = np.searchsorted(cumulative, ranks, side='right')
+        return np.clip(self._values()[buckets], lo, hi)
+
+    def _range(self, group=None):
+        if group is not None:
+            return self.minimum[group], self.maximum[group]
+        return min(self.minimum.values()), max(self.maximum.values())
+
+    def box_stats(self, group, label=None):
+        """
+        Stats dict for matplotlib's Axes.bxp (1.5 * IQR whiskers, no fliers)
+        """
+        q1, med, q3 = self.quantiles([0.25, 0.5, 0.75], group)
+        iqr = q3 - q1
+        counts = self.counts[group]
+        values = self._values()
+        lo, hi = self._range(group)
+        occupied = values[counts > 0]
+        inside = occupied[(occupied >= q1 - 1.5 * iqr) & (occupied <= q3 + 1.5 * iqr)]
+        whislo = max(inside.min(), lo) if len(inside) else q1
+        whishi = min(inside.max(), hi) if len(inside) else q3
+        return {'label': label if label is not None else group, 'med': med, 'q1': q1, 'q3': q3,
+                'whislo': whislo, 'whishi': whishi, 'fliers': []}
+
+    def histogram(self, bins=50, group=None):
+        """
+        Equal-width histogram between the observed min and max, rebinned
+        from the sketch buckets. Returns (counts, edges) like np.histogram.
+        """
+        counts = self.counts[group] if group is not None else self.merged()
+        lo, hi = self._range(group)
+        values = np.clip(self._values(), lo, hi)
+        return np.histogram(values, bins=bins, range=(lo, hi), weights=counts)
+
+
+class GroupTotals:
+    """
+    Per-group count and sum (hence mean) of a column; groups may be a
+    Series or a DataFrame of several key columns
+    """
+
+    def __init__(self):
+        self.table = None
+
+    def update(self, values, groups=None):
+        values = pd.Series(np.asarray(values, dtype=float))
+        if groups is None:
+            keys = np.zeros(len(values), dtype=np.int64)
+        elif isinstance(groups, pd.DataFrame):
+            keys = [groups[col].to_numpy() for col in groups.columns]
+        else:
+            keys = np.asarray(groups)
+        part = values.groupby(keys).agg(['count', 'sum'])
+        if isinstance(groups, pd.DataFrame):
+            part.index.names = list(groups.columns)
+        self.table = part if self.table is None else self.table.add(part, fill_value=0)
+        return self
+
+    def counts(self):
+        return self.table['count'].astype(np.int64)
+
+    def sums(self):
+        return self.table['sum']
+
+    def means(self):
+        return self.table['sum'] / self.table['count']
+
+
+def _factorize_groups(groups, n):
+    if groups is None:
+        return np.zeros(n, dtype=np.int64), [None]
+    codes, names = pd.factorize(np.asarray(groups))
+    return codes.astype(np.int64), list(names)
+
+
+def scan_csv(path, accumulators, group_column='segment', chunksize=1_000_000):
+    """
+    Stream a CSV once, folding every (column, accumulator) pair chunk by
+    chunk, grouped by `group_column`. A (column, accumulator, group columns)
+    triple groups that accumulator by a list of columns instead.
+    """
+    specs = [(spec[0], spec[1], spec[2] if len(spec) > 2 else group_column) for spec in accumulators]
+    usecols = set()
+    for column, _, groups in specs:
+        usecols |= {column, *([groups] if isinstance(groups, str) else groups)}
+    for chunk in pd.read_csv(path, usecols=sorted(usecols), chunksize=chunksize):
+        for column, accumulator, groups in specs:
+            accumulator.update(chunk[column], chunk[groups])
+    return accumulators
@@ -0,0 +1,248 @@
+# tenant_batch.py
+# ============================================
+# MULTI-TENANT BATCH RUNNER
+# ============================================
+#
+# Used by 13_tenant_batch.py. Every tenant (store) gets its own project
+# directory with data/, reports/ and figures/; its source CSVs are
+# symlinked into data/ and steps 02-06 run there as subprocesses with
+# SEGMENTATION_PROJECT_DIR pointing at it, so tenants never share an
+# output file. A thread pool keeps `workers` tenants in flight, largest
+# input first so one big store doesn't start last and set the wall time.
+# Each step can be capped at a memory limit (address space, Linux only),
+# set with prlimit on the child right after it starts: preexec_fn is not
+# safe with the pool's threads. Peak RSS comes from wait4 resource usage.
+
+import os
+import shutil
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import pandas as pd
+
+from data_loader import SOURCE_TABLES
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+PIPELINE_STEPS = [
+    '02_data_preparation.py',
+    '03_customer_metrics.py',
+    '04_rfm_segmentation.py',
+    '05_visualizations.py',
+    '06_final_report.py',
+]
+
+# Each step's last output; a step that exits cleanly without it bailed out early
+STEP_OUTPUTS = {
+    '02_data_preparation.py': os.path.join('data', 'prepared_data.csv'),
+    '03_customer_metrics.py': os.path.join('data', 'customer_metrics.csv'),
+    '04_rfm_segmentation.py': os.path.join('data', 'segmented_customers.csv'),
+    '06_final_report.py': os.path.join('reports', 'segment_summary.csv'),
+}
+
+
+def read_manifest(manifest_file):
+    """
+    Tenant manifest: CSV with `tenant` and `input_dir` columns. Relative
+    input dirs are resolved against the manifest's own folder.
+    """
+    manifest = pd.read_csv(manifest_file, dtype=str, skipinitialspace=True)
+    missing = {'tenant', 'input_dir'} - set(manifest.columns)
+    if missing:
+        raise ValueError(f"manifest is missing column(s): {', '.join(sorted(missing))}")
+    # Tenant names become folder names under the output dir; nothing may escape it
+    unsafe = [str(name) for name in manifest['tenant'] if not _is_plain_name(name)]
+    if unsafe:
+        raise ValueError(f"tenant names must be plain folder names: {', '.join(map(repr, unsafe))}")
+    if manifest['tenant'].duplicated().any():
+        raise ValueError(f"duplicate tenant(s): {', '.join(manifest['tenant'][manifest['tenant'].duplicated()])}")
+
+    base_dir = os.path.dirname(os.path.abspath(manifest_file))
+    manifest['input_dir'] = [os.path.normpath(os.path.join(base_dir, d)) for d in manifest['input_dir']]
+    return manifest[['tenant', 'input_dir']]
+
+
+def _is_plain_name(name):
+    """
+    True for a single path component that stays inside its parent folder
+    """
+    if not isinstance(name, str) or name.strip() in ('', '.', '..'):
+        return False
+    separators = [os.sep] + ([os.altsep] if os.altsep else [])
+    return (not any(sep in name for sep in separators) and not os.path.isabs(name)
+            and not os.path.splitdrive(name)[0])
+
+
+def input_bytes(input_dir):
+    """
+    Total size of a tenant's source CSVs (missing files count as 0)
+    """
+    total = 0
+    for file_name in SOURCE_TABLES.values():
+        path = os.path.join(input_dir, file_name)
+        if os.path.exists(path):
+            total += os.path.getsize(path)
+    return total
+
+
+def prepare_tenant(input_dir, tenant_dir):
+    """
+    Create the tenant's project directory and link its source CSVs into
+    data/ (copied where symlinks are not available)
+    """
+    data_dir = os.path.join(tenant_dir, 'data')
+    for folder in ('data', 'reports', 'figures', 'logs'):
+        os.makedirs(os.path.join(tenant_dir, folder), exist_ok=True)
+
+    for file_name in SOURCE_TABLES.values():
+        source = os.path.join(input_dir, file_name)
+        target = os.path.join(data_dir, file_name)
+        if not os.path.exists(source):
+            raise FileNotFoundError(source)
+        if os.path.lexists(target):
+            if os.path.realpath(target) == os.path.realpath(source):
+                continue
+            os.remove(target)
+        try:
+            os.symlink(source, target)
+        except (OSError, NotImplementedError):
+            shutil.copy2(source, target)
+
+
+def _limit_memory(pid, memory_bytes):
+    """
+    Cap a running child's address space (no-op where prlimit is missing)
+    """
+    if resource is None or not hasattr(resource, 'prlimit'):
+        return
+    try:
+        resource.prlimit(pid, resource.RLIMIT_AS, (memory_bytes, memory_bytes))
+    except ProcessLookupError:
+        pass  # already exited; wait4 still reports it
+
+
+def run_step(script, tenant_dir, memory_bytes=None, extra_args=()):
+    """
+    Run one pipeline script for a tenant. Returns (returncode, seconds,
+    peak RSS bytes or None); stdout and stderr go to logs/<step>.log.
+    """
+    env = dict(os.environ,
+               SEGMENTATION_PROJECT_DIR=tenant_dir,
+               MPLBACKEND='Agg',
+               PYTHONUNBUFFERED='1',
+               # Parallelism comes from the tenant pool; keep each step single-threaded
+               OPENBLAS_NUM_THREADS='1', OMP_NUM_THREADS='1', MKL_NUM_THREADS='1')
+    log_file = os.path.join(tenant_dir, 'logs', script.replace('.py', '.log'))
+
+    start = time.perf_counter()
+    with open(log_file, 'w') as log:
+        process = subprocess.Popen([sys.executable, os.path.join(SCRIPTS_DIR, script), *extra_args],
+                                   cwd=SCRIPTS_DIR, env=env, stdout=log, stderr=subprocess.STDOUT)
+        if memory_bytes:
+            _limit_memory(process.pid, memory_bytes)
+        if hasattr(os, 'wait4'):
+            _, status, usage = os.wait4(process.pid, 0)
+            process.returncode = os.waitstatus_to_exitcode(status)
+            # ru_maxrss is in KB on Linux, bytes on macOS
+            peak_rss = usage.ru_maxrss if sys.platform == 'darwin' else usage.ru_maxrss * 1024
+        else:
+            process.wait()
+            peak_rss = None
+    seconds = time.perf_counter() - start
+
+    returncode = process.returncode
+    expected = STEP_OUTPUTS.get(script)
+    if returncode == 0 and expected and not os.path.exists(os.path.join(tenant_dir, expected)):
+        returncode = 1
+    return returncode, seconds, peak_rss
+
+
+def run_tenant(tenant, input_dir, output_dir, memory_bytes=None, steps=PIPELINE_STEPS, step_args=None):
+    """
+    Run every step for one tenant, stopping at the first failure.
+    Returns one timing record per step that ran.
+    """
+    tenant_dir = os.path.join(output_dir, tenant)
+    records = []
+    try:
+        prepare_tenant(input_dir, tenant_dir)
+    except FileNotFoundError as e:
+        return [{'tenant': tenant, 'step': 'setup', 'status': f'missing {os.path.basename(str(e))}',
+                 'seconds': 0.0, 'peak_rss_mb': None}]
+
+    for script in steps:
+        # Outputs of an earlier run must not pass for this run's
+        expected = STEP_OUTPUTS.get(script)
+        if expected and os.path.exists(os.path.join(tenant_dir, expected)):
+            os.remove(os.path.join(tenant_dir, expected))
+
+        returncode, seconds, peak_rss = run_step(script, tenant_dir, memory_bytes,
+                                                 (step_args or {}).get(script, ()))
+        records.append({'tenant': tenant, 'step': script.split('_')[0],
+                        'status': 'ok' if returncode == 0 else f'failed ({returncode})',
+                        'seconds': seconds,
+                        'peak_rss_mb': peak_rss / 1024**2 if peak_rss is not None else None})
+        if returncode != 0:
+            break
+    return records
+
+
+def run_batch(manifest, output_dir, workers=1, memory_bytes=None, steps=PIPELINE_STEPS,
+              step_args=None, on_done=None):
+    """
+    Run all tenants of a manifest, largest input first. Returns the
+    timing DataFrame (tenant, step, status, seconds, peak_rss_mb, input_mb);
+    `on_done(tenant, records)` is called as each tenant finishes.
+    """
+    manifest = manifest.assign(input_mb=[input_bytes(d) / 1024**2 for d in manifest['input_dir']])
+    manifest = manifest.sort_values('input_mb', ascending=False, kind='stable')
+
+    records = {}
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        futures = {pool.submit(run_tenant, row.tenant, row.input_dir, output_dir, memory_bytes,
+                               steps, step_args): row.tenant
+                   for row in manifest.itertuples()}
+        for future in as_completed(futures):
+            tenant = futures[future]
+            records[tenant] = future.result()
+            if on_done is not None:
+                on_done(tenant, records[tenant])
+
+    # Report in manifest (largest first) order, not completion order
+    rows = [record for tenant in manifest['tenant'] for record in records[tenant]]
+    timings = pd.DataFrame(rows, columns=['tenant', 'step', 'status', 'seconds', 'peak_rss_mb'])
+    return timings.merge(manifest[['tenant', 'input_mb']], on='tenant', how='left')
+
+
+def tenant_summary(timings):
+    """
+    One row per tenant: status, total seconds and the largest step peak RSS
+    """
+    failed = timings[timings['status'] != 'ok'].groupby('tenant', sort=False)['step'].first()
+    summary = timings.groupby('tenant', sort=False).agg(
+        input_mb=('input_mb', 'first'), seconds=('seconds', 'sum'), peak_rss_mb=('peak_rss_mb', 'max'))
+    summary['status'] = 'ok'
+    summary.loc[failed.index, 'status'] = 'failed at ' + failed
+    return summary
+
+
+def consolidate_reports(output_dir, tenants, report='segment_summary.csv'):
+    """
+    Stack one report from every tenant that produced it, with a Tenant column
+    """
+    frames = []
+    for tenant in tenants:
+        path = os.path.join(output_dir, tenant, 'reports', report)
+        if os.path.exists(path):
+            frames.append(pd.read_csv(path).assign(Tenant=tenant))
+    if not frames:
+        return pd.DataFrame()
+    combined = pd.concat(frames, ignore_index=True)
+    return combined[['Tenant'] + [c for c in combined.columns if c != 'Tenant']]
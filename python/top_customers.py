@@ -0,0 +1,93 @@
+# top_customers.py
+# ============================================
+# TOP-N CUSTOMERS PER GROUP
+# ============================================
+#
+# "Top 500 Champions by spend" style lists from segmented_customers.csv.
+# Rows are grouped by integer codes (a stable sort of small ints, which
+# numpy does as a radix sort) and each group keeps its best n rows with
+# np.argpartition; only the n survivors per group are fully sorted.
+# TopNAccumulator applies the same selection chunk by chunk, keeping
+# at most n candidates per group between chunks, so a single streaming
+# pass handles customer bases that do not fit in memory.
+
+import numpy as np
+import pandas as pd
+
+
+def top_n(frame, metric, n, by=('segment',), largest=True):
+    """
+    Best `n` rows of `frame` by `metric` within each `by` group,
+    ordered by group then rank. Rows with a missing metric are skipped.
+    """
+    by = list(by)
+    frame = frame[frame[metric].notna()]
+    if frame.empty:
+        return frame.assign(rank=pd.Series(dtype='int64'))
+
+    if by:
+        codes = frame.groupby(by, sort=True, observed=True).ngroup().to_numpy()
+    else:
+        codes = np.zeros(len(frame), dtype=np.int64)
+    n_groups = codes.max() + 1
+    codes = codes.astype(np.int16 if n_groups < np.iinfo(np.int16).max else np.int64)
+
+    values = frame[metric].to_numpy(dtype=float)
+    keys = -values if largest else values
+    order = np.argsort(codes, kind='stable')
+    bounds = np.searchsorted(codes[order], np.arange(n_groups + 1))
+
+    selected = []
+    for start, stop in zip(bounds[:-1], bounds[1:]):
+        members = order[start:stop]
+        if len(members) > n:
+            members = members[np.argpartition(keys[members], n - 1)[:n]]
+        # Only the survivors are sorted; stable, so ties keep input order
+        selected.append(members[np.argsort(keys[members], kind='stable')])
+    rows = np.concatenate(selected)
+
+    result = frame.iloc[rows].copy()
+    result['rank'] = np.concatenate([np.arange(1, len(s) + 1) for s in selected])
+    return result.reset_index(drop=True)
+
+
+class TopNAccumulator:
+    """
+    Streaming top_n: feed chunks with add(), read the answer with result()
+    """
+
+    def __init__(self, metric, n, by=('segment',), largest=True):
+        self.metric = metric
+        self.n = n
+        self.by = list(by)
+        self.largest = largest
+        self.candidates = None
+
+    def add(self, chunk):
+        best = top_n(chunk, self.metric, self.n, self.by, self.largest).drop(columns='rank')
+        if self.candidates is not None:
+            best = top_n(pd.concat([self.candidates, best], ignore_index=True),
+                         self.metric, self.n, self.by, self.largest).drop(columns='rank')
+        self.candidates = best
+
+    def result(self):
+        if self.candidates is None:
+            return pd.DataFrame()
+        return top_n(self.candidates, self.metric, self.n, self.by, self.largest)
+
+
+def top_n_csv(path, metric, n, by=('segment',), segments=None, largest=True,
+              columns=None, chunksize=500_000):
+    """
+    top_n over a CSV in one chunked pass; `segments` restricts the
+    segments considered, `columns` the columns carried to the output
+    """
+    if columns is not None:
+        columns = list(dict.fromkeys(list(columns) + list(by) + [metric]
+                                     + (['segment'] if segments else [])))
+    accumulator = TopNAccumulator(metric, n, by, largest)
+    for chunk in pd.read_csv(path, usecols=columns, chunksize=chunksize):
+        if segments:
+            chunk = chunk[chunk['segment'].isin(segments)]
+        accumulator.add(chunk)
+    return accumulator.result()